@@ -15,7 +15,8 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
 db.init_app(app)
 
 # ✅ SIMPLE CORS - This handles OPTIONS automatically
-CORS(app, origins=["http://localhost:3000"], supports_credentials=True)
+CORS(app, origins=["http://localhost:3000"], supports_credentials=True,
+     expose_headers=["X-Next-Cursor"])  # Next-page cursor of paginated event lists
 
 # Register blueprints
 app.register_blueprint(api, url_prefix='/api')
@@ -25,11 +26,22 @@ with app.app_context():
     db.create_all()
     print("✅ Database ready!")
     
-    # Import here to avoid circular imports
-    from trie import build_event_trie, build_company_trie
-    build_event_trie()
-    build_company_trie()
-    print("✅ Search indexes initialized!")
+    # Carry on with the broadcasts a previous run had not finished sending
+    import broadcasts
+    print(f"📣 Resumed {broadcasts.resume_unsent(app)} unsent broadcasts")
+    
+    # Load search indexes from the on-disk snapshot, rebuilding only if it is stale
+    # (index_snapshot.py sets SEARCH_INDEX_INIT=0 to build them itself)
+    if os.environ.get('SEARCH_INDEX_INIT', '1') != '0':
+        # Import here to avoid circular imports
+        from index_snapshot import load_or_build_indexes
+        load_or_build_indexes()
+        print("✅ Search indexes initialized!")
+        
+        # Pre-compute responses for the most frequent searches in the query log
+        from search_cache import query_log, get_query_log_path, prewarm
+        query_log.open(get_query_log_path())
+        print(f"🔥 Search cache pre-warmed with {prewarm(app)} queries")
 
 with app.app_context():
     print("\n" + "="*60)
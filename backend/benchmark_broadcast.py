@@ -0,0 +1,90 @@
+"""
+Broadcast Benchmark for CareerConnect
+=====================================
+
+Times sending one employer broadcast (see broadcasts.py) to every applicant
+of an event, on a temporary SQLite database: batched inserts of the
+messages and bulk updates of the conversation summaries.
+
+    python benchmark_broadcast.py                # 10k applicants
+    python benchmark_broadcast.py 50000          # 50k applicants
+
+Also checks every applicant got exactly one message, and that their
+conversation summaries match.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+
+def fill_database(count):
+    """One employer, one event and count students who all RSVP'd to it"""
+    from werkzeug.security import generate_password_hash
+    from models import db, User, StudentProfile, EmployerProfile, Event, EventRSVP
+
+    password = generate_password_hash('password')
+    db.session.execute(db.insert(User), [
+        {'id': user_id, 'email': f"user{user_id}@example.com", 'password_hash': password,
+         'user_type': 'employer' if user_id == 1 else 'student'}
+        for user_id in range(1, count + 2)
+    ])
+    db.session.execute(db.insert(EmployerProfile), [{'id': 1, 'user_id': 1, 'company_name': 'Benchmark Inc'}])
+    db.session.execute(db.insert(StudentProfile), [
+        {'id': student_id, 'user_id': student_id + 1, 'full_name': f"Student {student_id}"}
+        for student_id in range(1, count + 1)
+    ])
+    db.session.execute(db.insert(Event), [
+        {'id': 1, 'employer_id': 1, 'title': 'Career Fair', 'event_date': datetime(2030, 1, 1), 'rsvp_count': count}
+    ])
+    db.session.execute(db.insert(EventRSVP), [
+        {'event_id': 1, 'student_id': student_id} for student_id in range(1, count + 1)
+    ])
+    db.session.commit()
+
+
+def run(app, count):
+    from models import db, Broadcast, Conversation, Message
+    from broadcasts import send_broadcast, BATCH_SIZE
+
+    with app.app_context():
+        fill_database(count)
+
+        broadcast = Broadcast(event_id=1, employer_id=1, subject='Career Fair', message_text='See you there!',
+                              total=count)
+        db.session.add(broadcast)
+        db.session.commit()
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            send_broadcast(broadcast.id)
+        elapsed = time.perf_counter() - started
+
+        broadcast = db.session.get(Broadcast, broadcast.id)
+        assert broadcast.status == 'sent' and broadcast.sent == count
+        assert Message.query.count() == count
+        assert Conversation.query.filter(
+            Conversation.message_count == 1,
+            Conversation.student_unread == 1,
+            Conversation.last_message_id == Message.id,
+            Message.conversation_id == Conversation.id
+        ).count() == count
+
+        print(f"📣 {count} messages in batches of {BATCH_SIZE}: {elapsed:.2f} s ({count / elapsed:.0f} messages/s)")
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("CareerConnect Broadcast Benchmark")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(directory, 'benchmark.db')
+        os.environ['SEARCH_INDEX_INIT'] = '0'
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            from app import app
+        run(app, int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
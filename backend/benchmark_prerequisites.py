@@ -0,0 +1,155 @@
+"""
+Prerequisite Ordering Benchmark for CareerConnect
+=================================================
+
+Times ranking.build_event_dependency_graph (Kahn's algorithm over the
+event_prerequisites links, ties broken by relevance score in a heap) against
+the original ordering, which linked every pair of events with different
+scores: O(n²) edges, so it is only run on the smaller catalogues.
+
+Also times finding the cycle when one link closes a long prerequisite chain.
+
+    python benchmark_prerequisites.py            # up to 50k synthetic events
+    python benchmark_prerequisites.py 20000      # smaller catalogue
+
+No database is needed; events and prerequisites are generated in memory.
+"""
+
+import random
+import sys
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from models import PREDEFINED_SKILLS, JOB_PREFERENCES
+from ranking import build_event_dependency_graph, relevance_scorer, PrerequisiteCycleError
+
+# The original ordering is quadratic; skip it beyond this many events
+MAX_QUADRATIC = 4000
+
+
+def generate_catalogue(count, seed=42):
+    """(events, prerequisites, student) shaped like the models ranking reads"""
+    rng = random.Random(seed)
+    tags = PREDEFINED_SKILLS + JOB_PREFERENCES
+    start = datetime(2026, 1, 1)
+
+    events = []
+    for event_id in range(1, count + 1):
+        events.append(SimpleNamespace(
+            id=event_id,
+            title=' '.join(rng.sample(tags, 2)),
+            tags=','.join(rng.sample(tags, rng.randint(1, 4))),
+            event_date=start + timedelta(hours=rng.randrange(24 * 365)),
+            employer=None
+        ))
+
+    # Up to 3 prerequisites per event, always among earlier IDs so there is no cycle
+    prerequisites = defaultdict(list)
+    for event_id in range(2, count + 1):
+        for prerequisite_id in rng.sample(range(1, event_id), min(event_id - 1, rng.randint(0, 3))):
+            prerequisites[event_id].append(prerequisite_id)
+
+    student = SimpleNamespace(
+        skills=[SimpleNamespace(skill_name=skill) for skill in rng.sample(PREDEFINED_SKILLS, 5)],
+        job_preferences=','.join(rng.sample(JOB_PREFERENCES, 3))
+    )
+
+    return events, prerequisites, student
+
+
+def quadratic_dependency_graph(events, student_profile):
+    """The original build_event_dependency_graph, kept for comparison"""
+    graph = defaultdict(list)
+    in_degree = defaultdict(int)
+
+    score = relevance_scorer(student_profile)
+    event_scores = {}
+    for event in events:
+        event_scores[event.id] = score(event)
+        in_degree[event.id] = 0
+
+    sorted_events = sorted(events, key=lambda e: event_scores[e.id], reverse=True)
+
+    for i, event in enumerate(sorted_events):
+        for j in range(i + 1, len(sorted_events)):
+            if event_scores[event.id] > event_scores[sorted_events[j].id]:
+                graph[event.id].append(sorted_events[j].id)
+                in_degree[sorted_events[j].id] += 1
+
+    queue = deque([event_id for event_id in in_degree if in_degree[event_id] == 0])
+    sorted_event_ids = []
+
+    while queue:
+        event_id = queue.popleft()
+        sorted_event_ids.append(event_id)
+
+        for neighbor in graph[event_id]:
+            in_degree[neighbor] -= 1
+            if in_degree[neighbor] == 0:
+                queue.append(neighbor)
+
+    event_map = {event.id: event for event in events}
+    return [event_map[event_id] for event_id in sorted_event_ids if event_id in event_map]
+
+
+def check_order(ordered, events, prerequisites):
+    """Every event exactly once, after all of its prerequisites"""
+    position = {event.id: i for i, event in enumerate(ordered)}
+    assert len(position) == len(events)
+    for event_id, required in prerequisites.items():
+        for prerequisite_id in required:
+            assert position[prerequisite_id] < position[event_id]
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def run(max_count):
+    counts = sorted({count for count in (1000, 2000, 4000, 10000, 50000) if count < max_count} | {max_count})
+
+    print(f"{'events':>8} {'links':>8} {'kahn + heap (ms)':>17} {'original (ms)':>14}")
+
+    for count in counts:
+        events, prerequisites, student = generate_catalogue(count)
+
+        ordered, kahn_time = timed(build_event_dependency_graph, events, student, prerequisites)
+        check_order(ordered, events, prerequisites)
+
+        original = '-'
+        if count <= MAX_QUADRATIC:
+            _, quadratic_time = timed(quadratic_dependency_graph, events, student)
+            original = f"{quadratic_time * 1e3:.1f}"
+
+        links = sum(len(required) for required in prerequisites.values())
+        print(f"{count:>8} {links:>8} {kahn_time * 1e3:>17.1f} {original:>14}")
+
+
+def run_cycle(count):
+    """A chain 1 <- 2 <- ... <- count closed by making event 1 depend on the last"""
+    events, _, student = generate_catalogue(count)
+    prerequisites = {event_id: [event_id - 1] for event_id in range(2, count + 1)}
+    prerequisites[1] = [count]
+
+    started = time.perf_counter()
+    try:
+        build_event_dependency_graph(events, student, prerequisites)
+        raise AssertionError('cycle not detected')
+    except PrerequisiteCycleError as e:
+        elapsed = time.perf_counter() - started
+        assert sorted(e.event_ids) == list(range(1, count + 1))
+
+    print(f"\n🔁 {count}-event prerequisite cycle reported in {elapsed * 1e3:.1f} ms")
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("CareerConnect Prerequisite Ordering Benchmark")
+    print("=" * 60)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    run(count)
+    run_cycle(count)
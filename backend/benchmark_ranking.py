@@ -0,0 +1,173 @@
+"""
+Ranking Engine Benchmark for CareerConnect
+==========================================
+
+Compares the ranking strategies of ranking_engine.py ('bitset', 'sql',
+'heap' and 'scan') for each weight profile on synthetic catalogues: latency
+of one page of 20 for a set of students, and the peak memory allocated in
+Python while ranking it. Every strategy must return the same pages; this is
+checked too.
+
+    python benchmark_ranking.py              # 10k and 50k synthetic events
+    python benchmark_ranking.py 100000       # one catalogue of 100k events
+
+Events, employers and students are generated in memory, and copied into a
+temporary SQLite database for the 'sql' strategy.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from flask import Flask
+
+from models import (
+    db, PREDEFINED_SKILLS, JOB_PREFERENCES, Event, EmployerProfile, StudentProfile, Tag, EventTag, StudentInterest
+)
+from ranking_engine import RankingEngine, WEIGHT_PROFILES, STRATEGIES
+from tag_index import TagIndex, get_event_terms
+
+PAGE_SIZE = 20
+STUDENTS = 10
+
+
+def generate_catalogue(count, seed=42):
+    """(events, employers, students) shaped like the models the engine reads"""
+    rng = random.Random(seed)
+    tags = PREDEFINED_SKILLS + JOB_PREFERENCES
+    industries = ['Technology', 'Finance', 'Healthcare', 'Education', 'Retail', 'Data Science', 'Cloud Computing']
+    start = datetime(2026, 1, 1)
+
+    employers = [
+        SimpleNamespace(id=employer_id, company_name=f"{rng.choice(tags)} {rng.choice(['Labs', 'Inc', 'Group'])}",
+                        industry=rng.choice(industries))
+        for employer_id in range(1, count // 25 + 2)
+    ]
+
+    events = []
+    for event_id in range(1, count + 1):
+        employer = rng.choice(employers)
+        events.append(SimpleNamespace(
+            id=event_id,
+            title=f"{rng.choice(tags)} {rng.choice(['Workshop', 'Meetup', 'Career Fair', 'Info Session'])}",
+            tags=','.join(rng.sample(tags, rng.randint(1, 5))),
+            event_date=start + timedelta(hours=rng.randrange(24 * 365)),
+            employer=employer,
+            employer_id=employer.id
+        ))
+
+    students = [
+        SimpleNamespace(
+            id=student_id,
+            skills=[SimpleNamespace(skill_name=skill) for skill in rng.sample(PREDEFINED_SKILLS, rng.randint(1, 8))],
+            job_preferences=','.join(rng.sample(JOB_PREFERENCES, rng.randint(0, 4)))
+        )
+        for student_id in range(1, STUDENTS + 1)
+    ]
+
+    return events, employers, students
+
+
+def build_index(events, employers):
+    """A sealed TagIndex of the catalogue, as build_tag_index makes it"""
+    index = TagIndex()
+    for event in sorted(events, key=lambda event: (event.event_date, event.id)):
+        tags, title_words = get_event_terms(event)
+        index.add(event.id, event.event_date, event.employer_id, tags, title_words)
+    index.seal()
+    for employer in employers:
+        index.set_employer(employer.id, employer.company_name, employer.industry)
+    index.copy_on_write = True
+    return index
+
+
+def fill_database(events, employers, students):
+    """Insert the catalogue, with its tags interned, into the (empty) database of the app context"""
+    tag_ids = {}
+
+    def tag_id(name):
+        return tag_ids.setdefault(Tag.key(name), len(tag_ids) + 1)
+
+    event_tags = {(event.id, tag_id(tag)) for event in events for tag in event.tags.split(',')}
+    interests = {(student.id, tag_id(skill.skill_name), 'skill') for student in students for skill in student.skills}
+    interests |= {(student.id, tag_id(pref), 'preference')
+                  for student in students for pref in student.job_preferences.split(',') if pref}
+
+    db.session.execute(db.insert(EmployerProfile), [
+        {'id': employer.id, 'user_id': employer.id, 'company_name': employer.company_name, 'industry': employer.industry}
+        for employer in employers
+    ])
+    db.session.execute(db.insert(Event), [
+        {'id': event.id, 'employer_id': event.employer_id, 'title': event.title, 'tags': event.tags,
+         'event_date': event.event_date}
+        for event in events
+    ])
+    db.session.execute(db.insert(StudentProfile), [
+        {'id': student.id, 'user_id': student.id, 'job_preferences': student.job_preferences} for student in students
+    ])
+    db.session.execute(db.insert(Tag), [{'id': i, 'name': name} for name, i in tag_ids.items()])
+    db.session.execute(db.insert(EventTag), [{'event_id': e, 'tag_id': t} for e, t in event_tags])
+    db.session.execute(db.insert(StudentInterest), [{'student_id': s, 'tag_id': t, 'kind': k} for s, t, k in interests])
+    db.session.commit()
+
+
+def run(count):
+    print(f"\n🔨 {count} synthetic events, {STUDENTS} students, pages of {PAGE_SIZE}")
+    events, employers, students = generate_catalogue(count)
+    index = build_index(events, employers)
+
+    db.drop_all()
+    db.create_all()
+    fill_database(events, employers, students)
+
+    print(f"{'profile':<10} {'strategy':<8} {'median (ms)':>12} {'max (ms)':>10} {'peak alloc (KB)':>16}")
+
+    for profile in WEIGHT_PROFILES:
+        pages = None
+        for strategy in STRATEGIES:
+            engine = RankingEngine(profile, strategy)
+            source = {'bitset': index, 'sql': None}.get(strategy, events)
+
+            timings = []
+            strategy_pages = []
+            for student in students:
+                started = time.perf_counter()
+                page, _ = engine.rank(student, PAGE_SIZE, source=source)
+                timings.append((time.perf_counter() - started) * 1e3)
+                strategy_pages.append(page)
+            timings.sort()
+
+            # Allocation is measured on a separate pass, since tracing slows ranking down
+            peaks = []
+            for student in students:
+                tracemalloc.start()
+                engine.rank(student, PAGE_SIZE, source=source)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+            if pages is None:
+                pages = strategy_pages
+            assert strategy_pages == pages, f"{strategy} ranks differently"
+
+            print(f"{profile:<10} {strategy:<8} {timings[len(timings) // 2]:>12.2f} {timings[-1]:>10.2f} "
+                  f"{max(peaks) / 1024:>16.0f}")
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("CareerConnect Ranking Engine Benchmark")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as directory:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(directory, 'benchmark.db')
+        db.init_app(app)
+
+        with app.app_context():
+            for count in ([int(sys.argv[1])] if len(sys.argv) > 1 else [10000, 50000]):
+                run(count)
+            db.engine.dispose()
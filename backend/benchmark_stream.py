@@ -0,0 +1,212 @@
+"""
+Live Stream Load Test for CareerConnect
+=======================================
+
+Opens thousands of idle /api/stream connections (see notifications.py)
+against the app served by a threaded Werkzeug server, then measures:
+
+    - time to open them all, and the server's memory and thread count
+    - that every idle connection gets heartbeats
+    - fan-out latency: messages sent until every recipient connection has them
+    - replay of missed events to a client reconnecting with Last-Event-ID
+    - that a connection beyond STREAM_MAX_CONNECTIONS is turned away (503)
+
+    python benchmark_stream.py            # 2000 connections
+    python benchmark_stream.py 5000       # 5000 connections
+
+Runs on a temporary database; clients are plain sockets in this process.
+"""
+
+import contextlib
+import io
+import logging
+import os
+import resource
+import selectors
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+EMPLOYERS = 10
+STUDENTS = 10
+HEARTBEAT_INTERVAL = 2
+
+
+def memory_mb():
+    """Resident memory of this process"""
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def quiet():
+    """Hide what routes print while they serve the test's requests"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def register(app, user_type, number):
+    """(token, profile ID) of a new user"""
+    from models import db, User
+
+    fields = {'company_name': f"Company {number}"} if user_type == 'employer' else {'full_name': f"Student {number}"}
+    with quiet():
+        response = app.test_client().post('/api/auth/register', json={
+            'email': f"{user_type}{number}@example.com", 'password': 'password', 'user_type': user_type, **fields
+        })
+    data = response.get_json()
+
+    with app.app_context():
+        user = db.session.get(User, data['user']['id'])
+        profile = user.employer_profile if user_type == 'employer' else user.student_profile
+        return data['token'], profile.id
+
+
+def open_connection(port, token, last_event_id=None):
+    """A stream opened as a non-browser client would: login token in the Authorization header"""
+    sock = socket.create_connection(('127.0.0.1', port))
+    resume = f"Last-Event-ID: {last_event_id}\r\n" if last_event_id else ''
+    sock.sendall(f"GET /api/stream HTTP/1.1\r\nHost: localhost\r\nAuthorization: Bearer {token}\r\n"
+                 f"{resume}\r\n".encode())
+    return sock
+
+
+def read_until(sockets, received, done, timeout):
+    """Read from sockets into received[sock] until done(data) holds for all; returns the seconds taken"""
+    started = time.perf_counter()
+    selector = selectors.DefaultSelector()
+    pending = set()
+    for sock in sockets:
+        if not done(received[sock]):
+            selector.register(sock, selectors.EVENT_READ)
+            pending.add(sock)
+
+    while pending:
+        remaining = timeout - (time.perf_counter() - started)
+        if remaining <= 0:
+            raise AssertionError(f"{len(pending)} connections timed out")
+        for key, _ in selector.select(remaining):
+            chunk = key.fileobj.recv(65536)
+            if not chunk:
+                raise AssertionError('connection closed by the server')
+            received[key.fileobj] += chunk
+            if done(received[key.fileobj]):
+                selector.unregister(key.fileobj)
+                pending.discard(key.fileobj)
+
+    selector.close()
+    return time.perf_counter() - started
+
+
+def last_event_id(data):
+    return data.rsplit(b'id: ', 1)[1].split(b'\n', 1)[0].decode()
+
+
+def run(app, count):
+    from werkzeug.serving import make_server
+
+    client = app.test_client()
+    print(f"👥 Registering {EMPLOYERS} employers and {STUDENTS} students...")
+    employers = [register(app, 'employer', number) for number in range(EMPLOYERS)]
+    students = [register(app, 'student', number) for number in range(STUDENTS)]
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    server.socket.listen(count)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    memory_before, threads_before = memory_mb(), threading.active_count()
+
+    # Every connection listens for one employer, as if they had many tabs open
+    print(f"\n🔌 Opening {count} connections...")
+    started = time.perf_counter()
+    sockets, listening = [], {}
+    received = {}
+    for number in range(count):
+        employer = number % EMPLOYERS
+        sock = open_connection(port, employers[employer][0])
+        sockets.append(sock)
+        listening[sock] = employer
+        received[sock] = b''
+    read_until(sockets, received, lambda data: b'event: unread' in data, 60)
+    print(f"   {count} streams open in {time.perf_counter() - started:.2f} s")
+    print(f"   server: +{memory_mb() - memory_before:.0f} MB resident, "
+          f"+{threading.active_count() - threads_before} threads")
+
+    # Idle: each connection must hear a heartbeat
+    for sock in sockets:
+        received[sock] = b''
+    elapsed = read_until(sockets, received, lambda data: b': heartbeat' in data, HEARTBEAT_INTERVAL * 5)
+    print(f"\n💓 Heartbeat on all {count} idle connections within {elapsed:.2f} s "
+          f"(interval {HEARTBEAT_INTERVAL} s)")
+
+    # Fan-out: every student messages every employer
+    for sock in sockets:
+        received[sock] = b''
+    messages = EMPLOYERS * STUDENTS
+    started = time.perf_counter()
+    with quiet():
+        for student_token, _ in students:
+            for _, employer_id in employers:
+                response = client.post('/api/messages', headers={'Authorization': f"Bearer {student_token}"},
+                                       json={'recipient_id': employer_id, 'subject': 'Hello', 'message_text': 'Hi!'})
+                assert response.status_code == 201
+    sent = time.perf_counter() - started
+    read_until(sockets, received, lambda data: data.count(b'event: message') >= STUDENTS, 60)
+    delivered = time.perf_counter() - started
+    print(f"\n📨 {messages} messages sent in {sent:.2f} s; "
+          f"{messages * count // EMPLOYERS} deliveries to all connections after {delivered:.2f} s")
+
+    # Replay: a client that missed messages reconnects with the last ID it saw
+    sock = sockets.pop()
+    employer = listening[sock]
+    resume_from = last_event_id(received[sock])
+    sock.close()
+    with quiet():
+        for student_token, _ in students[:3]:
+            client.post('/api/messages', headers={'Authorization': f"Bearer {student_token}"},
+                        json={'recipient_id': employers[employer][1], 'subject': 'Hello', 'message_text': 'Missed?'})
+    time.sleep(0.5)  # Let the server notice the closed connection
+    sock = open_connection(port, employers[employer][0], resume_from)
+    sockets.append(sock)
+    received[sock] = b''
+    read_until([sock], received, lambda data: data.count(b'Missed?') >= 3, 10)
+    assert b'event: resync' not in received[sock]
+    print("\n🔁 Reconnect with Last-Event-ID replayed the 3 missed messages")
+
+    # Cap: one more connection than STREAM_MAX_CONNECTIONS
+    extra = open_connection(port, employers[0][0])
+    extra.settimeout(10)
+    status = extra.recv(65536).split(b'\r\n', 1)[0]
+    extra.close()
+    assert b' 503 ' in status, status
+    print(f"🚫 Connection {count + 1} turned away: {status.decode()}")
+
+    for sock in sockets:
+        sock.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    # Two descriptors per connection, since clients and server share this process
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, 2 * count + 1000)), hard))
+
+    print("=" * 60)
+    print("CareerConnect Live Stream Load Test")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(directory, 'benchmark.db')
+        os.environ['SEARCH_INDEX_INIT'] = '0'
+        os.environ['STREAM_MAX_CONNECTIONS'] = str(count)
+        os.environ['STREAM_HEARTBEAT_INTERVAL'] = str(HEARTBEAT_INTERVAL)
+
+        with quiet():
+            from app import app
+        run(app, count)
@@ -0,0 +1,147 @@
+"""
+Search Index Benchmark for CareerConnect
+========================================
+
+Compares the original character-per-node Trie with the compact RadixTrie on
+a synthetic catalogue: build time, memory held by the index and lookup
+latency for search / starts_with / top_k. Also times typo-tolerant
+fuzzy_search on a 100k-term RadixTrie.
+
+    python benchmark_trie.py            # 100k synthetic events
+    python benchmark_trie.py 20000      # smaller catalogue
+
+No database is needed; events are generated in memory.
+"""
+
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+from models import PREDEFINED_SKILLS, JOB_PREFERENCES
+from trie import Trie, RadixTrie
+
+
+def generate_events(count, seed=42):
+    """Generate (event_id, tokens) pairs shaped like get_event_tokens output"""
+    rng = random.Random(seed)
+
+    # A realistic long tail of words: a shared vocabulary plus rarer made-up terms
+    vocabulary = [
+        ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+        for _ in range(20000)
+    ]
+    companies = [
+        ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9))).title() + ' Inc'
+        for _ in range(2000)
+    ]
+    tags = PREDEFINED_SKILLS + JOB_PREFERENCES
+
+    events = []
+    for event_id in range(1, count + 1):
+        tokens = [rng.choice(vocabulary) for _ in range(rng.randint(2, 6))]
+        tokens.extend(rng.sample(tags, rng.randint(1, 4)))
+        tokens.append(rng.choice(companies))
+        events.append((event_id, tokens))
+
+    return events
+
+
+def build(trie_class, events):
+    """Build an index, returning (trie, seconds, bytes retained)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    trie = trie_class()
+    for event_id, tokens in events:
+        for token in tokens:
+            trie.insert(token, event_id)
+
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return trie, elapsed, retained
+
+
+def time_lookups(method, queries, repeat=3):
+    """Average microseconds per call of method over the queries"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for query in queries:
+            method(query)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best / len(queries) * 1e6
+
+
+def run(count):
+    print(f"🔨 Generating {count} synthetic events...")
+    events = generate_events(count)
+
+    rng = random.Random(7)
+    words = [token.lower() for _, tokens in rng.sample(events, 500) for token in tokens]
+    long_prefixes = [word[:3] for word in words]
+    short_prefixes = [word[:1] for word in words[:100]]
+
+    print(f"{'':<12} {'build (s)':>10} {'memory (MB)':>12} {'search (µs)':>12} "
+          f"{'prefix3 (µs)':>13} {'prefix1 (µs)':>13} {'top_k (µs)':>11}")
+
+    for trie_class in (Trie, RadixTrie):
+        trie, build_time, retained = build(trie_class, events)
+
+        search_us = time_lookups(trie.search, words)
+        prefix3_us = time_lookups(trie.starts_with, long_prefixes)
+        prefix1_us = time_lookups(trie.starts_with, short_prefixes, repeat=1)
+        top_k_us = time_lookups(lambda prefix: trie.top_k(prefix, 4), long_prefixes)
+
+        print(f"{trie_class.__name__:<12} {build_time:>10.2f} {retained / 1e6:>12.1f} {search_us:>12.1f} "
+              f"{prefix3_us:>13.1f} {prefix1_us:>13.1f} {top_k_us:>11.1f}")
+        del trie
+
+
+def run_fuzzy(term_count=100000, seed=5):
+    """Latency of 1- and 2-edit fuzzy lookups for queries with a swapped letter"""
+    rng = random.Random(seed)
+    terms = set()
+    while len(terms) < term_count:
+        terms.add(''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12))))
+    terms = list(terms)
+
+    trie = RadixTrie()
+    for term_id, term in enumerate(terms):
+        trie.insert(term, term_id)
+
+    queries = []
+    for term in rng.sample(terms, 500):
+        letters = list(term)
+        i = rng.randrange(len(letters) - 1)
+        letters[i], letters[i + 1] = letters[i + 1], letters[i]
+        queries.append(''.join(letters))
+
+    print(f"\n🔎 Fuzzy search over {term_count} terms ({len(queries)} misspelled queries)")
+    print(f"{'':<16} {'median (ms)':>12} {'p95 (ms)':>10} {'max (ms)':>10}")
+
+    for max_edits in (1, 2):
+        for prefix in (False, True):
+            timings = []
+            for query in queries:
+                started = time.perf_counter()
+                trie.fuzzy_search(query, max_edits, prefix=prefix)
+                timings.append((time.perf_counter() - started) * 1e3)
+            timings.sort()
+
+            label = f"{max_edits} edit{'s' if max_edits > 1 else ''}{' prefix' if prefix else ''}"
+            print(f"{label:<16} {timings[len(timings) // 2]:>12.2f} "
+                  f"{timings[int(len(timings) * 0.95)]:>10.2f} {timings[-1]:>10.2f}")
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("CareerConnect Search Index Benchmark")
+    print("=" * 60)
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
+    run_fuzzy()
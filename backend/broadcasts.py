@@ -0,0 +1,270 @@
+"""
+Employer Broadcasts for CareerConnect
+=====================================
+
+POST /events/<id>/broadcast messages everyone who RSVP'd to an event. The
+request only records a Broadcast and queues it; a background thread in the
+worker process sends it, BATCH_SIZE applicants per transaction:
+
+    - conversations missing for the batch are created with one multi-row
+      INSERT
+    - one message per applicant is inserted with one executemany INSERT
+    - the batch's conversation summaries (latest message, message count,
+      student unread counter) are updated with a single UPDATE
+
+Applicants are taken in student ID order, and the broadcast records the
+last one sent to with each batch, so its sent count is exact and a
+broadcast sent again carries on after its last committed batch:
+
+    - when the app starts, broadcasts a previous run left queued or sending
+      are queued again (see resume_unsent)
+    - a failed broadcast is queued again by
+      POST /events/<id>/broadcast/<broadcast_id>/retry
+
+A worker claims a broadcast before sending it and refreshes its heartbeat
+with each batch, so when several worker processes queue the same broadcast
+only one sends it. A broadcast whose heartbeat is older than LEASE_SECONDS
+is taken to be abandoned by a worker that died, and another one claims it.
+
+Progress is in the Broadcast row (GET /events/<id>/broadcast/<broadcast_id>)
+and pushed to the employer as 'broadcast' stream events, while recipients
+get the usual 'message' and 'unread' events (see notifications.py).
+
+See benchmark_broadcast.py for the time a 10k-applicant broadcast takes.
+"""
+
+import os
+import queue
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+# Applicants messaged per transaction
+BATCH_SIZE = int(os.environ.get('BROADCAST_BATCH_SIZE', '1000'))
+
+# Seconds without a batch before a broadcast being sent is taken to be abandoned
+LEASE_SECONDS = int(os.environ.get('BROADCAST_LEASE_SECONDS', '60'))
+
+jobs = queue.Queue()
+worker = None
+worker_lock = threading.Lock()
+
+
+def enqueue(broadcast_id):
+    """Queue a committed Broadcast for sending; returns at once"""
+    start_worker(current_app._get_current_object())
+    jobs.put(broadcast_id)
+
+
+def resume_unsent(app):
+    """
+    Queue the broadcasts a previous run left queued or sending, when the app
+    starts; returns how many there were
+    """
+    from models import db, Broadcast
+
+    broadcast_ids = [broadcast_id for broadcast_id, in db.session.query(Broadcast.id).filter(
+        Broadcast.status.in_(('queued', 'sending'))
+    ).order_by(Broadcast.id)]
+
+    if broadcast_ids:
+        start_worker(app)
+        for broadcast_id in broadcast_ids:
+            jobs.put(broadcast_id)
+    return len(broadcast_ids)
+
+
+def start_worker(app):
+    """Start this process's broadcast worker thread, unless it is already running"""
+    global worker
+
+    with worker_lock:
+        # Threads do not survive a fork, so a forked worker process starts its own
+        if worker is None or not worker.is_alive():
+            worker = threading.Thread(target=run_worker, args=(app,), name='broadcast-worker', daemon=True)
+            worker.start()
+
+
+def run_worker(app):
+    from models import db
+
+    while True:
+        broadcast_id = jobs.get()
+
+        with app.app_context():
+            try:
+                if not send_broadcast(broadcast_id):
+                    # Another worker is sending it; look again once its lease would have run out
+                    check_later = threading.Timer(LEASE_SECONDS, jobs.put, (broadcast_id,))
+                    check_later.daemon = True
+                    check_later.start()
+            except Exception as e:
+                print(f"⚠️  Broadcast {broadcast_id} failed: {e}")
+                db.session.rollback()
+                fail_broadcast(broadcast_id, e)
+            finally:
+                db.session.remove()
+
+        jobs.task_done()
+
+
+def wait_for_broadcasts():
+    """Block until every broadcast queued so far has been sent (for scripts and tests)"""
+    jobs.join()
+
+
+def claim(broadcast_id):
+    """
+    Mark a queued broadcast, or one abandoned while sending, as being sent by
+    the calling worker. Returns False if it is not to be sent, or another
+    worker is sending it.
+    """
+    from models import db, Broadcast
+
+    now = datetime.utcnow()
+    abandoned = db.or_(Broadcast.heartbeat_at.is_(None),
+                       Broadcast.heartbeat_at < now - timedelta(seconds=LEASE_SECONDS))
+    claimed = db.session.execute(
+        db.update(Broadcast).where(
+            Broadcast.id == broadcast_id,
+            db.or_(Broadcast.status == 'queued', db.and_(Broadcast.status == 'sending', abandoned))
+        ).values(status='sending', heartbeat_at=now),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    db.session.commit()
+    return bool(claimed)
+
+
+def send_broadcast(broadcast_id):
+    """
+    Send a queued broadcast to all of its event's applicants, on the calling
+    thread. Returns False if another worker is sending it instead.
+    """
+    from models import db, Broadcast, EventRSVP
+    import notifications
+
+    if not claim(broadcast_id):
+        broadcast = db.session.get(Broadcast, broadcast_id)
+        return broadcast is None or broadcast.status != 'sending'
+
+    broadcast = db.session.get(Broadcast, broadcast_id)
+
+    while True:
+        student_ids = [student_id for student_id, in db.session.query(EventRSVP.student_id).filter(
+            EventRSVP.event_id == broadcast.event_id,
+            EventRSVP.student_id > broadcast.last_student_id
+        ).order_by(EventRSVP.student_id).limit(BATCH_SIZE)]
+
+        if not student_ids:
+            break
+
+        message_ids = send_batch(broadcast, student_ids)
+        if message_ids is None:
+            return False
+        notifications.publish_broadcast(broadcast, message_ids)
+
+    broadcast.status = 'sent'
+    broadcast.finished_at = datetime.utcnow()
+    db.session.commit()
+    notifications.publish_broadcast(broadcast)
+
+    print(f"📣 Broadcast {broadcast.id} sent to {broadcast.sent} applicants")
+    return True
+
+
+def send_batch(broadcast, student_ids):
+    """
+    Message one batch of applicants and update their conversations, in one
+    transaction. Returns the IDs of the new messages, or None if another
+    worker has taken the broadcast over.
+    """
+    from models import db, Broadcast, Conversation, Message
+
+    employer_id = broadcast.employer_id
+    sent_until = broadcast.last_student_id
+    now = datetime.utcnow()
+
+    def conversation_ids(student_ids):
+        return dict(db.session.query(Conversation.student_id, Conversation.id).filter(
+            Conversation.employer_id == employer_id,
+            Conversation.student_id.in_(student_ids)
+        ))
+
+    conversations = conversation_ids(student_ids)
+    missing = [student_id for student_id in student_ids if student_id not in conversations]
+    while missing:
+        # A student sending the employer a first message meanwhile creates theirs (see
+        # Conversation.record_message), and the insert fails on the unique constraint:
+        # it is rolled back to the savepoint and only those still missing are inserted again
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(Conversation), [
+                    {'student_id': student_id, 'employer_id': employer_id} for student_id in missing
+                ])
+        except IntegrityError:
+            pass
+        conversations.update(conversation_ids(missing))
+        missing = [student_id for student_id in missing if student_id not in conversations]
+
+    message_ids = db.session.scalars(db.insert(Message).returning(Message.id), [
+        {
+            'conversation_id': conversations[student_id],
+            'employer_sender_id': employer_id,
+            'student_recipient_id': student_id,
+            'subject': broadcast.subject,
+            'message_text': broadcast.message_text,
+            'created_at': now
+        }
+        for student_id in student_ids
+    ]).all()
+
+    # As Conversation.record_message does for one message, for the whole batch at once: the
+    # subject and time only move to this batch's message where it is the latest, so a slow
+    # batch does not take a conversation's latest activity back past a message sent meanwhile
+    latest = db.select(db.func.max(Message.id)).where(Message.conversation_id == Conversation.id).scalar_subquery()
+    newer = latest.in_(message_ids)
+    db.session.execute(
+        db.update(Conversation).where(Conversation.id.in_(list(conversations.values()))).values({
+            Conversation.subject: db.case((newer, broadcast.subject), else_=Conversation.subject),
+            Conversation.last_message_id: latest,
+            Conversation.last_message_at: db.case((newer, now), else_=Conversation.last_message_at),
+            Conversation.message_count: Conversation.message_count + 1,
+            Conversation.student_unread: Conversation.student_unread + 1,
+        }),
+        execution_options={'synchronize_session': False}
+    )
+
+    # Only if no other worker has sent a batch since, which would mean it took the broadcast over
+    progressed = db.session.execute(
+        db.update(Broadcast).where(Broadcast.id == broadcast.id, Broadcast.last_student_id == sent_until).values({
+            Broadcast.sent: Broadcast.sent + len(student_ids),
+            Broadcast.last_student_id: student_ids[-1],
+            Broadcast.heartbeat_at: now,
+        }),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    if not progressed:
+        db.session.rollback()
+        return None
+
+    db.session.commit()
+    return message_ids
+
+
+def fail_broadcast(broadcast_id, error):
+    """Record why a broadcast stopped; the batches already committed stay sent"""
+    from models import db, Broadcast
+    import notifications
+
+    broadcast = Broadcast.query.get(broadcast_id)
+    if broadcast is None:
+        return
+
+    broadcast.status = 'failed'
+    broadcast.error = str(error)
+    broadcast.finished_at = datetime.utcnow()
+    db.session.commit()
+    notifications.publish_broadcast(broadcast)
+
@@ -0,0 +1,260 @@
+"""
+BM25 full-text search over event and company descriptions.
+
+The tries only know titles, tags and names. This module keeps an inverted
+index (term -> sorted doc IDs with term frequencies, plus document lengths)
+for the free text, maintained incrementally on writes, and answers queries
+with WAND: each term carries an upper bound on the score it can add, and
+documents that cannot beat the current k-th best result are skipped with a
+galloping jump instead of being scored.
+
+Searches run on request threads while the index worker writes, so in a
+copy_on_write index a term's posting arrays are never modified in place: a
+write builds new arrays and replaces the term's entry in one assignment.
+A sync re-indexes all the documents it replays inside batch_updates(), so
+a term is copied once per sync rather than once per document it is in.
+"""
+
+import heapq
+import math
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+
+from query_engine import TOKEN_PATTERN, gallop
+
+
+def tokenize_text(text):
+    """Lower-cased terms of a document, repeats kept (they are the term frequencies)"""
+    terms = []
+    for term in TOKEN_PATTERN.findall((text or '').lower()):
+        term = term.strip('.')
+        if term:
+            terms.append(term)
+    return terms
+
+
+class InvertedIndex:
+    def __init__(self, k1=1.2, b=0.75, copy_on_write=False):
+        self.k1 = k1
+        self.b = b
+        self.copy_on_write = copy_on_write
+        self.postings = {}  # term -> (sorted array('I') of doc IDs, array('I') of their term frequencies)
+        self.max_frequency = {}  # term -> highest frequency seen, for score upper bounds
+        self.doc_lengths = {}  # doc ID -> number of terms
+        self.doc_terms = {}  # doc ID -> distinct terms, so a document can be removed
+        self.total_length = 0
+        self.pending = None  # term -> {doc ID: frequency} not yet in postings, inside batch()
+
+    def add(self, doc_id, text):
+        """Index (or re-index) a document"""
+        terms = tokenize_text(text)
+        counts = Counter(terms)
+        old_terms = self.doc_terms.get(doc_id, ())
+
+        # Length first: a reader that finds the document in a posting list needs it
+        self.total_length += len(terms) - self.doc_lengths.get(doc_id, 0)
+        self.doc_lengths[doc_id] = len(terms)
+
+        for term, frequency in counts.items():
+            self._set_frequency(term, doc_id, frequency)
+            if frequency > self.max_frequency.get(term, 0):
+                self.max_frequency[term] = frequency
+        for term in old_terms:
+            if term not in counts:
+                self._set_frequency(term, doc_id, 0)
+
+        if counts:
+            self.doc_terms[doc_id] = tuple(counts)
+        else:
+            self.doc_terms.pop(doc_id, None)
+            self.doc_lengths.pop(doc_id)
+
+    def remove(self, doc_id):
+        """Drop a document from the index"""
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+
+        for term in terms:
+            self._set_frequency(term, doc_id, 0)
+
+        self.total_length -= self.doc_lengths.pop(doc_id)
+
+    @contextmanager
+    def batch(self):
+        """
+        Hold back posting changes until the block ends, then apply each term's
+        at once. Searches meanwhile may still find removed documents, and not
+        yet find added ones.
+        """
+        if self.pending is not None:
+            yield
+            return
+
+        self.pending = {}
+        try:
+            yield
+        finally:
+            pending, self.pending = self.pending, None
+            for term, changes in pending.items():
+                self._apply(term, changes)
+
+    def _set_frequency(self, term, doc_id, frequency):
+        """Set doc_id's frequency in a term's postings (0 removes it), or hold it back inside batch()"""
+        if self.pending is not None:
+            self.pending.setdefault(term, {})[doc_id] = frequency
+        else:
+            self._apply(term, {doc_id: frequency})
+
+    def _apply(self, term, changes):
+        """Apply {doc_id: frequency} to a term's postings, on one copy if copy_on_write"""
+        doc_ids, frequencies = self.postings.get(term, (array('I'), array('I')))
+        if self.copy_on_write:
+            doc_ids, frequencies = array('I', doc_ids), array('I', frequencies)
+
+        for doc_id, frequency in changes.items():
+            position = bisect_left(doc_ids, doc_id)
+            present = position < len(doc_ids) and doc_ids[position] == doc_id
+
+            if present and frequency:
+                frequencies[position] = frequency
+            elif present:
+                del doc_ids[position]
+                del frequencies[position]
+            elif frequency:
+                doc_ids.insert(position, doc_id)
+                frequencies.insert(position, frequency)
+
+        if doc_ids:
+            self.postings[term] = (doc_ids, frequencies)
+        else:
+            self.postings.pop(term, None)
+            self.max_frequency.pop(term, None)
+        # max_frequency may now overstate the term; it stays a valid upper bound
+
+    def idf(self, term):
+        documents = len(self.doc_lengths)
+        matching = len(self.postings[term][0]) if term in self.postings else 0
+        return math.log(1 + (documents - matching + 0.5) / (matching + 0.5))
+
+    def search(self, query, k=10):
+        """Top k (doc_id, score) pairs by BM25, best first"""
+        documents = len(self.doc_lengths)
+        if not documents or k <= 0:
+            return []
+
+        k1, b = self.k1, self.b
+        average_length = self.total_length / documents or 1.0
+
+        # Cursor: [doc IDs, frequencies, position, score upper bound, idf]
+        cursors = []
+        for term in set(tokenize_text(query)):
+            entry = self.postings.get(term)
+            if entry:
+                doc_ids, frequencies = entry
+                idf = math.log(1 + (documents - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+                top = self.max_frequency.get(term) or max(frequencies)
+                upper_bound = idf * top * (k1 + 1) / (top + k1 * (1 - b))
+                cursors.append([doc_ids, frequencies, 0, upper_bound, idf])
+
+        results = []  # min-heap of (score, doc_id) holding the best k so far
+        while cursors:
+            cursors.sort(key=lambda cursor: cursor[0][cursor[2]])
+            threshold = results[0][0] if len(results) >= k else 0.0
+
+            # Pivot: first cursor at which the summed upper bounds could beat the threshold
+            pivot = None
+            bound = 0.0
+            for i, cursor in enumerate(cursors):
+                bound += cursor[3]
+                if bound > threshold:
+                    pivot = i
+                    break
+            if pivot is None:
+                break
+
+            pivot_doc = cursors[pivot][0][cursors[pivot][2]]
+            if cursors[0][0][cursors[0][2]] == pivot_doc:
+                length = self.doc_lengths.get(pivot_doc, average_length)
+                length_norm = k1 * (1 - b + b * length / average_length)
+                score = 0.0
+                for cursor in cursors:
+                    doc_ids, frequencies, position = cursor[0], cursor[1], cursor[2]
+                    if doc_ids[position] != pivot_doc:
+                        break
+                    frequency = frequencies[position]
+                    score += cursor[4] * frequency * (k1 + 1) / (frequency + length_norm)
+                    cursor[2] += 1
+
+                if len(results) < k:
+                    heapq.heappush(results, (score, pivot_doc))
+                elif score > results[0][0]:
+                    heapq.heapreplace(results, (score, pivot_doc))
+            else:
+                # Nothing before the pivot document can make the top k: skip ahead
+                for cursor in cursors[:pivot]:
+                    cursor[2] = gallop(cursor[0], pivot_doc, cursor[2])
+
+            cursors = [cursor for cursor in cursors if cursor[2] < len(cursor[0])]
+
+        return [(doc_id, score) for score, doc_id in sorted(results, reverse=True)]
+
+
+# Global full-text indexes
+event_text_index = InvertedIndex(copy_on_write=True)
+company_text_index = InvertedIndex(copy_on_write=True)
+
+
+def get_event_text(event):
+    return ' '.join(part for part in [event.title, event.description, (event.tags or '').replace(',', ' ')] if part)
+
+
+def get_company_text(employer):
+    return ' '.join(part for part in [employer.company_name, employer.industry, employer.description] if part)
+
+
+@contextmanager
+def batch_updates():
+    """Batch the writes to both full-text indexes made inside (see InvertedIndex.batch)"""
+    with event_text_index.batch(), company_text_index.batch():
+        yield
+
+
+def index_event(event):
+    event_text_index.add(event.id, get_event_text(event))
+
+
+def unindex_event(event_id):
+    event_text_index.remove(event_id)
+
+
+def index_company(employer):
+    company_text_index.add(employer.id, get_company_text(employer))
+
+
+def unindex_company(employer_id):
+    company_text_index.remove(employer_id)
+
+
+def build_fulltext_indexes():
+    """Build/rebuild the event and company full-text indexes"""
+    from models import Event, EmployerProfile
+
+    global event_text_index, company_text_index
+
+    events = InvertedIndex()
+    for event in Event.query.order_by(Event.id).all():
+        events.add(event.id, get_event_text(event))
+
+    companies = InvertedIndex()
+    for employer in EmployerProfile.query.order_by(EmployerProfile.id).all():
+        companies.add(employer.id, get_company_text(employer))
+
+    # Publish with a single reference swap each, so readers never see a half-built index
+    events.copy_on_write = companies.copy_on_write = True
+    event_text_index, company_text_index = events, companies
+
+    print(f"✅ Full-text indexes built ({len(event_text_index.doc_lengths)} events, "
+          f"{len(company_text_index.doc_lengths)} companies)")
@@ -0,0 +1,201 @@
+"""
+Search Index Snapshots for CareerConnect
+========================================
+
+Saves the event, company and skill tries, the full-text indexes and the tag
+index to a single file that workers load on boot instead of rebuilding the
+indexes from the database.
+
+Every snapshot carries a version stamp: the index generation counters (see
+index_sync.py) it was built at. A snapshot older than the database is still
+loaded, and the changes committed since are replayed from the change log,
+as a worker that fell behind would; an index is only rebuilt if the log no
+longer has all of its changes. A snapshot in a different format, or from
+generations the database has not reached (it was reset), is ignored.
+
+Produce a snapshot offline (e.g. before a deploy):
+
+    python index_snapshot.py
+
+"""
+
+import json
+import os
+import pickle
+import struct
+
+from flask import current_app
+
+MAGIC = b'CCSNAP1\n'
+SNAPSHOT_FILENAME = 'search_index.snapshot'
+
+# Bump whenever tokenization or the trie layout changes, so old snapshots are rebuilt
+SNAPSHOT_FORMAT = 8
+
+
+def get_snapshot_path():
+    """Snapshot location: $SEARCH_SNAPSHOT_PATH or the Flask instance folder"""
+    return os.environ.get('SEARCH_SNAPSHOT_PATH') or os.path.join(current_app.instance_path, SNAPSHOT_FILENAME)
+
+
+# The index generations a snapshot holds the indexes of
+SNAPSHOT_INDEXES = ('events', 'scores', 'companies', 'skills')
+
+
+def get_index_version():
+    """Version stamp of the database state the search indexes depend on"""
+    from models import db, IndexGeneration
+
+    generations = dict(db.session.query(IndexGeneration.name, IndexGeneration.generation).all())
+    return {'format': SNAPSHOT_FORMAT, 'generations': generations}
+
+
+def save_snapshot(path=None, version=None):
+    """Write the current indexes to disk, replacing any previous snapshot atomically"""
+    import trie
+    import fulltext
+    import tag_index
+
+    path = path or get_snapshot_path()
+    version = version or get_index_version()
+
+    header = json.dumps({'version': version}, sort_keys=True).encode('utf-8')
+    payload = pickle.dumps({
+        'event_trie': trie.event_trie,
+        'event_tokens': trie.event_tokens,
+        'company_trie': trie.company_trie,
+        'company_tokens': trie.company_tokens,
+        'skill_trie': trie.skill_trie,
+        'student_skills': trie.student_skills,
+        'event_text_index': fulltext.event_text_index,
+        'company_text_index': fulltext.company_text_index,
+        'event_tag_index': tag_index.event_tag_index,
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+    print(f"💾 Search snapshot saved to {path} ({(len(header) + len(payload)) / 1024:.0f} KB)")
+
+
+def load_snapshot(path=None, version=None):
+    """
+    Install the indexes from a snapshot no newer than the database state.
+
+    Returns the generations the loaded indexes reflect, which may be behind
+    the database's, or None when the snapshot is missing, unreadable or
+    unusable.
+    """
+    import trie
+    import fulltext
+    import tag_index
+
+    path = path or get_snapshot_path()
+    if not os.path.exists(path) or os.path.getsize(path) <= len(MAGIC) + 4:
+        return None
+
+    version = version or get_index_version()
+
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            print(f"⚠️  Ignoring search snapshot with unknown format: {path}")
+            return None
+
+        # The header is checked before reading the (much larger) payload
+        (header_length,) = struct.unpack('<I', f.read(4))
+        snapshot_version = json.loads(f.read(header_length)).get('version') or {}
+
+        if snapshot_version.get('format') != version['format']:
+            print("♻️  Search snapshot is from another format")
+            return None
+
+        generations = {name: snapshot_version['generations'].get(name, 0) for name in SNAPSHOT_INDEXES}
+        if any(generation > version['generations'].get(name, 0) for name, generation in generations.items()):
+            print("♻️  Search snapshot is newer than the database")
+            return None
+
+        try:
+            # Unpickled straight from the file, so the payload is not held in memory twice
+            payload = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️  Could not read search snapshot: {e}")
+            return None
+
+    trie.event_trie = payload['event_trie']
+    trie.event_tokens = payload['event_tokens']
+    trie.company_trie = payload['company_trie']
+    trie.company_tokens = payload['company_tokens']
+    trie.skill_trie = payload['skill_trie']
+    trie.student_skills = payload['student_skills']
+    fulltext.event_text_index = payload['event_text_index']
+    fulltext.company_text_index = payload['company_text_index']
+    tag_index.event_tag_index = payload['event_tag_index']
+
+    print(f"⚡ Search indexes loaded from snapshot {path}")
+    return generations
+
+
+def load_or_build_indexes():
+    """
+    Load the search indexes from the snapshot and replay the changes made
+    since, or build them if there is no usable snapshot; the snapshot is
+    re-saved whenever the indexes had to be brought up to date
+    """
+    from trie import build_event_trie, build_company_trie, build_skill_trie
+    from fulltext import build_fulltext_indexes
+    from tag_index import build_tag_index
+    from index_sync import catch_up, mark_synced
+
+    version = get_index_version()
+    generations = load_snapshot(version=version)
+
+    if generations is None:
+        build_event_trie()
+        build_company_trie()
+        build_skill_trie()
+        build_fulltext_indexes()
+        build_tag_index()
+        behind = []
+    else:
+        # Replayed from the change log, or rebuilt if entries are missing (see index_sync.catch_up)
+        behind = [name for name in SNAPSHOT_INDEXES if generations[name] < version['generations'].get(name, 0)]
+        for name in behind:
+            catch_up(name, generations[name], version['generations'][name])
+
+    if generations is None or behind:
+        try:
+            save_snapshot(version=version)
+        except OSError as e:
+            print(f"⚠️  Could not save search snapshot: {e}")
+
+    # Changes committed since the version was read are replayed on the first request
+    mark_synced(version['generations'])
+
+
+if __name__ == '__main__':
+    # Build explicitly below instead of during app import
+    os.environ['SEARCH_INDEX_INIT'] = '0'
+
+    from app import app
+    from trie import build_event_trie, build_company_trie, build_skill_trie
+    from fulltext import build_fulltext_indexes
+    from tag_index import build_tag_index
+
+    print("=" * 60)
+    print("CareerConnect Search Snapshot")
+    print("=" * 60)
+
+    with app.app_context():
+        version = get_index_version()
+        build_event_trie()
+        build_company_trie()
+        build_skill_trie()
+        build_fulltext_indexes()
+        build_tag_index()
+        save_snapshot(version=version)
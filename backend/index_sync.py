@@ -0,0 +1,336 @@
+"""
+Cross-Worker Search Index Sync for CareerConnect
+================================================
+
+Each worker process holds its own copy of the search indexes in memory.
+Every write that affects them bumps a per-index generation counter in the
+database (IndexGeneration) and logs the changed event, employer or student
+to index_changes in the same transaction.
+
+Within a worker, all index writes happen on one background thread. Writers
+and the per-request check (at most every INDEX_SYNC_INTERVAL seconds) only
+queue a sync and return. The thread compares the counters with the
+generations its indexes reflect - one tiny query - and, when behind,
+replays the logged changes by re-reading and re-indexing just the affected
+rows. If entries are missing from the log (pruned, or a whole-index change)
+the index is rebuilt instead, into a private copy that replaces the live
+one in a single assignment, so searches never see a half-built index.
+
+Stored recommendations (see recommendations.py) are kept in step the same
+way, with an 'interests' counter bumped when a student's skills or job
+preferences change.
+
+An RSVP only changes an event's RSVP count, which ranks it in autocomplete
+and nothing else, so it bumps a 'scores' counter whose changes just re-rank
+the event in the event trie, leaving the other indexes alone. Cached search
+responses show RSVP counts and are keyed by this counter too (see
+search_cache.py).
+
+Prune old log entries periodically (every worker must have caught up first):
+
+    python index_sync.py            # drop entries older than 7 days
+    python index_sync.py 1          # older than 1 day
+
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+# Seconds between generation checks in one worker; 0 checks on every request
+SYNC_INTERVAL = float(os.environ.get('INDEX_SYNC_INTERVAL', '0.5'))
+
+# Further behind than this and rebuilding the index is cheaper than replaying
+MAX_REPLAY = 1000
+
+# Generation of each index this worker's in-memory copy reflects;
+# None until the indexes have been loaded or built
+applied_generations = None
+last_check = 0.0
+sync_lock = threading.Lock()
+
+sync_requests = queue.Queue()
+worker = None
+
+
+def mark_synced(generations):
+    """Record the generations freshly loaded or built indexes reflect"""
+    global applied_generations
+    applied_generations = {name: generation for name, generation in generations.items()}
+
+
+def request_sync(throttle=False):
+    """
+    Ask the index worker thread to catch up with the database; returns at once.
+
+    With throttle (the per-request check) at most one sync is queued every
+    SYNC_INTERVAL seconds.
+    """
+    global last_check
+
+    if applied_generations is None:
+        return
+
+    if throttle:
+        now = time.monotonic()
+        if now - last_check < SYNC_INTERVAL:
+            return
+        last_check = now
+
+    start_worker(current_app._get_current_object())
+    sync_requests.put(None)
+
+
+def start_worker(app):
+    """Start this process's index worker thread, unless it is already running"""
+    global worker
+
+    with sync_lock:
+        # Threads do not survive a fork, so a forked worker process starts its own
+        if worker is None or not worker.is_alive():
+            worker = threading.Thread(target=run_worker, args=(app,), name='search-index-worker', daemon=True)
+            worker.start()
+
+
+def run_worker(app):
+    from models import db
+
+    while True:
+        sync_requests.get()
+        queued = 1
+
+        # One catch-up covers every sync queued so far
+        while True:
+            try:
+                sync_requests.get_nowait()
+                queued += 1
+            except queue.Empty:
+                break
+
+        with app.app_context():
+            try:
+                # New event, score or company generations invalidate cached search responses;
+                # the hot ones are refilled on another thread, so syncs are not held up
+                from search_cache import CACHE_GENERATIONS, request_prewarm
+                if set(sync_indexes()) & set(CACHE_GENERATIONS):
+                    request_prewarm(app)
+            except Exception as e:
+                print(f"⚠️  Search index sync failed: {e}")
+            finally:
+                db.session.remove()
+
+        for _ in range(queued):
+            sync_requests.task_done()
+
+
+def wait_for_sync():
+    """Block until every sync queued so far has been applied (for scripts and tests)"""
+    sync_requests.join()
+
+
+def sync_indexes():
+    """
+    Bring this process's indexes up to date with the database, on the calling thread.
+
+    Returns the names of the indexes that were updated.
+    """
+    from models import db, IndexGeneration
+
+    global applied_generations
+
+    if applied_generations is None:
+        return []
+
+    generations = dict(db.session.query(IndexGeneration.name, IndexGeneration.generation).all())
+
+    updated = []
+    for name, generation in sorted(generations.items()):
+        applied = applied_generations.get(name, 0)
+        if generation > applied and name in APPLIERS:
+            catch_up(name, applied, generation)
+            # Replaced rather than modified, since request threads read it
+            applied_generations = {**applied_generations, name: generation}
+            updated.append(name)
+
+    return updated
+
+
+def catch_up(name, applied, generation):
+    """Replay one index's logged changes in (applied, generation], or rebuild it"""
+    import fulltext
+    from models import IndexChange
+
+    missing = generation - applied
+    changes = []
+    if missing <= MAX_REPLAY:
+        changes = IndexChange.query.filter(
+            IndexChange.index_name == name,
+            IndexChange.generation > applied,
+            IndexChange.generation <= generation
+        ).order_by(IndexChange.generation).all()
+
+    if len(changes) != missing or any(change.entity_id is None for change in changes):
+        print(f"♻️  Rebuilding {name} search index ({missing} changes behind)")
+        REBUILDERS[name]()
+        return
+
+    # Rows are re-read, so an entity that changed several times is re-indexed once
+    with fulltext.batch_updates():
+        for entity_id in dict.fromkeys(change.entity_id for change in changes):
+            APPLIERS[name](entity_id)
+
+
+def apply_event_change(event_id):
+    """Re-index one event (or drop it if deleted), with its current RSVP count as score"""
+    import trie
+    import fulltext
+    import tag_index
+    import recommendations
+    from models import Event
+
+    event = Event.query.get(event_id)
+    if event is None:
+        trie.unindex_event(event_id)
+        fulltext.unindex_event(event_id)
+        tag_index.unindex_event(event_id)
+        recommendations.remove_event(event_id)
+        return
+
+    trie.index_event(event, event.rsvp_count)
+    fulltext.index_event(event)
+    # Only a new date, tags or employer can change recommendations (an RSVP cannot)
+    if tag_index.index_event(event):
+        recommendations.update_event(event)
+
+
+def apply_score_change(event_id):
+    """Re-rank one event in autocomplete by its current RSVP count"""
+    import trie
+    from models import db, Event
+
+    rsvp_count = db.session.query(Event.rsvp_count).filter(Event.id == event_id).scalar()
+    if rsvp_count is not None:
+        trie.rescore_event(event_id, rsvp_count)
+
+
+def apply_company_change(employer_id):
+    """Re-index one company, and its events since they are indexed by company name"""
+    import trie
+    import fulltext
+    import tag_index
+    import recommendations
+    from models import EmployerProfile
+
+    employer = EmployerProfile.query.get(employer_id)
+    if employer is None:
+        trie.unindex_company(employer_id)
+        fulltext.unindex_company(employer_id)
+        tag_index.unindex_company(employer_id)
+        return
+
+    trie.index_company(employer)
+    fulltext.index_company(employer)
+    # A new name or industry changes the preference bonus of all its events, for everyone
+    if tag_index.index_company(employer):
+        recommendations.clear_recommendations()
+    for event in employer.events:
+        trie.index_event(event)
+
+
+def apply_skill_change(student_id):
+    """Re-index one student's skills"""
+    import trie
+    from models import StudentProfile
+
+    profile = StudentProfile.query.get(student_id)
+    if profile is None:
+        trie.unindex_student(student_id)
+        return
+
+    trie.index_student(student_id, [skill.skill_name for skill in profile.skills])
+
+
+def apply_interest_change(student_id):
+    """Drop one student's stored recommendations after their skills or preferences changed"""
+    import recommendations
+    recommendations.invalidate_student(student_id)
+
+
+def rebuild_events():
+    import trie
+    import fulltext
+    import tag_index
+    import recommendations
+    trie.build_event_trie()
+    fulltext.build_fulltext_indexes()
+    tag_index.build_tag_index()
+    recommendations.clear_recommendations()
+
+
+def rebuild_scores():
+    import trie
+    trie.build_event_trie()
+
+
+def rebuild_companies():
+    import trie
+    import fulltext
+    import tag_index
+    import recommendations
+    trie.build_company_trie()
+    trie.build_event_trie()
+    fulltext.build_fulltext_indexes()
+    tag_index.build_tag_index()
+    recommendations.clear_recommendations()
+
+
+def rebuild_skills():
+    import trie
+    trie.build_skill_trie()
+
+
+def rebuild_interests():
+    import recommendations
+    recommendations.clear_recommendations()
+
+
+APPLIERS = {
+    'events': apply_event_change,
+    'scores': apply_score_change,
+    'companies': apply_company_change,
+    'skills': apply_skill_change,
+    'interests': apply_interest_change,
+}
+
+REBUILDERS = {
+    'events': rebuild_events,
+    'scores': rebuild_scores,
+    'companies': rebuild_companies,
+    'skills': rebuild_skills,
+    'interests': rebuild_interests,
+}
+
+
+def prune_change_log(days=7):
+    """Delete change log entries older than the given number of days"""
+    from models import db, IndexChange
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    deleted = IndexChange.query.filter(IndexChange.created_at < cutoff).delete()
+    db.session.commit()
+
+    print(f"🧹 Pruned {deleted} search index change log entries older than {days} days")
+
+
+if __name__ == '__main__':
+    os.environ['SEARCH_INDEX_INIT'] = '0'
+
+    from app import app
+
+    with app.app_context():
+        prune_change_log(float(sys.argv[1]) if len(sys.argv) > 1 else 7)
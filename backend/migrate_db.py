@@ -25,13 +25,24 @@ OPTION 2: Run this migration script (to preserve existing data)
 ---------------------------------------------------------------
     python migrate_db.py
 
+It also adds the events.rsvp_count column (filled in from event_rsvps) to
+databases created before events stored their RSVP count, the composite
+indexes event list pagination and employer broadcasts rely on, and the
+normalized tags, event_tags and student_interests tables, filled in from
+the comma-separated events.tags and student_profiles.job_preferences
+columns and student_skills, and the conversations table (with
+messages.conversation_id), built from the messages already sent. Each side's read watermark is taken from the old
+per-message messages.is_read flags, where a database still has them. The
+broadcasts.heartbeat_at column is added to broadcasts tables created
+without it.
+
 """
 
 import sqlite3
 import os
 
-def migrate_messages_table():
-    """Add missing columns to the messages table"""
+def find_database():
+    """Path of the SQLite database, or None if it has not been created yet"""
     
     # Check both possible locations
     possible_paths = [
@@ -51,9 +62,18 @@ def migrate_messages_table():
         for path in possible_paths:
             print(f"      - {path}")
         print("\n   Run 'python app.py' first to create the database.")
-        return
+        return None
     
     print(f"📂 Found database at: {db_path}")
+    return db_path
+
+
+def migrate_messages_table():
+    """Add missing columns to the messages table"""
+    
+    db_path = find_database()
+    if not db_path:
+        return
     
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
@@ -99,8 +119,252 @@ def migrate_messages_table():
     print("   Restart your Flask server to apply changes.")
 
 
+def migrate_events_table():
+    """Add the rsvp_count column to the events table, counted from event_rsvps"""
+    
+    db_path = find_database()
+    if not db_path:
+        return
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    cursor.execute("PRAGMA table_info(events)")
+    columns = [col[1] for col in cursor.fetchall()]
+    
+    if 'rsvp_count' in columns:
+        print("✅ events.rsvp_count is already present!")
+        conn.close()
+        return
+    
+    print("🔧 Adding events.rsvp_count...")
+    cursor.execute("ALTER TABLE events ADD COLUMN rsvp_count INTEGER NOT NULL DEFAULT 0")
+    cursor.execute(
+        "UPDATE events SET rsvp_count = "
+        "(SELECT COUNT(*) FROM event_rsvps WHERE event_rsvps.event_id = events.id)"
+    )
+    print(f"   ✅ Filled in RSVP counts for {cursor.rowcount} events")
+    
+    conn.commit()
+    conn.close()
+
+
+def migrate_indexes():
+    """Create the composite indexes used by keyset pagination of event lists, and by broadcasts"""
+    
+    db_path = find_database()
+    if not db_path:
+        return
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    indexes = [
+        "CREATE INDEX IF NOT EXISTS ix_events_event_date_id ON events (event_date, id)",
+        "CREATE INDEX IF NOT EXISTS ix_events_employer_id_event_date_id ON events (employer_id, event_date, id)",
+        "CREATE INDEX IF NOT EXISTS ix_event_rsvps_student_id_id ON event_rsvps (student_id, id)",
+        "CREATE INDEX IF NOT EXISTS ix_event_rsvps_event_id_student_id ON event_rsvps (event_id, student_id)",
+    ]
+    
+    print(f"🔧 Creating {len(indexes)} composite index(es) if missing...")
+    for statement in indexes:
+        cursor.execute(statement)
+    print("   ✅ Success")
+    
+    conn.commit()
+    conn.close()
+
+
+def migrate_tags():
+    """Create the normalized tag tables and fill them in from the comma-separated columns"""
+    
+    db_path = find_database()
+    if not db_path:
+        return
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    tables = [
+        "CREATE TABLE IF NOT EXISTS tags ("
+        "id INTEGER NOT NULL PRIMARY KEY, name VARCHAR(100) NOT NULL UNIQUE)",
+        "CREATE TABLE IF NOT EXISTS event_tags ("
+        "event_id INTEGER NOT NULL REFERENCES events(id), tag_id INTEGER NOT NULL REFERENCES tags(id), "
+        "PRIMARY KEY (event_id, tag_id))",
+        "CREATE TABLE IF NOT EXISTS student_interests ("
+        "student_id INTEGER NOT NULL REFERENCES student_profiles(id), tag_id INTEGER NOT NULL REFERENCES tags(id), "
+        "kind VARCHAR(20) NOT NULL, PRIMARY KEY (student_id, tag_id, kind))",
+        "CREATE INDEX IF NOT EXISTS ix_event_tags_tag_id_event_id ON event_tags (tag_id, event_id)",
+        "CREATE INDEX IF NOT EXISTS ix_student_interests_tag_id_student_id ON student_interests (tag_id, student_id)",
+    ]
+    
+    print("🔧 Creating the tag tables if missing...")
+    for statement in tables:
+        cursor.execute(statement)
+    
+    # Same keys as Tag.key: stripped and lower-cased, empty names skipped
+    def keys(csv):
+        return {name.strip().lower() for name in (csv or '').split(',')} - {''}
+    
+    event_tags = {(event_id, key) for event_id, tags in cursor.execute("SELECT id, tags FROM events") for key in keys(tags)}
+    interests = {(student_id, key, 'preference')
+                 for student_id, prefs in cursor.execute("SELECT id, job_preferences FROM student_profiles")
+                 for key in keys(prefs)}
+    interests |= {(student_id, key, 'skill')
+                  for student_id, skill in cursor.execute("SELECT student_id, skill_name FROM student_skills")
+                  for key in keys(skill)}
+    
+    names = {key for _, key in event_tags} | {key for _, key, _ in interests}
+    cursor.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", [(name,) for name in names])
+    tag_ids = dict(cursor.execute("SELECT name, id FROM tags"))
+    
+    cursor.executemany("INSERT OR IGNORE INTO event_tags (event_id, tag_id) VALUES (?, ?)",
+                       [(event_id, tag_ids[key]) for event_id, key in event_tags])
+    cursor.executemany("INSERT OR IGNORE INTO student_interests (student_id, tag_id, kind) VALUES (?, ?, ?)",
+                       [(student_id, tag_ids[key], kind) for student_id, key, kind in interests])
+    
+    print(f"   ✅ {len(names)} tags, {len(event_tags)} event tags and {len(interests)} student interests "
+          f"({conn.total_changes} rows added)")
+    
+    conn.commit()
+    conn.close()
+
+
+def migrate_conversations():
+    """Create the conversations table and file existing messages under their conversations"""
+    
+    db_path = find_database()
+    if not db_path:
+        return
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    cursor.execute("PRAGMA table_info(messages)")
+    message_columns = [col[1] for col in cursor.fetchall()]
+    if 'conversation_id' not in message_columns:
+        print("🔧 Adding messages.conversation_id...")
+        cursor.execute("ALTER TABLE messages ADD COLUMN conversation_id INTEGER REFERENCES conversations(id)")
+    
+    tables = [
+        "CREATE TABLE IF NOT EXISTS conversations ("
+        "id INTEGER NOT NULL PRIMARY KEY, "
+        "student_id INTEGER NOT NULL REFERENCES student_profiles(id), "
+        "employer_id INTEGER NOT NULL REFERENCES employer_profiles(id), "
+        "subject VARCHAR(200), last_message_id INTEGER REFERENCES messages(id), last_message_at DATETIME, "
+        "message_count INTEGER DEFAULT '0' NOT NULL, student_unread INTEGER DEFAULT '0' NOT NULL, "
+        "employer_unread INTEGER DEFAULT '0' NOT NULL, student_read_id INTEGER DEFAULT '0' NOT NULL, "
+        "employer_read_id INTEGER DEFAULT '0' NOT NULL, UNIQUE (student_id, employer_id))",
+        "CREATE INDEX IF NOT EXISTS ix_conversations_student_id_last_message_at_id "
+        "ON conversations (student_id, last_message_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_conversations_employer_id_last_message_at_id "
+        "ON conversations (employer_id, last_message_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_messages_conversation_id_id ON messages (conversation_id, id)",
+        "DROP INDEX IF EXISTS ix_messages_conversation_id",
+    ]
+    
+    print("🔧 Creating the conversations table if missing...")
+    for statement in tables:
+        cursor.execute(statement)
+    
+    # Read watermarks, for conversations tables created before them
+    cursor.execute("PRAGMA table_info(conversations)")
+    conversation_columns = [col[1] for col in cursor.fetchall()]
+    for column in ('student_read_id', 'employer_read_id'):
+        if column not in conversation_columns:
+            print(f"🔧 Adding conversations.{column}...")
+            cursor.execute(f"ALTER TABLE conversations ADD COLUMN {column} INTEGER DEFAULT '0' NOT NULL")
+    
+    # Same pairing as Conversation.record_message: a student message or an employer reply
+    student_id = "COALESCE(sender_id, student_recipient_id)"
+    employer_id = "COALESCE(recipient_id, employer_sender_id)"
+    
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO conversations (student_id, employer_id)
+        SELECT DISTINCT {student_id}, {employer_id} FROM messages
+        WHERE conversation_id IS NULL AND {student_id} IS NOT NULL AND {employer_id} IS NOT NULL
+    """)
+    cursor.execute(f"""
+        UPDATE messages SET conversation_id = (
+            SELECT id FROM conversations c
+            WHERE c.student_id = {student_id} AND c.employer_id = {employer_id}
+        )
+        WHERE conversation_id IS NULL
+    """)
+    
+    # A side has read up to the last message it received that was flagged read
+    if 'is_read' in message_columns:
+        cursor.execute("""
+            UPDATE conversations SET
+                student_read_id = MAX(student_read_id, COALESCE(
+                    (SELECT MAX(id) FROM messages m WHERE m.conversation_id = conversations.id
+                     AND m.employer_sender_id IS NOT NULL AND m.is_read), 0)),
+                employer_read_id = MAX(employer_read_id, COALESCE(
+                    (SELECT MAX(id) FROM messages m WHERE m.conversation_id = conversations.id
+                     AND m.sender_id IS NOT NULL AND m.is_read), 0))
+        """)
+    
+    # Recounted from the messages, so running this again changes nothing
+    cursor.execute("""
+        UPDATE conversations SET
+            last_message_id = (SELECT MAX(id) FROM messages m WHERE m.conversation_id = conversations.id),
+            message_count = (SELECT COUNT(*) FROM messages m WHERE m.conversation_id = conversations.id),
+            student_unread = (SELECT COUNT(*) FROM messages m WHERE m.conversation_id = conversations.id
+                              AND m.employer_sender_id IS NOT NULL AND m.id > conversations.student_read_id),
+            employer_unread = (SELECT COUNT(*) FROM messages m WHERE m.conversation_id = conversations.id
+                               AND m.sender_id IS NOT NULL AND m.id > conversations.employer_read_id)
+    """)
+    cursor.execute("""
+        UPDATE conversations SET
+            subject = (SELECT subject FROM messages WHERE id = conversations.last_message_id),
+            last_message_at = (SELECT created_at FROM messages WHERE id = conversations.last_message_id)
+    """)
+    
+    count = cursor.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+    print(f"   ✅ {count} conversations")
+    
+    conn.commit()
+    conn.close()
+
+
+
+def migrate_broadcasts():
+    """Add the heartbeat_at column broadcast workers claim broadcasts with"""
+    
+    db_path = find_database()
+    if not db_path:
+        return
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    cursor.execute("PRAGMA table_info(broadcasts)")
+    columns = [col[1] for col in cursor.fetchall()]
+    
+    if not columns:
+        print("✅ No broadcasts table yet; the app creates it with heartbeat_at")
+        conn.close()
+        return
+    
+    if 'heartbeat_at' in columns:
+        print("✅ broadcasts.heartbeat_at is already present!")
+        conn.close()
+        return
+    
+    print("🔧 Adding broadcasts.heartbeat_at...")
+    cursor.execute("ALTER TABLE broadcasts ADD COLUMN heartbeat_at DATETIME")
+    
+    conn.commit()
+    conn.close()
+
+
 if __name__ == '__main__':
     print("=" * 60)
     print("CareerConnect Database Migration")
     print("=" * 60)
-    migrate_messages_table()
\ No newline at end of file
+    migrate_messages_table()
+    migrate_events_table()
+    migrate_indexes()
+    migrate_tags()
+    migrate_conversations()
+    migrate_broadcasts()
\ No newline at end of file
@@ -1,6 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import IntegrityError
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from collections import defaultdict
 
 db = SQLAlchemy()
 
@@ -72,6 +74,22 @@ class StudentProfile(db.Model):
     # Relationships
     skills = db.relationship('StudentSkill', backref='student', cascade='all, delete-orphan')
     rsvps = db.relationship('EventRSVP', backref='student', cascade='all, delete-orphan')
+    interest_links = db.relationship('StudentInterest', cascade='all, delete-orphan')  # Skills and job preferences as tags
+    
+    def refresh_interests(self):
+        """Bring student_interests in line with the student's skills and job preferences"""
+        skills = [name for (name,) in db.session.query(StudentSkill.skill_name).filter_by(student_id=self.id)]
+        prefs = self.job_preferences.split(',') if self.job_preferences else []
+        tag_ids = Tag.intern(skills + prefs)
+        
+        wanted = dict.fromkeys(
+            [(tag_ids[key], 'skill') for key in map(Tag.key, skills) if key] +
+            [(tag_ids[key], 'preference') for key in map(Tag.key, prefs) if key]
+        )
+        
+        # Links that stay are kept, so no row is deleted and re-inserted
+        existing = {(link.tag_id, link.kind): link for link in self.interest_links}
+        self.interest_links = [existing.get(link) or StudentInterest(tag_id=link[0], kind=link[1]) for link in wanted]
     
     def to_dict(self):
         return {
@@ -131,6 +149,11 @@ class EmployerProfile(db.Model):
 # ============= EVENT MODEL =============
 class Event(db.Model):
     __tablename__ = 'events'
+    __table_args__ = (
+        # Keyset pagination of event lists, newest first (see pagination.py)
+        db.Index('ix_events_event_date_id', 'event_date', 'id'),
+        db.Index('ix_events_employer_id_event_date_id', 'employer_id', 'event_date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     employer_id = db.Column(db.Integer, db.ForeignKey('employer_profiles.id'), nullable=False)
@@ -141,9 +164,22 @@ class Event(db.Model):
     event_date = db.Column(db.DateTime, nullable=False)
     tags = db.Column(db.Text)  # Comma-separated tags
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    rsvp_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Kept in step with event_rsvps
     
     # Relationships
     rsvps = db.relationship('EventRSVP', backref='event', cascade='all, delete-orphan')
+    tag_links = db.relationship('EventTag', cascade='all, delete-orphan')  # tags, normalized
+    # Prerequisite links in both directions, so deleting an event removes them all
+    prerequisite_links = db.relationship('EventPrerequisite', foreign_keys='EventPrerequisite.event_id', cascade='all, delete-orphan')
+    dependent_links = db.relationship('EventPrerequisite', foreign_keys='EventPrerequisite.prerequisite_id', cascade='all, delete-orphan')
+    
+    def set_tags(self, tags):
+        """Set the event's tags, both the comma-separated column and event_tags"""
+        self.tags = ','.join(tags)
+        tag_ids = Tag.intern(tags)
+        
+        existing = {link.tag_id: link for link in self.tag_links}
+        self.tag_links = [existing.get(tag_id) or EventTag(tag_id=tag_id) for tag_id in dict.fromkeys(tag_ids.values())]
     
     def to_dict(self, include_employer=True):
         data = {
@@ -155,18 +191,73 @@ class Event(db.Model):
             'event_date': self.event_date.isoformat(),
             'tags': self.tags.split(',') if self.tags else [],
             'created_at': self.created_at.isoformat(),
-            'rsvp_count': len(self.rsvps)  # ← ADD THIS LINE
+            'rsvp_count': self.rsvp_count
         }
         
         if include_employer:
             data['employer'] = self.employer.to_dict()
         
         return data
+    
+    @classmethod
+    def list_query(cls):
+        """
+        Event query with each event's employer joined in, so a whole event
+        list is fetched and serialized with a single query
+        """
+        return cls.query.options(db.joinedload(cls.employer))
+    
+    @classmethod
+    def list_by_ids(cls, event_ids):
+        """Events with the given IDs in that order, skipping any that no longer exist"""
+        events = {event.id: event for event in cls.list_query().filter(cls.id.in_(event_ids))}
+        return [events[event_id] for event_id in event_ids if event_id in events]
+    
+    @staticmethod
+    def serialize_list(events, include_employer=True):
+        """to_dict for a pre-fetched event list"""
+        return [event.to_dict(include_employer) for event in events]
+    
+    @classmethod
+    def adjust_rsvp_count(cls, event_id, delta):
+        """Atomically add delta to an event's rsvp_count inside the current transaction"""
+        db.session.execute(
+            db.update(cls).where(cls.id == event_id).values(rsvp_count=cls.rsvp_count + delta)
+        )
+    
+    @classmethod
+    def reconcile_rsvp_counts(cls):
+        """
+        Recompute rsvp_count from event_rsvps for events where it has drifted.
+        
+        Returns the IDs of the events that were corrected; the caller commits.
+        """
+        actual = (
+            db.select(db.func.count(EventRSVP.id))
+            .where(EventRSVP.event_id == cls.id)
+            .correlate(cls)
+            .scalar_subquery()
+        )
+        
+        stale_ids = [event_id for (event_id,) in db.session.query(cls.id).filter(cls.rsvp_count != actual)]
+        if stale_ids:
+            db.session.execute(
+                db.update(cls).where(cls.id.in_(stale_ids)).values(rsvp_count=actual),
+                execution_options={'synchronize_session': False}
+            )
+        
+        return stale_ids
 
 
 # ============= EVENT RSVP =============
 class EventRSVP(db.Model):
     __tablename__ = 'event_rsvps'
+    __table_args__ = (
+        # Keyset pagination of a student's RSVPs
+        db.Index('ix_event_rsvps_student_id_id', 'student_id', 'id'),
+        # An event's applicants, in student order (see broadcasts.py)
+        db.Index('ix_event_rsvps_event_id_student_id', 'event_id', 'student_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
@@ -182,11 +273,278 @@ class EventRSVP(db.Model):
         }
 
 
+# ============= EVENT PREREQUISITES =============
+class EventPrerequisite(db.Model):
+    """An event to attend before another (e.g. "Intro to ML" before "Advanced ML")"""
+    __tablename__ = 'event_prerequisites'
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'prerequisite_id'),
+        # Finding the events that depend on one
+        db.Index('ix_event_prerequisites_prerequisite_id', 'prerequisite_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
+    prerequisite_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
+    
+    @classmethod
+    def graph(cls, event_ids=None):
+        """
+        Prerequisite IDs of each event, as {event ID: [prerequisite IDs]}.
+        
+        With event_ids, only the links between those events.
+        """
+        prerequisites = defaultdict(list)
+        for event_id, prerequisite_id in db.session.query(cls.event_id, cls.prerequisite_id):
+            if event_ids is None or (event_id in event_ids and prerequisite_id in event_ids):
+                prerequisites[event_id].append(prerequisite_id)
+        return prerequisites
+
+
+# ============= TAGS =============
+class Tag(db.Model):
+    """
+    A skill, job preference or event tag, interned: every spelling of one
+    (e.g. "Python" and " python") shares a row, named by its key
+    """
+    __tablename__ = 'tags'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)  # Lower-cased and stripped
+    
+    @staticmethod
+    def key(name):
+        return name.strip().lower()
+    
+    @classmethod
+    def intern(cls, names):
+        """Tag IDs by key for the given names, creating the missing tags"""
+        keys = {cls.key(name) for name in names} - {''}
+        if not keys:
+            return {}
+        
+        tag_ids = dict(db.session.query(cls.name, cls.id).filter(cls.name.in_(keys)))
+        missing = [cls(name=key) for key in keys if key not in tag_ids]
+        if missing:
+            db.session.add_all(missing)
+            db.session.flush()
+            tag_ids.update((tag.name, tag.id) for tag in missing)
+        
+        return tag_ids
+
+
+class EventTag(db.Model):
+    __tablename__ = 'event_tags'
+    __table_args__ = (
+        # Events carrying a tag
+        db.Index('ix_event_tags_tag_id_event_id', 'tag_id', 'event_id'),
+    )
+    
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tags.id'), primary_key=True)
+
+
+class StudentInterest(db.Model):
+    __tablename__ = 'student_interests'
+    __table_args__ = (
+        # Students interested in a tag
+        db.Index('ix_student_interests_tag_id_student_id', 'tag_id', 'student_id'),
+    )
+    
+    student_id = db.Column(db.Integer, db.ForeignKey('student_profiles.id'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tags.id'), primary_key=True)
+    kind = db.Column(db.String(20), primary_key=True)  # 'skill' or 'preference'
+
+
+# ============= SEARCH INDEX GENERATIONS =============
+class IndexGeneration(db.Model):
+    __tablename__ = 'index_generations'
+    
+    name = db.Column(db.String(50), primary_key=True)  # 'events', 'scores', 'companies', 'skills', 'interests'
+    generation = db.Column(db.Integer, nullable=False, default=0)
+    
+    @classmethod
+    def bump(cls, name, entity_id=None):
+        """
+        Advance a search index's change counter inside the current transaction
+        and log which entity changed, so other workers can catch up.
+        
+        entity_id is the event, employer or student profile ID that changed;
+        None means the whole index must be rebuilt.
+        """
+        updated = db.session.execute(
+            db.update(cls).where(cls.name == name).values(generation=cls.generation + 1)
+        ).rowcount
+        
+        if not updated:
+            db.session.add(cls(name=name, generation=1))
+            db.session.flush()
+        
+        # The counter row stays locked until commit, so generations are logged in commit order
+        generation = db.session.execute(
+            db.select(cls.generation).where(cls.name == name)
+        ).scalar_one()
+        db.session.add(IndexChange(index_name=name, generation=generation, entity_id=entity_id))
+        
+        return generation
+
+
+class IndexChange(db.Model):
+    __tablename__ = 'index_changes'
+    __table_args__ = (db.UniqueConstraint('index_name', 'generation'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    index_name = db.Column(db.String(50), nullable=False)
+    generation = db.Column(db.Integer, nullable=False)
+    entity_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# ============= CONVERSATIONS =============
+class Conversation(db.Model):
+    """
+    The thread of messages between one student and one employer, with its
+    latest message and each side's unread count kept up to date as messages
+    are sent (see record_message), so an inbox is a single query.
+    
+    Read state is a watermark per side: the messages a side has received
+    are read up to and including its *_read_id.
+    """
+    __tablename__ = 'conversations'
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'employer_id'),
+        # Inboxes, most recent first (see pagination.py)
+        db.Index('ix_conversations_student_id_last_message_at_id', 'student_id', 'last_message_at', 'id'),
+        db.Index('ix_conversations_employer_id_last_message_at_id', 'employer_id', 'last_message_at', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student_profiles.id'), nullable=False)
+    employer_id = db.Column(db.Integer, db.ForeignKey('employer_profiles.id'), nullable=False)
+    subject = db.Column(db.String(200))  # Of the latest message
+    last_message_id = db.Column(db.Integer, db.ForeignKey('messages.id', use_alter=True))
+    last_message_at = db.Column(db.DateTime)
+    message_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    student_unread = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Employer messages not yet read
+    employer_unread = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Student messages not yet read
+    student_read_id = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    employer_read_id = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    # Relationships
+    student = db.relationship('StudentProfile')
+    employer = db.relationship('EmployerProfile')
+    last_message = db.relationship('Message', foreign_keys=[last_message_id], post_update=True)
+    
+    @classmethod
+    def record_message(cls, message):
+        """
+        Add a new message to the session, filed under its conversation,
+        creating that on the first message, inside the current transaction. Counters are updated in
+        the database, so concurrent senders do not overwrite each other,
+        and concurrent first messages end up in the same conversation.
+        """
+        student_id = message.sender_id or message.student_recipient_id
+        employer_id = message.recipient_id or message.employer_sender_id
+        
+        conversation = cls.query.filter_by(student_id=student_id, employer_id=employer_id).first()
+        if conversation is None:
+            # Two first messages at once both get here: the unique constraint lets one
+            # insert the conversation, and the other rolls back to the savepoint and finds it
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(db.insert(cls).values(student_id=student_id, employer_id=employer_id))
+            except IntegrityError:
+                pass
+            conversation = cls.query.filter_by(student_id=student_id, employer_id=employer_id).one()
+        
+        # Added only now, so it is inserted once with its conversation, and not flushed early
+        # by the lookups above, which would take the write lock before the conversation is known
+        message.conversation = conversation
+        db.session.add(message)
+        db.session.flush()
+        
+        # A message committed out of order does not replace a later one
+        newer = db.or_(cls.last_message_id.is_(None), cls.last_message_id < message.id)
+        unread = cls.employer_unread if message.sender_id else cls.student_unread
+        db.session.execute(
+            db.update(cls).where(cls.id == conversation.id).values({
+                cls.subject: db.case((newer, message.subject), else_=cls.subject),
+                cls.last_message_id: db.case((newer, message.id), else_=cls.last_message_id),
+                cls.last_message_at: db.case((newer, message.created_at), else_=cls.last_message_at),
+                cls.message_count: cls.message_count + 1,
+                unread: unread + 1,
+            }),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.expire(conversation)
+        return conversation
+    
+    @classmethod
+    def unread_count(cls, user_type, profile_id):
+        """Unread messages across all the conversations of a student or employer profile"""
+        if user_type == 'student':
+            unread, owner = cls.student_unread, cls.student_id
+        else:
+            unread, owner = cls.employer_unread, cls.employer_id
+        return db.session.query(db.func.coalesce(db.func.sum(unread), 0)).filter(owner == profile_id).scalar()
+    
+    def mark_read(self, reader_type):
+        """
+        Mark everything sent to one side ('student' or 'employer') so far as
+        read, inside the current transaction: one row is updated, however
+        long the thread. Returns whether there was anything unread.
+        """
+        if reader_type == 'student':
+            read_id, unread = Conversation.student_read_id, Conversation.student_unread
+            received = Message.employer_sender_id.isnot(None)
+        else:
+            read_id, unread = Conversation.employer_read_id, Conversation.employer_unread
+            received = Message.sender_id.isnot(None)
+        
+        # Moved to the latest message the other side sent, in the same statement, so a
+        # message sent meanwhile stays unread (served by ix_messages_conversation_id_id)
+        latest_received = db.select(db.func.max(Message.id)).where(
+            Message.conversation_id == Conversation.id, received
+        ).scalar_subquery()
+        marked = db.session.execute(
+            db.update(Conversation).where(Conversation.id == self.id, unread > 0)
+            .values({read_id: latest_received, unread: 0}),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        
+        if marked:
+            db.session.expire(self)
+        return bool(marked)
+    
+    def other_participant(self, user_type):
+        """The participant that is not of user_type, as shown in inboxes"""
+        if user_type == 'student':
+            return {'type': 'employer', 'name': self.employer.company_name, 'id': self.employer.id}
+        return {'type': 'student', 'name': self.student.full_name or 'Student', 'id': self.student.id}
+    
+    def to_dict(self, user_type):
+        """Inbox entry for the student or employer side"""
+        return {
+            'conversation_id': self.id,
+            'subject': self.subject,
+            'other_participant': self.other_participant(user_type),
+            'last_message': self.last_message.message_text if self.last_message else None,
+            'last_message_time': self.last_message_at.isoformat() if self.last_message_at else None,
+            'unread_count': self.student_unread if user_type == 'student' else self.employer_unread,
+            'message_count': self.message_count
+        }
+
+
 # ============= MESSAGE MODEL =============
 class Message(db.Model):
     __tablename__ = 'messages'
+    __table_args__ = (
+        # Thread pages (see pagination.py); both directions share the conversation's key
+        db.Index('ix_messages_conversation_id_id', 'conversation_id', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversations.id'))
     
     # For student messages
     sender_id = db.Column(db.Integer, db.ForeignKey('student_profiles.id'), nullable=True)
@@ -198,7 +556,6 @@ class Message(db.Model):
     
     subject = db.Column(db.String(200))
     message_text = db.Column(db.Text, nullable=False)
-    is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -206,6 +563,16 @@ class Message(db.Model):
     recipient = db.relationship('EmployerProfile', foreign_keys=[recipient_id], backref='received_messages')
     employer_sender = db.relationship('EmployerProfile', foreign_keys=[employer_sender_id], backref='employer_sent_messages')
     student_recipient = db.relationship('StudentProfile', foreign_keys=[student_recipient_id], backref='student_received_messages')
+    conversation = db.relationship('Conversation', foreign_keys=[conversation_id])
+    
+    @property
+    def is_read(self):
+        """Whether the recipient has read this message, by their side's watermark in the conversation"""
+        if self.conversation is None:
+            return False
+        if self.student_recipient_id:
+            return self.id <= self.conversation.student_read_id
+        return self.id <= self.conversation.employer_read_id
     
     def to_dict(self):
         data = {
@@ -249,4 +616,45 @@ class Message(db.Model):
                 'name': self.student_recipient.full_name or 'Student'
             }
         
-        return data
\ No newline at end of file
+        return data
+
+
+# ============= BROADCASTS =============
+class Broadcast(db.Model):
+    """
+    An employer's message to everyone who RSVP'd to one of their events,
+    sent in batches by a background worker (see broadcasts.py)
+    """
+    __tablename__ = 'broadcasts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
+    employer_id = db.Column(db.Integer, db.ForeignKey('employer_profiles.id'), nullable=False)
+    subject = db.Column(db.String(200))
+    message_text = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, sending, sent or failed
+    total = db.Column(db.Integer, nullable=False, default=0)  # Applicants when queued
+    sent = db.Column(db.Integer, nullable=False, default=0)
+    last_student_id = db.Column(db.Integer, nullable=False, default=0)  # Applicants are sent to in student order
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)  # Refreshed with each batch while a worker is sending it
+    
+    # Relationships
+    event = db.relationship('Event')
+    employer = db.relationship('EmployerProfile')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'event_id': self.event_id,
+            'subject': self.subject,
+            'message_text': self.message_text,
+            'status': self.status,
+            'total': self.total,
+            'sent': self.sent,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
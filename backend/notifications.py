@@ -0,0 +1,310 @@
+"""
+Live Updates Stream for CareerConnect
+=====================================
+
+GET /api/stream is a Server-Sent Events channel that pushes to signed-in
+users, instead of them polling:
+
+    message   a message sent in one of their conversations (to both sides)
+    unread    their new unread message count
+    rsvp      a student RSVP'd to or cancelled on an event (to the student
+              and the event's employer), with its RSVP count
+    broadcast the progress of an employer's broadcast (see broadcasts.py)
+
+Routes publish to an in-process hub after committing, and the hub fans each
+event out to the connections of the users concerned. Every connection holds
+a small queue; a connection that falls too far behind is closed and the
+browser reconnects on its own.
+
+Each event has an ID, and the last REPLAY_SIZE events are kept, so a client
+reconnecting with Last-Event-ID is sent what it missed. If that is no longer
+possible (the worker restarted, or too much happened meanwhile) it is sent a
+'resync' event and should re-fetch. Every connection starts with the current
+unread count.
+
+Browsers open the stream with a token from POST /api/stream/token, which
+opens nothing else, opens one stream only and expires after TOKEN_SECONDS,
+rather than their login token in the query string. Used tokens are
+remembered until they expire, per worker process like the hub's streams. The frontend shares one stream between all the
+components of a tab (see frontend/src/utils/stream.js).
+
+A comment line is sent every HEARTBEAT_INTERVAL seconds of silence, so
+proxies keep idle connections open and dead ones are noticed.
+
+Each open stream holds a server thread (or greenlet) for as long as it
+lasts, so the app must be served by threaded or gevent workers, e.g.
+
+    gunicorn --worker-class gthread --threads 1100 app:app
+    gunicorn --worker-class gevent --worker-connections 2000 app:app
+
+The stream route answers 503 under a server that is not multithreaded,
+such as gunicorn's default sync workers, where one stream would take up a
+whole worker process. MAX_CONNECTIONS is enforced per worker process and
+should be below its threads, leaving some for ordinary requests; beyond it
+streams are answered 503.
+
+The hub only fans out events published in its own process: with several
+worker processes, route /api/stream and the writes that publish to the same
+worker (or run a single one) until the hub is backed by a shared broker.
+
+See benchmark_stream.py for a load test with thousands of idle connections.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+# Open streams this worker process accepts
+MAX_CONNECTIONS = int(os.environ.get('STREAM_MAX_CONNECTIONS', '1000'))
+
+# Seconds a token from POST /api/stream/token can open a stream for
+TOKEN_SECONDS = int(os.environ.get('STREAM_TOKEN_SECONDS', '60'))
+
+# Seconds of silence before a heartbeat comment is sent
+HEARTBEAT_INTERVAL = float(os.environ.get('STREAM_HEARTBEAT_INTERVAL', '15'))
+
+# Recent events kept for clients reconnecting with Last-Event-ID
+REPLAY_SIZE = 1000
+
+# Events queued for one connection before it is dropped as too slow
+QUEUE_SIZE = 100
+
+# Milliseconds browsers wait before reconnecting
+RETRY_MS = 3000
+
+
+def format_event(event_type, data, event_id=None):
+    """One Server-Sent Events frame"""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscription:
+    """
+    One open stream. Iterating it yields the frames to send; closing it
+    (the WSGI server does when the client goes away) unsubscribes.
+    """
+
+    def __init__(self, hub, user_id, backlog, complete):
+        self.hub = hub
+        self.user_id = user_id
+        self.queue = queue.Queue(QUEUE_SIZE)
+        self.backlog = backlog
+        self.complete = complete
+        self.initial = []
+        self.overflowed = False
+        self.closed = False
+
+    def send(self, frame):
+        """Queue a frame; called by the hub with its lock held"""
+        try:
+            self.queue.put_nowait(frame)
+        except queue.Full:
+            # Closed once drained; reconnecting replays what was dropped
+            self.overflowed = True
+
+    def __iter__(self):
+        yield f"retry: {RETRY_MS}\n\n"
+        if not self.complete:
+            yield format_event('resync', {})
+        yield from self.backlog
+        yield from self.initial
+
+        while not self.closed and not self.overflowed:
+            try:
+                frame = self.queue.get(timeout=HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                yield ': heartbeat\n\n'
+                continue
+            yield frame
+
+        # Frames queued before an overflow still go out, in order
+        while not self.closed:
+            try:
+                yield self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.hub.unsubscribe(self)
+
+
+class Hub:
+    """In-process publish/subscribe of events to the open streams of each user"""
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, replay_size=REPLAY_SIZE):
+        self.max_connections = max_connections
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+        self.connections = 0
+
+        # IDs are '<process>-<sequence>', so an ID from another process or run is recognized
+        self.process = uuid.uuid4().hex[:8]
+        self.sequence = 0
+        self.recent = deque(maxlen=replay_size)
+
+    def subscribe(self, user_id, last_event_id=None):
+        """
+        Open a stream for a user, replaying the events after last_event_id.
+
+        Returns None if this worker is at MAX_CONNECTIONS.
+        """
+        with self.lock:
+            if self.connections >= self.max_connections:
+                return None
+
+            backlog, complete = self.replay(user_id, last_event_id)
+            subscription = Subscription(self, user_id, backlog, complete)
+            self.subscriptions[user_id].add(subscription)
+            self.connections += 1
+            return subscription
+
+    def replay(self, user_id, last_event_id):
+        """(frames for user_id after last_event_id, whether none have been forgotten)"""
+        if not last_event_id:
+            return [], True
+
+        process, _, sequence = last_event_id.partition('-')
+        if process != self.process or not sequence.isdigit():
+            return [], False
+
+        sequence = int(sequence)
+        oldest = self.recent[0][0] if self.recent else self.sequence + 1
+        complete = sequence >= oldest - 1
+        return [frame for number, recipient, frame in self.recent
+                if number > sequence and recipient == user_id], complete
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id)
+            if subscriptions and subscription in subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.user_id]
+                self.connections -= 1
+
+    def publish(self, user_ids, event_type, data):
+        """Send an event to every open stream of the given users"""
+        with self.lock:
+            self.sequence += 1
+            event_id = f"{self.process}-{self.sequence}"
+            frame = format_event(event_type, data, event_id)
+
+            for user_id in dict.fromkeys(user_ids):
+                self.recent.append((self.sequence, user_id, frame))
+                for subscription in self.subscriptions.get(user_id, ()):
+                    subscription.send(frame)
+
+
+hub = Hub()
+
+# ID -> expiry (Unix time) of the stream tokens that have opened a stream
+used_tokens = {}
+used_tokens_lock = threading.Lock()
+
+
+def spend_token(token_id, expires):
+    """Record a stream token as used; False if it already was"""
+    with used_tokens_lock:
+        # Expired tokens are refused anyway, so they need not be remembered
+        now = time.time()
+        for expired in [used for used, expiry in used_tokens.items() if expiry < now]:
+            del used_tokens[expired]
+
+        if token_id in used_tokens:
+            return False
+        used_tokens[token_id] = expires
+        return True
+
+
+def open_stream(user, last_event_id=None):
+    """
+    A Subscription for the user's stream, starting with their unread count,
+    or None if this worker has no room for another connection
+    """
+    from models import Conversation
+
+    subscription = hub.subscribe(user.id, last_event_id)
+    if subscription is None:
+        return None
+
+    # Read after subscribing, so a message sent meanwhile is not missed
+    try:
+        profile = user.student_profile if user.user_type == 'student' else user.employer_profile
+        unread = Conversation.unread_count(user.user_type, profile.id)
+    except Exception:
+        subscription.close()
+        raise
+    subscription.initial.append(format_event('unread', {'unread_count': unread}))
+    return subscription
+
+
+def publish_message(conversation, message):
+    """Push a committed message to both participants, and the recipient's unread count"""
+    from models import Conversation
+
+    student_user_id, employer_user_id = conversation.student.user_id, conversation.employer.user_id
+    hub.publish([student_user_id, employer_user_id], 'message', {
+        'conversation_id': conversation.id,
+        'message': message.to_dict()
+    })
+
+    if message.sender_id:
+        recipient, unread = employer_user_id, Conversation.unread_count('employer', conversation.employer_id)
+    else:
+        recipient, unread = student_user_id, Conversation.unread_count('student', conversation.student_id)
+    hub.publish([recipient], 'unread', {'unread_count': unread})
+
+
+def publish_unread(user):
+    """Push a user's unread count, after they read a conversation"""
+    from models import Conversation
+
+    profile = user.student_profile if user.user_type == 'student' else user.employer_profile
+    hub.publish([user.id], 'unread', {'unread_count': Conversation.unread_count(user.user_type, profile.id)})
+
+
+def publish_rsvp(event, student_user, rsvped):
+    """Push a committed RSVP change to the student and the event's employer"""
+    hub.publish([student_user.id, event.employer.user_id], 'rsvp', {
+        'event_id': event.id,
+        'rsvp_count': event.rsvp_count,
+        'rsvped': rsvped
+    })
+
+
+def publish_broadcast(broadcast, message_ids=()):
+    """
+    Push a broadcast's progress to its employer, and one committed batch of
+    its messages, with their new unread counts, to the recipients
+    """
+    from models import db, Conversation, Message, StudentProfile
+
+    if message_ids:
+        messages = Message.query.options(
+            db.joinedload(Message.employer_sender),
+            db.joinedload(Message.student_recipient),
+            db.joinedload(Message.conversation)
+        ).filter(Message.id.in_(message_ids)).all()
+
+        # One grouped query for the whole batch rather than one per recipient
+        unread = dict(db.session.query(StudentProfile.id, db.func.sum(Conversation.student_unread))
+                      .join(Conversation, Conversation.student_id == StudentProfile.id)
+                      .filter(StudentProfile.id.in_([message.student_recipient_id for message in messages]))
+                      .group_by(StudentProfile.id))
+
+        for message in messages:
+            user_id = message.student_recipient.user_id
+            hub.publish([user_id], 'message', {'conversation_id': message.conversation_id, 'message': message.to_dict()})
+            hub.publish([user_id], 'unread', {'unread_count': unread[message.student_recipient_id]})
+
+    # Not every message to the employer: one event per batch, so their streams keep up
+    hub.publish([broadcast.employer.user_id], 'broadcast', broadcast.to_dict())
@@ -0,0 +1,113 @@
+"""
+Keyset Pagination for CareerConnect
+===================================
+
+Event lists are returned a page at a time: ?limit= sets the page size and
+?cursor= continues after the last row of the previous page. The cursor is
+opaque to clients (base64url JSON of the last row's sort key) and is sent
+back in the X-Next-Cursor response header, which is absent on the last page.
+/search is the exception, returning a cursor per result type in its body.
+
+Chronological lists filter on their sort key, (event_date, id) for example,
+instead of using OFFSET, so the database walks a composite index straight
+to the first row of the page whatever page it is on. Ranked lists page on
+(-score, event_date, id), worked out by the tag index (see tag_index.py).
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from flask import request, jsonify
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def encode_cursor(*values):
+    """Opaque cursor for a sort key; datetimes are stored as ISO strings"""
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    payload = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, *types):
+    """Sort key of a cursor, converted to the given types; raises ValueError if malformed"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError('Invalid cursor')
+
+    try:
+        return tuple(datetime.fromisoformat(value) if kind is datetime else kind(value)
+                     for value, kind in zip(values, types))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def get_page_args(*types):
+    """
+    (limit, sort key or None) from the request's ?limit= and ?cursor=.
+
+    types are those of the list's sort key columns; raises ValueError on bad input.
+    """
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('Invalid limit')
+    if limit < 1:
+        raise ValueError('Invalid limit')
+
+    cursor = request.args.get('cursor')
+    key = decode_cursor(cursor, *types) if cursor else None
+    return min(limit, MAX_PAGE_SIZE), key
+
+
+def after_key(columns, key, descending=True):
+    """
+    SQL condition selecting the rows that sort after key on columns.
+
+    Written as col1 <= v1 AND (col1 < v1 OR (col1 = v1 AND ...)) rather than a
+    row-value comparison, so the leading bound is usable as an index range
+    on every database.
+    """
+    def beyond(column, value):
+        return column < value if descending else column > value
+
+    condition = beyond(columns[-1], key[-1])
+    if len(columns) == 1:
+        return condition
+
+    for column, value in zip(reversed(columns[:-1]), reversed(key[:-1])):
+        condition = beyond(column, value) | ((column == value) & condition)
+
+    first = columns[0] <= key[0] if descending else columns[0] >= key[0]
+    return first & condition
+
+
+def keyset_page(query, columns, limit, key=None, descending=True):
+    """
+    One page of query ordered by columns, starting after key.
+
+    Returns (rows, whether more rows follow).
+    """
+    if key is not None:
+        query = query.filter(after_key(columns, key, descending))
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+
+def page_response(data, next_key=None):
+    """JSON response for one page, with the cursor of the next page if there is one"""
+    response = jsonify(data)
+    if next_key is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*next_key)
+    return response
@@ -0,0 +1,109 @@
+"""
+Multi-term query evaluation on top of the search tries.
+
+A query like "machine learning google" is split into terms, each term is
+resolved to a sorted posting list (every ID stored under a word starting
+with that term), and the lists are combined:
+
+    AND - galloping intersection, driven by the shortest list
+    OR  - k-way merge that counts how many terms each ID matched
+
+Posting lists stay sorted arrays the whole way through, so no per-term
+Python sets are built even for lists with hundreds of thousands of IDs.
+"""
+
+import heapq
+import re
+from array import array
+from bisect import bisect_left
+
+from trie import allowed_edits
+
+TOKEN_PATTERN = re.compile(r"[\w+#.]+")
+
+
+def tokenize(query):
+    """Lower-cased, de-duplicated search terms in query order"""
+    terms = []
+    for term in TOKEN_PATTERN.findall(query.lower()):
+        term = term.strip('.')
+        if term and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def term_postings(index, term, max_edits=None):
+    """Sorted IDs under words starting with term (or close to it when fuzzy)"""
+    if max_edits is not None:
+        edits = allowed_edits(term, max_edits)
+        if edits:
+            return array('I', sorted(index.fuzzy_search(term, edits, prefix=True)))
+    return index.postings(term)
+
+
+def gallop(postings, target, low):
+    """Index of the first entry >= target at or after low, by exponential search"""
+    size = len(postings)
+    step = 1
+    while low + step < size and postings[low + step] < target:
+        step *= 2
+    return bisect_left(postings, target, low + step // 2, min(low + step + 1, size))
+
+
+def intersect(posting_lists):
+    """IDs present in every list (AND)"""
+    if not posting_lists:
+        return array('I')
+
+    lists = sorted(posting_lists, key=len)
+    shortest, others = lists[0], lists[1:]
+    positions = [0] * len(others)
+    result = array('I')
+
+    for data_id in shortest:
+        for i, postings in enumerate(others):
+            position = gallop(postings, data_id, positions[i])
+            positions[i] = position
+            if position == len(postings):
+                return result  # One list is exhausted: nothing further can match
+            if postings[position] != data_id:
+                break
+        else:
+            result.append(data_id)
+
+    return result
+
+
+def union_with_counts(posting_lists):
+    """(data_id, matched_terms) for IDs present in any list (OR), in ID order"""
+    results = []
+    for data_id in heapq.merge(*posting_lists):
+        if results and results[-1][0] == data_id:
+            results[-1][1] += 1
+        else:
+            results.append([data_id, 1])
+    return [(data_id, matched) for data_id, matched in results]
+
+
+def search(index, query, mode='and', max_edits=None):
+    """
+    Evaluate a multi-term query against a trie.
+
+    max_edits turns on typo tolerance: it is the requested budget per term,
+    scaled down for short terms by allowed_edits.
+
+    Returns [(data_id, matched_terms)], most matched terms first. In 'and'
+    mode every result matched all terms; 'or' returns partial matches too.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+
+    posting_lists = [term_postings(index, term, max_edits) for term in terms]
+
+    if mode == 'or':
+        results = union_with_counts(posting_lists)
+        results.sort(key=lambda result: -result[1])
+        return results
+
+    return [(data_id, len(terms)) for data_id in intersect(posting_lists)]
@@ -1,107 +1,105 @@
-from models import Event, StudentProfile, StudentSkill
-from collections import defaultdict, deque
+from models import EventPrerequisite
+from ranking_engine import relevance_engine, get_student_interests, get_event_terms
+from collections import defaultdict
+import heapq
 
-def calculate_event_relevance_score(event, student_profile):
+def relevance_scorer(student_profile):
     """
-    Calculate how relevant an event is to a student based on:
-    1. Skills match
-    2. Job preferences match
-    3. Tags match
-    
-    Returns a score (higher = more relevant)
+    How relevant events are to a student, from their skills and job
+    preferences matching each event's tags and title: event -> score
+    (higher = more relevant); see the 'relevance' weight profile in
+    ranking_engine.py
     """
-    score = 0
-    
-    # Get student's skills
-    student_skills = set([skill.skill_name.lower() for skill in student_profile.skills])
-    
-    # Get student's job preferences
-    student_preferences = set()
-    if student_profile.job_preferences:
-        student_preferences = set([pref.strip().lower() for pref in student_profile.job_preferences.split(',')])
-    
-    # Get event tags
-    event_tags = set()
-    if event.tags:
-        event_tags = set([tag.strip().lower() for tag in event.tags.split(',')])
-    
-    # Score based on skills match
-    skills_match = student_skills.intersection(event_tags)
-    score += len(skills_match) * 3  # Weight: 3 points per skill match
+    explain = relevance_engine.scorer(get_student_interests(student_profile))
+    return lambda event: explain(*get_event_terms(event))['score']
+
+
+class PrerequisiteCycleError(ValueError):
+    """Events whose prerequisites form a cycle; event_ids lists them, each followed by its prerequisite"""
     
-    # Score based on job preferences match
-    preferences_match = student_preferences.intersection(event_tags)
-    score += len(preferences_match) * 5  # Weight: 5 points per preference match
+    def __init__(self, event_ids):
+        self.event_ids = event_ids
+        super().__init__(f"Events {', '.join(str(event_id) for event_id in event_ids)} form a prerequisite cycle")
+
+
+def find_prerequisite_cycle(prerequisites, event_ids):
+    """
+    One cycle among event_ids, each of which must have a prerequisite among
+    them (as the events Kahn's algorithm could not order do)
+    """
+    remaining = set(event_ids)
+    position = {}
+    path = []
     
-    # Bonus for exact title matches
-    event_title_words = set(event.title.lower().split())
-    title_match = student_preferences.intersection(event_title_words) or student_skills.intersection(event_title_words)
-    score += len(title_match) * 2  # Weight: 2 points per title word match
+    event_id = next(iter(remaining))
+    while event_id not in position:
+        position[event_id] = len(path)
+        path.append(event_id)
+        event_id = next(prerequisite for prerequisite in prerequisites[event_id] if prerequisite in remaining)
     
-    return score
+    return path[position[event_id]:]
 
 
-def topological_sort_events(events, student_profile):
+def order_by_prerequisites(event_ids, prerequisites, sort_key):
     """
-    Sort events using topological sort based on relevance scores.
-    Events with higher relevance come first.
+    Kahn's algorithm: event_ids ordered so every event comes after its
+    prerequisites, taking the ready event with the smallest sort_key first.
+    O((V + E) log V).
     
-    Returns: List of events sorted by relevance (highest first)
+    prerequisites maps event IDs to their prerequisite IDs; those outside
+    event_ids are ignored. Raises PrerequisiteCycleError if no order exists.
     """
-    # Calculate scores for all events
-    event_scores = []
-    for event in events:
-        score = calculate_event_relevance_score(event, student_profile)
-        event_scores.append((event, score))
+    waiting = dict.fromkeys(event_ids, 0)  # event ID -> prerequisites not yet placed
+    dependents = defaultdict(list)
+    
+    for event_id in waiting:
+        for prerequisite in prerequisites.get(event_id, ()):
+            if prerequisite in waiting:
+                waiting[event_id] += 1
+                dependents[prerequisite].append(event_id)
+    
+    ready = [(sort_key(event_id), event_id) for event_id, count in waiting.items() if count == 0]
+    heapq.heapify(ready)
+    
+    ordered = []
+    while ready:
+        _, event_id = heapq.heappop(ready)
+        ordered.append(event_id)
+        
+        for dependent in dependents.get(event_id, ()):
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                heapq.heappush(ready, (sort_key(dependent), dependent))
     
-    # Sort by score (descending) - higher scores first
-    event_scores.sort(key=lambda x: x[1], reverse=True)
+    if len(ordered) < len(waiting):
+        blocked = [event_id for event_id, count in waiting.items() if count]
+        raise PrerequisiteCycleError(find_prerequisite_cycle(prerequisites, blocked))
     
-    # Return just the events (without scores)
-    return [event for event, score in event_scores]
+    return ordered
 
 
-def build_event_dependency_graph(events, student_profile):
-    """
-    Advanced: Build a directed graph where events depend on prerequisites
-    (e.g., "Advanced ML" depends on "Intro to ML")
-    
-    For now, we just use relevance scores, but this can be extended
-    for more complex ranking logic.
+def build_event_dependency_graph(events, student_profile, prerequisites=None):
     """
-    graph = defaultdict(list)
-    in_degree = defaultdict(int)
+    Order events so that each comes after its prerequisites (e.g. "Advanced ML"
+    after "Intro to ML"), and otherwise by relevance score (highest first),
+    then date.
     
-    # Calculate relevance scores
-    event_scores = {}
-    for event in events:
-        score = calculate_event_relevance_score(event, student_profile)
-        event_scores[event.id] = score
-        in_degree[event.id] = 0
+    prerequisites maps event IDs to their prerequisite IDs; by default the
+    links between these events are read from event_prerequisites.
     
-    # Build dependency graph based on scores
-    # Higher score events should come before lower score events
-    sorted_events = sorted(events, key=lambda e: event_scores[e.id], reverse=True)
+    Raises PrerequisiteCycleError, naming the events, if the prerequisites form a cycle.
+    """
+    event_map = {event.id: event for event in events}
     
-    for i, event in enumerate(sorted_events):
-        for j in range(i + 1, len(sorted_events)):
-            if event_scores[event.id] > event_scores[sorted_events[j].id]:
-                graph[event.id].append(sorted_events[j].id)
-                in_degree[sorted_events[j].id] += 1
+    if prerequisites is None:
+        prerequisites = EventPrerequisite.graph(event_map)
     
-    # Perform topological sort using Kahn's algorithm
-    queue = deque([event_id for event_id in in_degree if in_degree[event_id] == 0])
-    sorted_event_ids = []
+    score = relevance_scorer(student_profile)
+    event_scores = {event.id: score(event) for event in events}
     
-    while queue:
-        event_id = queue.popleft()
-        sorted_event_ids.append(event_id)
-        
-        for neighbor in graph[event_id]:
-            in_degree[neighbor] -= 1
-            if in_degree[neighbor] == 0:
-                queue.append(neighbor)
+    sorted_event_ids = order_by_prerequisites(
+        event_map, prerequisites,
+        lambda event_id: (-event_scores[event_id], event_map[event_id].event_date, event_id)
+    )
     
-    # Map back to event objects
-    event_map = {event.id: event for event in events}
-    return [event_map[event_id] for event_id in sorted_event_ids if event_id in event_map]
\ No newline at end of file
+    return [event_map[event_id] for event_id in sorted_event_ids]
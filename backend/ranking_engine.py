@@ -0,0 +1,331 @@
+"""
+Event Ranking Engine for CareerConnect
+======================================
+
+Every event feed ranks events for a student by matching the student's
+skills and job preferences against each event's tags, title words and
+company. What each kind of match is worth is set by a named weight profile:
+
+    relevance   3 per tag matching a skill, 5 per tag matching a job
+                preference, and 2 per title word matching a preference
+                (or, if none does, a skill)            - /events/browse
+    interest    1 per tag matching a skill or preference, and 2 per
+                preference found in the company's name or industry
+                                                       - /events/personalized,
+                                                         dashboard recommendations
+
+How a page is worked out is a named strategy; all give the same pages:
+
+    bitset      every event in the tag index at once (see tag_index.py)
+    sql         one aggregation query over the event_tags and
+                student_interests tables, run by the database
+    heap        score events one at a time, keeping the best in a heap
+    scan        score every event, then sort
+
+Scoring an event explains its score in the same pass: the matching tags,
+title words and company preferences, and the match percentage shown on the
+student dashboard.
+
+    page, more = relevance_engine.rank(profile, 20, since=datetime.utcnow())
+
+Compare the strategies with python benchmark_ranking.py.
+"""
+
+import heapq
+import os
+from collections import defaultdict
+
+import tag_index
+
+# Points per match of each kind; weights must be non-negative integers
+WEIGHT_PROFILES = {
+    'relevance': {'skill_tag': 3, 'preference_tag': 5, 'interest_tag': 0, 'title_word': 2, 'company': 0},
+    'interest': {'skill_tag': 0, 'preference_tag': 0, 'interest_tag': 1, 'title_word': 0, 'company': 2},
+}
+
+# Strategy of the feed engines: 'bitset', 'sql', 'heap' or 'scan'
+RANKING_STRATEGY = os.environ.get('RANKING_STRATEGY', 'bitset')
+
+
+def get_student_interests(student_profile):
+    """A student's lower-cased (skills, job preferences), as frozensets"""
+    skills = frozenset(skill.skill_name.strip().lower() for skill in student_profile.skills if skill.skill_name.strip())
+    prefs = frozenset(pref.strip().lower() for pref in (student_profile.job_preferences or '').split(',') if pref.strip())
+    return skills, prefs
+
+
+def get_event_terms(event):
+    """An event's (tags, title words, company name, industry), lower-cased, as scorers take them"""
+    tags, title_words = tag_index.get_event_terms(event)
+    employer = event.employer
+    company_name = (employer.company_name or '').lower() if employer else ''
+    industry = (employer.industry or '').lower() if employer else ''
+    return tags, title_words, company_name, industry
+
+
+def match_percentage(matches, interests):
+    """Dashboard match percentage for matching tags out of a student's interests"""
+    if not interests:
+        return 75  # Default if no preferences
+    return min(100, int((len(matches) / len(interests)) * 100) + 50)  # Start at 50% minimum
+
+
+class RankingEngine:
+    def __init__(self, weights='interest', strategy=None):
+        """
+        weights is a WEIGHT_PROFILES name or a dict of weights (missing ones
+        are 0); strategy is a STRATEGIES name, RANKING_STRATEGY by default.
+        """
+        if isinstance(weights, str):
+            weights = WEIGHT_PROFILES[weights]
+        self.weights = dict.fromkeys(WEIGHT_PROFILES['relevance'], 0)
+        self.weights.update(weights)
+        if any(not isinstance(weight, int) or weight < 0 for weight in self.weights.values()):
+            raise ValueError('Ranking weights must be non-negative integers')
+
+        self.strategy = strategy or RANKING_STRATEGY
+        self.rank_page = STRATEGIES[self.strategy]
+
+    def scorer(self, interests):
+        """
+        Scoring function for a student's (skills, job preferences):
+        (tags, title words, company name, industry) -> explanation, a dict of
+        the score and the matches behind it.
+        """
+        skills, prefs = interests
+        student_interests = skills | prefs
+        weights = self.weights
+
+        def explain(tags, title_words, company_name, industry):
+            matches = student_interests & tags
+            score = weights['interest_tag'] * len(matches)
+            if weights['skill_tag']:
+                score += weights['skill_tag'] * len(skills & tags)
+            if weights['preference_tag']:
+                score += weights['preference_tag'] * len(prefs & tags)
+
+            title_matches = frozenset()
+            if weights['title_word']:
+                title_matches = (prefs & title_words) or (skills & title_words)
+                score += weights['title_word'] * len(title_matches)
+
+            company_matches = frozenset()
+            if weights['company']:
+                company_matches = frozenset(pref for pref in prefs if pref in company_name or pref in industry)
+                score += weights['company'] * len(company_matches)
+
+            return {
+                'score': score,
+                'matches': matches,
+                'title_words': title_matches,
+                'company_matches': company_matches,
+                'match_percentage': match_percentage(matches, student_interests),
+            }
+
+        return explain
+
+    def explain_event(self, interests, event):
+        return self.scorer(interests)(*get_event_terms(event))
+
+    def bitsets(self, index, interests):
+        """
+        The scores of every event in a TagIndex at once, as (bitset, weight)
+        pairs to pass to its ranked_page
+        """
+        skills, prefs = interests
+        weights = self.weights
+
+        # Each matching tag's points, summed over the kinds of match it is
+        tag_weights = defaultdict(int)
+        for skill in skills:
+            tag_weights[skill] += weights['skill_tag'] + weights['interest_tag']
+        for pref in prefs:
+            tag_weights[pref] += weights['preference_tag'] + (0 if pref in skills else weights['interest_tag'])
+        weighted = [(index.tag_bitset(tag), weight) for tag, weight in tag_weights.items() if weight]
+
+        # Title words: preference matches, or skill matches where no preference matches
+        if weights['title_word']:
+            preference_titles = 0
+            for pref in prefs:
+                bits = index.title_bitset(pref)
+                weighted.append((bits, weights['title_word']))
+                preference_titles |= bits
+            weighted += [(index.title_bitset(skill) & ~preference_titles, weights['title_word']) for skill in skills]
+
+        # Preferences in the company's name or industry, for all of its events;
+        # companies with the same bonus are merged into one bitset
+        if weights['company']:
+            bonus_bits = defaultdict(int)
+            for employer_id, (company_name, industry) in index.employers.items():
+                bonus = weights['company'] * sum(1 for pref in prefs if pref in company_name or pref in industry)
+                if bonus:
+                    bonus_bits[bonus] |= index.employer_bitset(employer_id)
+            weighted += [(bits, bonus) for bonus, bits in bonus_bits.items()]
+
+        return weighted
+
+    def rank(self, student_profile, limit, key=None, since=None, source=None):
+        """
+        One page of events ranked by score for a student, highest first,
+        then by (event_date, id), starting after key; since, if given, drops
+        events dated before it.
+
+        source is what to rank: a TagIndex for 'bitset', events for 'heap'
+        and 'scan'; by default the live tag index or every event in the
+        database ('sql' always ranks the database). Returns
+        ([((-score, event_date, event ID), explanation), ...], whether more
+        events follow); each key is also that of the next page.
+        """
+        return self.rank_page(self, student_profile, limit, key, since, source)
+
+
+def rank_bitset(engine, student_profile, limit, key, since, source):
+    interests = get_student_interests(student_profile)
+    index = source if source is not None else tag_index.event_tag_index
+    live = index.live
+    page, more = index.ranked_page(engine.bitsets(index, interests), limit, key, since, live)
+
+    # Only the page's events are explained, from the terms the index holds
+    explain = engine.scorer(interests)
+    ranked = []
+    for page_key in page:
+        tags, title_words, employer_id = index.event_terms.get(page_key[2], (frozenset(), frozenset(), None))
+        ranked.append((page_key, explain(tags, title_words, *index.employers.get(employer_id, ('', '')))))
+    return ranked, more
+
+
+def scored_events(engine, student_profile, key, since, source):
+    """(key, explanation) of each event of source after key and since, in source order"""
+    if source is None:
+        from models import Event
+        query = Event.list_query()
+        if since is not None:
+            query = query.filter(Event.event_date >= since)
+        source = query.yield_per(500)
+
+    explain = engine.scorer(get_student_interests(student_profile))
+    for event in source:
+        if since is not None and event.event_date < since:
+            continue
+        explanation = explain(*get_event_terms(event))
+        event_key = (-explanation['score'], event.event_date, event.id)
+        if key is None or event_key > key:
+            yield event_key, explanation
+
+
+def rank_heap(engine, student_profile, limit, key, since, source):
+    page = heapq.nsmallest(limit + 1, scored_events(engine, student_profile, key, since, source), key=lambda item: item[0])
+    return page[:limit], len(page) > limit
+
+
+def rank_scan(engine, student_profile, limit, key, since, source):
+    ranked = sorted(scored_events(engine, student_profile, key, since, source), key=lambda item: item[0])
+    return ranked[:limit], len(ranked) > limit
+
+
+def ranking_query(engine, student_id, limit, key=None, since=None):
+    """
+    The whole ranking as one query: every event LEFT JOINed to its tags and
+    the student's interests on tag ID, grouped by event and scored by the
+    SUM of the interests' weights (plus the company and title word points),
+    ordered by score and limited to the page. Rows are (event ID,
+    event_date, score).
+
+    Title words are matched by searching the space-padded, lower-cased
+    title for single-word interests (SQLite lower-cases ASCII letters only).
+    """
+    from models import db, Event, EventTag, EmployerProfile, StudentInterest, Tag
+
+    weights = engine.weights
+    interests = db.select(StudentInterest.tag_id, StudentInterest.kind, Tag.name) \
+        .join(Tag, Tag.id == StudentInterest.tag_id) \
+        .where(StudentInterest.student_id == student_id) \
+        .subquery()
+
+    # Points per tag of the student's, summed over the kinds of match it is
+    tag_points = db.select(
+        interests.c.tag_id,
+        (db.func.sum(db.case((interests.c.kind == 'skill', weights['skill_tag']), else_=weights['preference_tag']))
+         + weights['interest_tag']).label('points')
+    ).group_by(interests.c.tag_id).subquery()
+
+    score = db.func.coalesce(db.func.sum(tag_points.c.points), 0)
+    query = db.select(Event.id, Event.event_date) \
+        .outerjoin(EventTag, EventTag.event_id == Event.id) \
+        .outerjoin(tag_points, tag_points.c.tag_id == EventTag.tag_id) \
+        .group_by(Event.id)
+
+    # Preferences in the company's name or industry, counted once per employer
+    if weights['company']:
+        def contains(column):
+            return db.func.instr(db.func.lower(db.func.coalesce(column, '')), interests.c.name) > 0
+
+        company_points = db.select(
+            EmployerProfile.id.label('employer_id'),
+            (db.func.count() * weights['company']).label('points')
+        ).join(interests, (interests.c.kind == 'preference') & (
+            contains(EmployerProfile.company_name) | contains(EmployerProfile.industry)
+        )).group_by(EmployerProfile.id).subquery()
+
+        query = query.outerjoin(company_points, company_points.c.employer_id == Event.employer_id)
+        score = score + db.func.coalesce(db.func.max(company_points.c.points), 0)
+
+    # Title words: preference matches, or skill matches if no preference matches
+    if weights['title_word']:
+        padded_title = ' ' + db.func.lower(Event.title) + ' '
+
+        def title_matches(kind):
+            return db.select(db.func.count()).select_from(interests).where(
+                interests.c.kind == kind,
+                interests.c.name.notlike('% %'),
+                db.func.instr(padded_title, ' ' + interests.c.name + ' ') > 0
+            ).correlate(Event).scalar_subquery()
+
+        preference_titles = title_matches('preference')
+        score = score + weights['title_word'] * db.case(
+            (preference_titles > 0, preference_titles), else_=title_matches('skill')
+        )
+
+    if since is not None:
+        query = query.where(Event.event_date >= since)
+
+    ranked = query.add_columns(score.label('score')).subquery()
+    page = db.select(ranked.c.id, ranked.c.event_date, ranked.c.score)
+    if key is not None:
+        last_score, last_date, last_id = -key[0], key[1], key[2]
+        page = page.where(
+            (ranked.c.score < last_score) | ((ranked.c.score == last_score) & (
+                (ranked.c.event_date > last_date) | ((ranked.c.event_date == last_date) & (ranked.c.id > last_id))
+            ))
+        )
+
+    return page.order_by(ranked.c.score.desc(), ranked.c.event_date, ranked.c.id).limit(limit)
+
+
+def rank_sql(engine, student_profile, limit, key, since, source):
+    from models import db, Event
+
+    rows = db.session.execute(ranking_query(engine, student_profile.id, limit + 1, key, since)).all()
+    page = [(-score, event_date, event_id) for event_id, event_date, score in rows[:limit]]
+
+    # Only the page's events are explained
+    explain = engine.scorer(get_student_interests(student_profile))
+    events = {event.id: event for event in Event.list_by_ids([page_key[2] for page_key in page])}
+    ranked = []
+    for page_key in page:
+        event = events.get(page_key[2])
+        terms = get_event_terms(event) if event else (frozenset(), frozenset(), '', '')
+        ranked.append((page_key, explain(*terms)))
+    return ranked, len(rows) > limit
+
+
+STRATEGIES = {
+    'bitset': rank_bitset,
+    'sql': rank_sql,
+    'heap': rank_heap,
+    'scan': rank_scan,
+}
+
+# Engines of the event feeds
+relevance_engine = RankingEngine('relevance')
+interest_engine = RankingEngine('interest')
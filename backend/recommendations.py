@@ -0,0 +1,210 @@
+"""
+Per-Student Recommendation Store for CareerConnect
+==================================================
+
+The dashboard asks for a student's best upcoming events on every load. Each
+student's ranking (the RECOMMENDATION_DEPTH best upcoming events, with the
+explanations of their scores) is computed once by the interest ranking
+engine and kept here, in every worker, until it goes stale:
+
+- when the student's skills or job preferences change, the entry is dropped
+  and recomputed on the next request;
+- when an event is written, it is re-scored only against the students it
+  can matter to, found through an inverted interest index: students whose
+  interests include one of its tags or (for job preferences) appear in its
+  company's name or industry, students already holding it, and students
+  whose list is short or ends in zero scores, which any event could enter.
+
+A stored list is always exactly the upcoming events ranked at or before its
+last entry, so an event dropping out of it only shortens it. Once too few
+upcoming events remain, the entry is recomputed.
+"""
+
+import threading
+from bisect import insort
+from collections import defaultdict
+from datetime import datetime
+
+# Ranked events kept per student
+RECOMMENDATION_DEPTH = 20
+
+# Students with a stored ranking; the oldest entries are dropped beyond this
+MAX_STUDENTS = 10000
+
+
+class RecommendationStore:
+    def __init__(self, depth=RECOMMENDATION_DEPTH, max_students=MAX_STUDENTS):
+        self.depth = depth
+        self.max_students = max_students
+        self.entries = {}  # student profile ID -> ranked [(key, event ID, explanation)]
+        self.complete = set()  # students whose list holds every upcoming event
+        self.open = set()  # students any new event could enter: complete, or ending in zero scores
+        self.interests = {}  # student ID -> (skills, job preferences) the list was ranked for
+        self.interested = defaultdict(set)  # lower-cased skill or preference -> student IDs
+        self.preferring = defaultdict(set)  # lower-cased job preference -> student IDs
+        self.holders = defaultdict(set)  # event ID -> students whose list has it
+        self.version = 0  # bumped by every write, so a stale computation is not stored
+        self.lock = threading.Lock()
+
+    def get(self, student_profile, limit):
+        """The student's best `limit` upcoming events, as (event ID, explanation)"""
+        now = datetime.utcnow()
+
+        with self.lock:
+            items = self.entries.get(student_profile.id)
+            complete = student_profile.id in self.complete
+
+        if items is not None:
+            upcoming = [item for item in items if item[0][1] >= now]
+            if len(upcoming) >= limit or complete:
+                return [item[1:] for item in upcoming[:limit]]
+
+        return [item[1:] for item in self.compute(student_profile, now)[:limit]]
+
+    def compute(self, student_profile, now):
+        """Rank the student's upcoming events and store the result"""
+        from ranking_engine import interest_engine, get_student_interests
+
+        version = self.version
+        skills, prefs = get_student_interests(student_profile)
+
+        page, more = interest_engine.rank(student_profile, self.depth, since=now)
+        items = [(key, key[2], explanation) for key, explanation in page]
+
+        with self.lock:
+            # Events written meanwhile may be missing: leave the entry to the next request
+            if self.version == version:
+                self._drop(student_profile.id)
+                self._store(student_profile.id, items, not more, skills, prefs)
+
+        return items
+
+    def invalidate_student(self, student_id):
+        """Forget a student's ranking, e.g. after their skills or preferences changed"""
+        with self.lock:
+            self.version += 1
+            self._drop(student_id)
+
+    def update_event(self, event):
+        """Re-score a created or edited event against the students it can matter to"""
+        from ranking_engine import interest_engine, get_event_terms
+
+        now = datetime.utcnow()
+        terms = get_event_terms(event)
+        tags, _, company_name_lower, industry_lower = terms
+
+        with self.lock:
+            self.version += 1
+
+            students = set(self.holders.get(event.id, ())) | self.open
+            for tag in tags:
+                students |= self.interested.get(tag, set())
+            for pref, preferring in self.preferring.items():
+                if pref in company_name_lower or pref in industry_lower:
+                    students |= preferring
+
+            for student_id in students:
+                items = [item for item in self.entries[student_id] if item[1] != event.id]
+                complete = student_id in self.complete
+
+                if event.event_date >= now:
+                    explanation = interest_engine.scorer(self.interests[student_id])(*terms)
+                    key = (-explanation['score'], event.event_date, event.id)
+                    if complete or (items and key < items[-1][0]):
+                        insort(items, (key, event.id, explanation))
+                        if len(items) > self.depth:
+                            items.pop()
+                            complete = False
+
+                self._set_items(student_id, items, complete)
+
+    def remove_event(self, event_id):
+        """Drop a deleted event from every list holding it"""
+        with self.lock:
+            self.version += 1
+            for student_id in list(self.holders.get(event_id, ())):
+                items = [item for item in self.entries[student_id] if item[1] != event_id]
+                self._set_items(student_id, items, student_id in self.complete)
+
+    def clear(self):
+        """Forget every ranking, e.g. after a company's name or industry changed"""
+        with self.lock:
+            self.version += 1
+            for student_id in list(self.entries):
+                self._drop(student_id)
+
+    def _store(self, student_id, items, complete, skills, prefs):
+        while len(self.entries) >= self.max_students:
+            self._drop(next(iter(self.entries)))
+
+        self.interests[student_id] = (skills, prefs)
+        for interest in skills | prefs:
+            self.interested[interest].add(student_id)
+        for pref in prefs:
+            self.preferring[pref].add(student_id)
+
+        self.entries[student_id] = []
+        self._set_items(student_id, items, complete)
+
+    def _set_items(self, student_id, items, complete):
+        old_items = self.entries[student_id]
+        for item in old_items:
+            self.holders[item[1]].discard(student_id)
+            if not self.holders[item[1]]:
+                del self.holders[item[1]]
+        for item in items:
+            self.holders[item[1]].add(student_id)
+
+        # Replaced, not modified, since request threads read it
+        self.entries[student_id] = items
+
+        if complete:
+            self.complete.add(student_id)
+        else:
+            self.complete.discard(student_id)
+
+        if complete or (items and items[-1][2]['score'] == 0):
+            self.open.add(student_id)
+        else:
+            self.open.discard(student_id)
+
+    def _drop(self, student_id):
+        if student_id not in self.entries:
+            return
+
+        self._set_items(student_id, [], False)
+        del self.entries[student_id]
+
+        skills, prefs = self.interests.pop(student_id)
+        for interest in skills | prefs:
+            self.interested[interest].discard(student_id)
+            if not self.interested[interest]:
+                del self.interested[interest]
+        for pref in prefs:
+            self.preferring[pref].discard(student_id)
+            if not self.preferring[pref]:
+                del self.preferring[pref]
+
+
+# Global store, maintained by the index worker (see index_sync)
+recommendation_store = RecommendationStore()
+
+
+def get_recommendations(student_profile, limit):
+    return recommendation_store.get(student_profile, limit)
+
+
+def invalidate_student(student_id):
+    recommendation_store.invalidate_student(student_id)
+
+
+def update_event(event):
+    recommendation_store.update_event(event)
+
+
+def remove_event(event_id):
+    recommendation_store.remove_event(event_id)
+
+
+def clear_recommendations():
+    recommendation_store.clear()
@@ -0,0 +1,45 @@
+"""
+RSVP Count Reconciliation for CareerConnect
+===========================================
+
+events.rsvp_count is adjusted in the same transaction as every RSVP insert
+or delete, but rows removed some other way (a deleted student profile, a
+manual fix in the database) can leave it out of step. This recomputes the
+count from event_rsvps for any event where it has drifted and re-ranks
+those events, since the count ranks them in autocomplete.
+
+    python reconcile_rsvp_counts.py
+
+"""
+
+import os
+
+
+def reconcile_rsvp_counts():
+    from models import db, Event, IndexGeneration
+
+    stale_ids = Event.reconcile_rsvp_counts()
+    for event_id in stale_ids:
+        IndexGeneration.bump('scores', event_id)
+    db.session.commit()
+
+    if stale_ids:
+        print(f"🔧 Corrected rsvp_count for {len(stale_ids)} events: {stale_ids[:20]}{'...' if len(stale_ids) > 20 else ''}")
+    else:
+        print("✅ All RSVP counts are consistent")
+
+    return stale_ids
+
+
+if __name__ == '__main__':
+    # No need to load the search indexes for this
+    os.environ['SEARCH_INDEX_INIT'] = '0'
+
+    from app import app
+
+    print("=" * 60)
+    print("CareerConnect RSVP Count Reconciliation")
+    print("=" * 60)
+
+    with app.app_context():
+        reconcile_rsvp_counts()
@@ -1,8 +1,15 @@
-from flask import Blueprint, request, jsonify, send_from_directory
-from models import db, User, StudentProfile, EmployerProfile, Event, EventRSVP, StudentSkill, Message, PREDEFINED_SKILLS, JOB_PREFERENCES
+from flask import Blueprint, Response, request, jsonify, send_from_directory
+from models import db, User, StudentProfile, EmployerProfile, Event, EventRSVP, EventPrerequisite, StudentSkill, Message, Conversation, Broadcast, IndexGeneration, PREDEFINED_SKILLS, JOB_PREFERENCES
+from index_sync import request_sync
+from search_cache import cached_response, normalize_query
+from pagination import get_page_args, keyset_page, page_response, encode_cursor
+import notifications
+import broadcasts
 from functools import wraps
 from werkzeug.utils import secure_filename
 import jwt
+import uuid
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
 import os
 
@@ -21,6 +28,28 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+@api.before_request
+def sync_search_indexes():
+    """Catch up with search index changes made by other workers"""
+    request_sync(throttle=True)
+
+
+def get_token_user(token, scope=None):
+    """
+    The User a (Bearer) token was issued to, or None; raises if the token is
+    invalid. Tokens issued for one purpose only (scope='stream') are only
+    accepted where that scope is asked for, and only once.
+    """
+    if token.startswith('Bearer '):
+        token = token[7:]
+    data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+    if data.get('scope') != scope:
+        raise jwt.InvalidTokenError('Token not valid here')
+    if scope == 'stream' and not notifications.spend_token(data.get('jti'), data['exp']):
+        raise jwt.InvalidTokenError('Token already used')
+    return User.query.get(data['user_id'])
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -30,10 +59,7 @@ def token_required(f):
             return jsonify({'message': 'Token is missing'}), 401
         
         try:
-            if token.startswith('Bearer '):
-                token = token[7:]
-            data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-            current_user = User.query.get(data['user_id'])
+            current_user = get_token_user(token)
             
             if not current_user:
                 return jsonify({'message': 'Invalid token'}), 401
@@ -65,46 +91,52 @@ def get_job_preferences():
 @token_required
 def browse_events(current_user):
     """
-    Get all events ranked by relevance to the student's profile
-    Uses topological sort based on skills and job preferences match
+    Get future events ranked by relevance to the student's profile, a page at a time
+    Ranked by skills and job preferences match, then by date
     """
     if current_user.user_type != 'student':
         return jsonify({'message': 'Only students can browse events'}), 403
     
-    from ranking import topological_sort_events
-    
-    # Get all future events
-    all_events = Event.query.filter(Event.event_date >= datetime.utcnow()).all()
+    from ranking_engine import relevance_engine
     
-    if not all_events:
-        return jsonify([]), 200
+    try:
+        limit, key = get_page_args(int, datetime, int)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     
     # Get student profile
     student_profile = current_user.student_profile
     
-    # Sort events using topological sort based on relevance
-    sorted_events = topological_sort_events(all_events, student_profile)
+    # Rank all future events; only the page is loaded
+    page, more = relevance_engine.rank(student_profile, limit, key, since=datetime.utcnow())
     
-    return jsonify([event.to_dict() for event in sorted_events]), 200
+    events = Event.list_by_ids([event_id for (_, _, event_id), _ in page])
+    return page_response(Event.serialize_list(events), page[-1][0] if more else None), 200
 
 @api.route('/events/rsvp', methods=['GET'])
 @token_required
 def get_student_rsvps(current_user):
-    """Get all events the student has RSVP'd to"""
+    """Get the events the student has RSVP'd to, a page at a time in RSVP order"""
     if current_user.user_type != 'student':
         return jsonify({'message': 'Only students can view RSVPs'}), 403
     
-    # Get all RSVPs for this student
-    rsvps = EventRSVP.query.filter_by(student_id=current_user.student_profile.id).all()
-    
-    # Get the events
-    events = []
-    for rsvp in rsvps:
-        event = Event.query.get(rsvp.event_id)
-        if event:
-            events.append(event.to_dict())
+    try:
+        limit, key = get_page_args(int)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    # Get the events this student has RSVP'd to
+    rows, more = keyset_page(
+        Event.list_query()
+        .add_columns(EventRSVP.id)
+        .join(EventRSVP, EventRSVP.event_id == Event.id)
+        .filter(EventRSVP.student_id == current_user.student_profile.id),
+        [EventRSVP.id], limit, key, descending=False
+    )
     
-    return jsonify(events), 200
+    events = [event for event, _ in rows]
+    next_key = (rows[-1][1],) if more else None
+    return page_response(Event.serialize_list(events), next_key), 200
 
 # ============= AUTHENTICATION ROUTES =============
 
@@ -156,6 +188,9 @@ def register():
             if skill_name:  # Only add non-empty skills
                 skill = StudentSkill(student_id=profile.id, skill_name=skill_name)
                 db.session.add(skill)
+        
+        profile.refresh_interests()
+        IndexGeneration.bump('skills', profile.id)
             
     else:  # employer
         profile = EmployerProfile(
@@ -167,13 +202,13 @@ def register():
             location=data.get('location', '')
         )
         db.session.add(profile)
+        db.session.flush()
+        IndexGeneration.bump('companies', profile.id)
     
     db.session.commit()
     
-    # Rebuild tries if employer (for company search)
-    if data['user_type'] == 'employer':
-        from trie import build_company_trie
-        build_company_trie()
+    # Add the new profile to the search indexes
+    request_sync()
     
     # Generate token
     token = jwt.encode({
@@ -273,9 +308,20 @@ def manage_student_profile(current_user):
             if skill_name:
                 skill = StudentSkill(student_id=profile.id, skill_name=skill_name)
                 db.session.add(skill)
+        
+        IndexGeneration.bump('skills', profile.id)
+    
+    interests_changed = 'skills' in data or 'job_preferences' in data
+    if interests_changed:
+        profile.refresh_interests()
+        IndexGeneration.bump('interests', profile.id)
     
     db.session.commit()
     
+    # Re-index only this student's skills for candidate search, and re-rank their recommendations
+    if interests_changed:
+        request_sync()
+    
     return jsonify({
         'message': 'Profile updated successfully',
         'profile': profile.to_dict()
@@ -291,7 +337,8 @@ def get_employer_profile(employer_id):
     
     # Include events
     profile_data = profile.to_dict()
-    profile_data['events'] = [event.to_dict(include_employer=False) for event in profile.events]
+    events = Event.list_query().filter(Event.employer_id == profile.id).all()
+    profile_data['events'] = Event.serialize_list(events, include_employer=False)
     
     return jsonify(profile_data), 200
 
@@ -305,7 +352,8 @@ def manage_employer_profile(current_user):
     
     if request.method == 'GET':
         profile_data = profile.to_dict()
-        profile_data['events'] = [event.to_dict(include_employer=False) for event in profile.events]
+        events = Event.list_query().filter(Event.employer_id == profile.id).all()
+        profile_data['events'] = Event.serialize_list(events, include_employer=False)
         return jsonify(profile_data), 200
     
     # PUT - Update profile
@@ -322,11 +370,11 @@ def manage_employer_profile(current_user):
     if 'location' in data:
         profile.location = data['location']
     
+    IndexGeneration.bump('companies', profile.id)  # Also re-indexes its events, which carry the company name
+    
     db.session.commit()
     
-    # Rebuild company trie
-    from trie import build_company_trie
-    build_company_trie()
+    request_sync()
     
     return jsonify({
         'message': 'Profile updated successfully',
@@ -339,6 +387,12 @@ def manage_employer_profile(current_user):
 @api.route('/events', methods=['GET', 'POST'])
 def manage_events():
     if request.method == 'GET':
+        # Newest first, a page at a time
+        try:
+            limit, key = get_page_args(datetime, int)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
         # Check if this is an authenticated employer requesting their own events
         token = request.headers.get('Authorization')
         
@@ -351,16 +405,19 @@ def manage_events():
                 
                 # If employer, return only their events
                 if current_user and current_user.user_type == 'employer':
-                    events = Event.query.filter_by(
-                        employer_id=current_user.employer_profile.id
-                    ).order_by(Event.event_date.desc()).all()
-                    return jsonify([event.to_dict() for event in events]), 200
+                    events, more = keyset_page(
+                        Event.list_query().filter(Event.employer_id == current_user.employer_profile.id),
+                        [Event.event_date, Event.id], limit, key
+                    )
+                    next_key = (events[-1].event_date, events[-1].id) if more else None
+                    return page_response(Event.serialize_list(events), next_key), 200
             except:
                 pass
         
         # Otherwise return all events (for students or public)
-        events = Event.query.order_by(Event.event_date.desc()).all()
-        return jsonify([event.to_dict() for event in events]), 200
+        events, more = keyset_page(Event.list_query(), [Event.event_date, Event.id], limit, key)
+        next_key = (events[-1].event_date, events[-1].id) if more else None
+        return page_response(Event.serialize_list(events), next_key), 200
     
     # POST - Create new event (keep existing code)
     token = request.headers.get('Authorization')
@@ -398,16 +455,17 @@ def manage_events():
         description=data.get('description', ''),
         event_type=data.get('event_type', ''),
         location=data.get('location', ''),
-        event_date=event_date,
-        tags=','.join(data.get('tags', []))
+        event_date=event_date
     )
+    event.set_tags(data.get('tags', []))
     
     db.session.add(event)
+    db.session.flush()
+    IndexGeneration.bump('events', event.id)
     db.session.commit()
     
-    # Rebuild event trie
-    from trie import build_event_trie
-    build_event_trie()
+    # Add the new event to the search indexes
+    request_sync()
     
     return jsonify({
         'message': 'Event created successfully',
@@ -461,13 +519,13 @@ def manage_single_event(event_id):
             except:
                 return jsonify({'message': 'Invalid date format'}), 400
         if 'tags' in data:
-            event.tags = ','.join(data['tags'])
+            event.set_tags(data['tags'])
         
+        IndexGeneration.bump('events', event.id)
         db.session.commit()
         
-        # Rebuild event trie
-        from trie import build_event_trie
-        build_event_trie()
+        # Re-index only this event
+        request_sync()
         
         return jsonify({
             'message': 'Event updated successfully',
@@ -476,11 +534,11 @@ def manage_single_event(event_id):
     
     # DELETE
     db.session.delete(event)
+    IndexGeneration.bump('events', event_id)
     db.session.commit()
     
-    # Rebuild event trie
-    from trie import build_event_trie
-    build_event_trie()
+    # Remove this event from the search indexes
+    request_sync()
     
     return jsonify({'message': 'Event deleted successfully'}), 200
 
@@ -515,8 +573,14 @@ def manage_rsvp(current_user, event_id):
         )
         
         db.session.add(rsvp)
+        Event.adjust_rsvp_count(event_id, 1)
+        IndexGeneration.bump('scores', event_id)  # RSVP counts rank autocomplete results
         db.session.commit()
         
+        # RSVP count ranks the event in autocomplete
+        request_sync()
+        notifications.publish_rsvp(event, current_user, True)
+        
         return jsonify({
             'message': 'RSVP successful',
             'rsvp': rsvp.to_dict()
@@ -532,8 +596,13 @@ def manage_rsvp(current_user, event_id):
         return jsonify({'message': 'RSVP not found'}), 404
     
     db.session.delete(rsvp)
+    Event.adjust_rsvp_count(event_id, -1)
+    IndexGeneration.bump('scores', event_id)
     db.session.commit()
     
+    request_sync()
+    notifications.publish_rsvp(event, current_user, False)
+    
     return jsonify({'message': 'RSVP cancelled successfully'}), 200
 
 
@@ -543,16 +612,28 @@ def get_my_rsvps(current_user):
     if current_user.user_type != 'student':
         return jsonify({'message': 'Only students have RSVPs'}), 403
     
+    try:
+        limit, key = get_page_args(int)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
     student_profile = current_user.student_profile
-    rsvps = EventRSVP.query.filter_by(student_id=student_profile.id).all()
+    rows, more = keyset_page(
+        Event.list_query()
+        .add_columns(EventRSVP.id, EventRSVP.rsvp_date)
+        .join(EventRSVP, EventRSVP.event_id == Event.id)
+        .filter(EventRSVP.student_id == student_profile.id),
+        [EventRSVP.id], limit, key, descending=False
+    )
     
     events = []
-    for rsvp in rsvps:
-        event_data = rsvp.event.to_dict()
-        event_data['rsvp_date'] = rsvp.rsvp_date.isoformat()
+    for event, rsvp_id, rsvp_date in rows:
+        event_data = event.to_dict()
+        event_data['rsvp_date'] = rsvp_date.isoformat()
         events.append(event_data)
     
-    return jsonify(events), 200
+    next_key = (rows[-1][1],) if more else None
+    return page_response(events, next_key), 200
 
 
 @api.route('/events/<int:event_id>/applicants', methods=['GET'])
@@ -577,58 +658,301 @@ def get_event_applicants(current_user, event_id):
     return jsonify(applicants), 200
 
 
+@api.route('/events/<int:event_id>/broadcast', methods=['POST'])
+@token_required
+def broadcast_to_applicants(current_user, event_id):
+    """Message everyone who RSVP'd to the event; sent in the background (see broadcasts.py)"""
+    if current_user.user_type != 'employer':
+        return jsonify({'message': 'Only employers can message applicants'}), 403
+    
+    event = Event.query.get(event_id)
+    if not event:
+        return jsonify({'message': 'Event not found'}), 404
+    
+    if event.employer_id != current_user.employer_profile.id:
+        return jsonify({'message': 'Not authorized to message these applicants'}), 403
+    
+    data = request.get_json() or {}
+    
+    if not data.get('message_text'):
+        return jsonify({'message': 'Message text required'}), 400
+    
+    broadcast = Broadcast(
+        event_id=event.id,
+        employer_id=event.employer_id,
+        subject=data.get('subject') or event.title,
+        message_text=data['message_text'],
+        total=event.rsvp_count
+    )
+    db.session.add(broadcast)
+    db.session.commit()
+    
+    broadcasts.enqueue(broadcast.id)
+    
+    return jsonify({
+        'message': 'Broadcast queued',
+        'broadcast': broadcast.to_dict()
+    }), 202
+
+
+@api.route('/events/<int:event_id>/broadcast/<int:broadcast_id>', methods=['GET'])
+@token_required
+def get_broadcast(current_user, event_id, broadcast_id):
+    """Progress of a broadcast"""
+    broadcast = Broadcast.query.filter_by(id=broadcast_id, event_id=event_id).first()
+    
+    if not broadcast:
+        return jsonify({'message': 'Broadcast not found'}), 404
+    
+    if current_user.user_type != 'employer' or broadcast.employer_id != current_user.employer_profile.id:
+        return jsonify({'message': 'Unauthorized'}), 403
+    
+    return jsonify(broadcast.to_dict()), 200
+
+
+@api.route('/events/<int:event_id>/broadcast/<int:broadcast_id>/retry', methods=['POST'])
+@token_required
+def retry_broadcast(current_user, event_id, broadcast_id):
+    """Queue a failed broadcast again; it carries on with the applicants it had not reached"""
+    broadcast = Broadcast.query.filter_by(id=broadcast_id, event_id=event_id).first()
+    
+    if not broadcast:
+        return jsonify({'message': 'Broadcast not found'}), 404
+    
+    if current_user.user_type != 'employer' or broadcast.employer_id != current_user.employer_profile.id:
+        return jsonify({'message': 'Unauthorized'}), 403
+    
+    if broadcast.status != 'failed':
+        return jsonify({'message': 'Only a failed broadcast can be retried'}), 409
+    
+    broadcast.status = 'queued'
+    broadcast.error = None
+    broadcast.finished_at = None
+    db.session.commit()
+    
+    broadcasts.enqueue(broadcast.id)
+    
+    return jsonify({
+        'message': 'Broadcast queued',
+        'broadcast': broadcast.to_dict()
+    }), 202
+
+
+@api.route('/events/<int:event_id>/prerequisites', methods=['GET'])
+def get_event_prerequisites(event_id):
+    event = Event.query.get(event_id)
+    if not event:
+        return jsonify({'message': 'Event not found'}), 404
+    
+    prerequisite_ids = [link.prerequisite_id for link in event.prerequisite_links]
+    return jsonify(Event.serialize_list(Event.list_by_ids(prerequisite_ids))), 200
+
+
+@api.route('/events/<int:event_id>/prerequisites', methods=['PUT'])
+@token_required
+def set_event_prerequisites(current_user, event_id):
+    from ranking import order_by_prerequisites, PrerequisiteCycleError
+    
+    if current_user.user_type != 'employer':
+        return jsonify({'message': 'Only employers can set prerequisites'}), 403
+    
+    event = Event.query.get(event_id)
+    if not event:
+        return jsonify({'message': 'Event not found'}), 404
+    
+    if event.employer_id != current_user.employer_profile.id:
+        return jsonify({'message': 'Not authorized to modify this event'}), 403
+    
+    data = request.get_json()
+    prerequisite_ids = data.get('prerequisite_ids') if data else None
+    if not isinstance(prerequisite_ids, list) or not all(isinstance(i, int) for i in prerequisite_ids):
+        return jsonify({'message': 'prerequisite_ids must be a list of event IDs'}), 400
+    
+    prerequisite_ids = list(dict.fromkeys(prerequisite_ids))
+    if event_id in prerequisite_ids:
+        return jsonify({'message': 'An event cannot be its own prerequisite'}), 400
+    
+    prerequisites = Event.list_by_ids(prerequisite_ids)
+    if len(prerequisites) != len(prerequisite_ids):
+        return jsonify({'message': 'Prerequisite event not found'}), 404
+    
+    # Reject links that would make the prerequisites circular
+    graph = EventPrerequisite.graph()
+    graph[event_id] = prerequisite_ids
+    event_ids = set(graph).union(*graph.values())
+    try:
+        order_by_prerequisites(event_ids, graph, lambda prerequisite_id: prerequisite_id)
+    except PrerequisiteCycleError as e:
+        cycle = Event.list_by_ids(e.event_ids)
+        return jsonify({
+            'message': 'Prerequisites would form a cycle: ' + ' -> '.join(cycle_event.title for cycle_event in cycle),
+            'cycle': [cycle_event.id for cycle_event in cycle]
+        }), 400
+    
+    # Keep the links that stay, so no (event, prerequisite) pair is deleted and re-inserted
+    existing = {link.prerequisite_id: link for link in event.prerequisite_links}
+    event.prerequisite_links = [
+        existing.get(prerequisite_id) or EventPrerequisite(event_id=event_id, prerequisite_id=prerequisite_id)
+        for prerequisite_id in prerequisite_ids
+    ]
+    db.session.commit()
+    
+    return jsonify(Event.serialize_list(prerequisites)), 200
+
+
 # ============= SEARCH ROUTES =============
 
+def get_fuzzy_edits():
+    """Requested edit budget for ?fuzzy=1&max_edits=N, or None for plain prefix search"""
+    if request.args.get('fuzzy', '').lower() not in ['1', 'true']:
+        return None
+    
+    from trie import MAX_EDITS
+    return max(0, min(request.args.get('max_edits', 1, type=int), MAX_EDITS))
+
+
+def search_page(ranked, limit, key=None):
+    """
+    One page of query_engine results, which come most matched terms first and
+    then by ID, starting after the (matched_terms, id) key of a cursor.
+    
+    Returns (page, cursor of the next page or None).
+    """
+    start = 0
+    if key is not None:
+        matched_terms, data_id = key
+        start = bisect_right([(-matched, result_id) for result_id, matched in ranked], (-matched_terms, data_id))
+    
+    page = ranked[start:start + limit]
+    if start + limit >= len(ranked):
+        return page, None
+    
+    last_id, last_matched = page[-1]
+    return page, encode_cursor(last_matched, last_id)
+
+
 @api.route('/search', methods=['GET'])
+@cached_response
 def search():
+    """
+    Multi-term search over event and company names.
+    
+    Query params: q (required), type=all|events|companies|fulltext,
+    mode=and|or, fuzzy=1&max_edits=N, limit=50 (per type) and cursor.
+    Only a page of each type is loaded; next_cursor holds the cursor of the
+    next page of each, to pass with type=events or type=companies.
+    
+    Unlike the other paginated lists (see pagination.py), the cursors are in
+    the body rather than an X-Next-Cursor header: a page of both types has
+    two, and the response cache (see search_cache.py) keeps only bodies, so
+    a header would be lost on every cache hit.
+    """
     # ✅ IMPORT INSIDE THE FUNCTION TO GET LATEST TRIE
     from trie import event_trie, company_trie
+    import query_engine
     
     query = request.args.get('q', '').strip()
-    search_type = request.args.get('type', 'all')  # 'events', 'companies', 'all'
-    
-    print(f"🔍 Search request: query='{query}', type='{search_type}'")  # Debug
+    search_type = request.args.get('type', 'all')  # 'events', 'companies', 'all', 'fulltext'
+    mode = 'or' if request.args.get('mode', 'and').lower() == 'or' else 'and'
+    max_edits = get_fuzzy_edits()
     
     if not query:
         return jsonify({'message': 'Search query required'}), 400
     
+    if search_type == 'fulltext':
+        return fulltext_search(query)
+    
+    try:
+        limit, key = get_page_args(int, int)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    if key is not None and search_type not in ['events', 'companies']:
+        return jsonify({'message': 'A cursor continues one type of results: pass type=events or type=companies'}), 400
+    
     results = {
         'events': [],
-        'companies': []
+        'companies': [],
+        'next_cursor': {'events': None, 'companies': None}
     }
     
-    # Search events using Trie
+    # Search events using Trie (each query word is a prefix; results ranked by words matched)
     if search_type in ['events', 'all']:
-        event_ids = event_trie.starts_with(query)
-        print(f"📊 Event IDs found: {event_ids}")  # Debug
+        ranked, results['next_cursor']['events'] = search_page(
+            query_engine.search(event_trie, query, mode, max_edits), limit, key
+        )
         
-        if event_ids:
-            events = Event.query.filter(Event.id.in_(event_ids)).all()
-            results['events'] = [event.to_dict() for event in events]
-            print(f"✅ Events found: {len(results['events'])}")  # Debug
+        # Only the page is loaded, so the IN list stays within SQLite's bound-variable limit
+        if ranked:
+            matched = dict(ranked)
+            events = {e.id: e for e in Event.list_query().filter(Event.id.in_(list(matched))).all()}
+            for event_id, matched_terms in ranked:
+                if event_id in events:
+                    event_data = events[event_id].to_dict()
+                    event_data['matched_terms'] = matched_terms
+                    results['events'].append(event_data)
     
     # Search companies using Trie
     if search_type in ['companies', 'all']:
-        company_ids = company_trie.starts_with(query)
-        print(f"📊 Company IDs found: {company_ids}")  # Debug
+        ranked, results['next_cursor']['companies'] = search_page(
+            query_engine.search(company_trie, query, mode, max_edits), limit, key
+        )
         
-        if company_ids:
-            companies = EmployerProfile.query.filter(EmployerProfile.id.in_(company_ids)).all()
-            results['companies'] = [company.to_dict() for company in companies]
-            print(f"✅ Companies found: {len(results['companies'])}")  # Debug
+        if ranked:
+            matched = dict(ranked)
+            companies = {c.id: c for c in EmployerProfile.query.filter(EmployerProfile.id.in_(list(matched))).all()}
+            for company_id, matched_terms in ranked:
+                if company_id in companies:
+                    company_data = companies[company_id].to_dict()
+                    company_data['matched_terms'] = matched_terms
+                    results['companies'].append(company_data)
+    
+    return jsonify(results), 200
+
+
+def fulltext_search(query):
+    """BM25-ranked search over event and company descriptions (?type=fulltext)"""
+    import fulltext
+    
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    results = {
+        'events': [],
+        'companies': []
+    }
+    
+    event_hits = fulltext.event_text_index.search(query, limit)
+    if event_hits:
+        events = {e.id: e for e in Event.list_query().filter(Event.id.in_([event_id for event_id, _ in event_hits])).all()}
+        for event_id, score in event_hits:
+            if event_id in events:
+                event_data = events[event_id].to_dict()
+                event_data['score'] = round(score, 4)
+                results['events'].append(event_data)
+    
+    company_hits = fulltext.company_text_index.search(query, limit)
+    if company_hits:
+        companies = {c.id: c for c in EmployerProfile.query.filter(EmployerProfile.id.in_([company_id for company_id, _ in company_hits])).all()}
+        for company_id, score in company_hits:
+            if company_id in companies:
+                company_data = companies[company_id].to_dict()
+                company_data['score'] = round(score, 4)
+                results['companies'].append(company_data)
     
     return jsonify(results), 200
 
 
 @api.route('/search/autocomplete', methods=['GET'])
+@cached_response
 def autocomplete():
     # ✅ IMPORT INSIDE THE FUNCTION TO GET LATEST TRIE
     from trie import event_trie, company_trie
     
-    query = request.args.get('q', '').strip()
+    query = normalize_query(request.args.get('q', ''))
     search_type = request.args.get('type', 'events')
-    
-    print(f"🔍 Autocomplete request: query='{query}', type='{search_type}'")  # Debug
+    max_edits = get_fuzzy_edits()
+    if max_edits is not None:
+        from trie import allowed_edits
+        max_edits = allowed_edits(query, max_edits)
     
     if not query:
         return jsonify([]), 200
@@ -636,148 +960,163 @@ def autocomplete():
     suggestions = []
     
     if search_type == 'events':
-        event_ids = event_trie.starts_with(query)
-        print(f"📊 Event IDs from trie: {event_ids}")  # Debug
+        # Top-ranked IDs come straight from the trie's per-node cache
+        if max_edits is None:
+            event_ids = event_trie.top_k(query, 4)
+        else:
+            event_ids = event_trie.fuzzy_top_k(query, 4, max_edits)
         
         if event_ids:
-            events = Event.query.filter(Event.id.in_(event_ids)).limit(4).all()
-            suggestions = [{'id': e.id, 'title': e.title, 'type': 'event'} for e in events]
-            print(f"✅ Returning {len(suggestions)} suggestions")  # Debug
+            events = {e.id: e for e in Event.query.filter(Event.id.in_(event_ids)).all()}
+            suggestions = [{'id': events[i].id, 'title': events[i].title, 'type': 'event'} for i in event_ids if i in events]
     
     elif search_type == 'companies':
-        company_ids = company_trie.starts_with(query)
-        print(f"📊 Company IDs from trie: {company_ids}")  # Debug
+        if max_edits is None:
+            company_ids = company_trie.top_k(query, 4)
+        else:
+            company_ids = company_trie.fuzzy_top_k(query, 4, max_edits)
         
         if company_ids:
-            companies = EmployerProfile.query.filter(EmployerProfile.id.in_(company_ids)).limit(4).all()
-            suggestions = [{'id': c.id, 'name': c.company_name, 'type': 'company'} for c in companies]
-            print(f"✅ Returning {len(suggestions)} suggestions")  # Debug
+            companies = {c.id: c for c in EmployerProfile.query.filter(EmployerProfile.id.in_(company_ids)).all()}
+            suggestions = [{'id': companies[i].id, 'name': companies[i].company_name, 'type': 'company'} for i in company_ids if i in companies]
     
     return jsonify(suggestions), 200
 
 
+@api.route('/search/cache-stats', methods=['GET'])
+def search_cache_stats():
+    """Hit/miss counters and size of this worker's search response cache"""
+    from search_cache import response_cache
+    return jsonify(response_cache.stats()), 200
+
+
+@api.route('/search/candidates', methods=['GET'])
+@token_required
+def search_candidates(current_user):
+    """
+    Find students who have ALL of the requested skills (employers only)
+    
+    Query params: skills=python,sql (required), major=..., limit=20, after=<student id>
+    Pages are keyset-based: pass the returned next_after to get the next page.
+    """
+    if current_user.user_type != 'employer':
+        return jsonify({'message': 'Only employers can search candidates'}), 403
+    
+    from trie import skill_trie
+    from query_engine import intersect
+    
+    skills = [skill.strip() for skill in request.args.get('skills', '').split(',') if skill.strip()]
+    major = request.args.get('major', '').strip()
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    after = request.args.get('after', 0, type=int)
+    
+    if not skills:
+        return jsonify({'message': 'At least one skill is required'}), 400
+    
+    # Sorted student IDs per skill, intersected without touching the database
+    student_ids = intersect([skill_trie.search(skill) for skill in skills])
+    start = bisect_left(student_ids, after + 1)
+    
+    # Walk the matches in ID order, loading profiles a chunk at a time until the page is full
+    candidates = []
+    has_more = False
+    chunk_size = max(limit * 2, 200)
+    while start < len(student_ids) and not has_more:
+        chunk = list(student_ids[start:start + chunk_size])
+        start += chunk_size
+        
+        query = StudentProfile.query.options(db.selectinload(StudentProfile.skills)).filter(StudentProfile.id.in_(chunk))
+        if major:
+            query = query.filter(StudentProfile.major.ilike(f'%{major}%'))
+        
+        for profile in query.order_by(StudentProfile.id).all():
+            if len(candidates) == limit:
+                has_more = True
+                break
+            candidates.append(profile)
+    
+    return jsonify({
+        'candidates': [profile.to_dict() for profile in candidates],
+        'total_skill_matches': len(student_ids),
+        'next_after': candidates[-1].id if has_more else None
+    }), 200
+
+
 # ============= MESSAGING ROUTES =============
 
+def in_conversation(current_user, conversation):
+    """Whether the current user is the conversation's student or employer"""
+    if current_user.user_type == 'student':
+        return conversation.student_id == current_user.student_profile.id
+    return conversation.employer_id == current_user.employer_profile.id
+
+
 @api.route('/messages/conversations', methods=['GET'])
 @token_required
 def get_conversations(current_user):
-    """Get all conversations for current user"""
+    """Get the current user's conversations, most recent first, a page at a time"""
+    try:
+        limit, key = get_page_args(datetime, int)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     
+    # One indexed query: the stored latest message and unread counters, with the other side joined in
     if current_user.user_type == 'student':
-        # Get all messages where student is sender
-        messages = Message.query.filter_by(
-            sender_id=current_user.student_profile.id
-        ).order_by(Message.created_at.desc()).all()
+        query = Conversation.query.filter(Conversation.student_id == current_user.student_profile.id) \
+            .options(db.joinedload(Conversation.employer))
     else:
-        # Get all messages where employer is recipient
-        messages = Message.query.filter_by(
-            recipient_id=current_user.employer_profile.id
-        ).order_by(Message.created_at.desc()).all()
-    
-    # Group messages by employer/student
-    conversations = {}
-    for msg in messages:
-        if current_user.user_type == 'student':
-            # Group by employer
-            key = msg.recipient_id
-            if key not in conversations:
-                conversations[key] = {
-                    'conversation_id': msg.id,  # Use first message ID as conversation ID
-                    'messages': [],
-                    'other_participant': {
-                        'type': 'employer',
-                        'name': msg.recipient.company_name,
-                        'id': msg.recipient.id
-                    },
-                    'subject': msg.subject
-                }
-            conversations[key]['messages'].append(msg)
-        else:
-            # Group by student
-            key = msg.sender_id
-            if key not in conversations:
-                conversations[key] = {
-                    'conversation_id': msg.id,  # Use first message ID as conversation ID
-                    'messages': [],
-                    'other_participant': {
-                        'type': 'student',
-                        'name': msg.sender.full_name or 'Student',
-                        'id': msg.sender.id
-                    },
-                    'subject': msg.subject
-                }
-            conversations[key]['messages'].append(msg)
-    
-    # Format for response
-    result = []
-    for conv_data in conversations.values():
-        msgs = sorted(conv_data['messages'], key=lambda x: x.created_at, reverse=True)
-        last_msg = msgs[0]
-        
-        result.append({
-            'conversation_id': conv_data['conversation_id'],
-            'subject': conv_data['subject'],
-            'other_participant': conv_data['other_participant'],
-            'last_message': last_msg.message_text,
-            'last_message_time': last_msg.created_at.isoformat(),
-            'unread_count': sum(1 for m in msgs if not m.is_read),
-            'message_count': len(msgs)
-        })
-    
-    # Sort by last message time
-    result.sort(key=lambda x: x['last_message_time'], reverse=True)
+        query = Conversation.query.filter(Conversation.employer_id == current_user.employer_profile.id) \
+            .options(db.joinedload(Conversation.student))
+    query = query.options(db.joinedload(Conversation.last_message))
     
-    return jsonify(result), 200
+    conversations, more = keyset_page(query, [Conversation.last_message_at, Conversation.id], limit, key)
+    next_key = (conversations[-1].last_message_at, conversations[-1].id) if more else None
+    return page_response([conversation.to_dict(current_user.user_type) for conversation in conversations], next_key), 200
 
 
 @api.route('/messages/conversation/<int:conversation_id>', methods=['GET'])
 @token_required
 def get_conversation_messages(current_user, conversation_id):
-    """Get all messages in a conversation"""
+    """
+    Get a conversation's messages a page at a time, latest page first.
+    
+    ?before=<message_id> (or ?cursor=) fetches the page of older messages;
+    each page is returned oldest first.
+    """
+    try:
+        limit, key = get_page_args(int)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    # The plain form of the cursor: the ID of the oldest message already shown
+    before = request.args.get('before', type=int)
+    if before is not None:
+        key = (before,)
     
-    # Get the first message to identify the conversation
-    first_message = Message.query.get(conversation_id)
+    conversation = Conversation.query.get(conversation_id)
     
-    if not first_message:
+    if not conversation:
         return jsonify({'message': 'Conversation not found'}), 404
     
-    # Determine the participants
-    if current_user.user_type == 'student':
-        student_id = current_user.student_profile.id
-        employer_id = first_message.recipient_id
-        
-        # Get all messages between this student and employer (both directions)
-        messages = Message.query.filter(
-            db.or_(
-                db.and_(Message.sender_id == student_id, Message.recipient_id == employer_id),
-                db.and_(Message.employer_sender_id == employer_id, Message.student_recipient_id == student_id)
-            )
-        ).order_by(Message.created_at.asc()).all()
-        
-        # Mark employer messages as read
-        for msg in messages:
-            if msg.student_recipient_id == student_id and not msg.is_read:
-                msg.is_read = True
-    else:
-        employer_id = current_user.employer_profile.id
-        student_id = first_message.sender_id
-        
-        # Get all messages between this employer and student (both directions)
-        messages = Message.query.filter(
-            db.or_(
-                db.and_(Message.sender_id == student_id, Message.recipient_id == employer_id),
-                db.and_(Message.employer_sender_id == employer_id, Message.student_recipient_id == student_id)
-            )
-        ).order_by(Message.created_at.asc()).all()
-        
-        # Mark student messages as read
-        for msg in messages:
-            if msg.recipient_id == employer_id and not msg.is_read:
-                msg.is_read = True
+    if not in_conversation(current_user, conversation):
+        return jsonify({'message': 'Unauthorized'}), 403
     
+    # Moves this side's read watermark; a single row, however long the thread
+    marked = conversation.mark_read(current_user.user_type)
+    
+    # Message IDs follow sending order, so one range scan of ix_messages_conversation_id_id
+    messages, more = keyset_page(Message.query.filter_by(conversation_id=conversation.id), [Message.id], limit, key)
+    messages.reverse()
+    
+    # Serialized before the commit expires the loaded messages, which would reload them one by one
+    page = [msg.to_dict() for msg in messages]
+    next_key = (messages[0].id,) if more else None
     db.session.commit()
     
-    return jsonify([msg.to_dict() for msg in messages]), 200
+    if marked:
+        notifications.publish_unread(current_user)
+    
+    return page_response(page, next_key), 200
 
 
 @api.route('/messages/conversation/<int:conversation_id>/reply', methods=['POST'])
@@ -790,40 +1129,38 @@ def reply_to_conversation(current_user, conversation_id):
     if not data.get('message_text'):
         return jsonify({'message': 'Message text required'}), 400
     
-    # Get the original message
-    original_message = Message.query.get(conversation_id)
+    conversation = Conversation.query.get(conversation_id)
     
-    if not original_message:
+    if not conversation:
         return jsonify({'message': 'Conversation not found'}), 404
     
+    if not in_conversation(current_user, conversation):
+        return jsonify({'message': 'Unauthorized'}), 403
+    
     # Students reply to employers
     if current_user.user_type == 'student':
-        if original_message.sender_id != current_user.student_profile.id:
-            return jsonify({'message': 'Unauthorized'}), 403
-        
         reply = Message(
-            sender_id=current_user.student_profile.id,
-            recipient_id=original_message.recipient_id,
-            subject=original_message.subject,
+            sender_id=conversation.student_id,
+            recipient_id=conversation.employer_id,
+            subject=conversation.subject,
             message_text=data['message_text']
         )
     
     # Employers reply to students
     else:
-        if original_message.recipient_id != current_user.employer_profile.id:
-            return jsonify({'message': 'Unauthorized'}), 403
-        
         # Create employer → student message
         reply = Message(
-            employer_sender_id=current_user.employer_profile.id,
-            student_recipient_id=original_message.sender_id,
-            subject=original_message.subject,
+            employer_sender_id=conversation.employer_id,
+            student_recipient_id=conversation.student_id,
+            subject=conversation.subject,
             message_text=data['message_text']
         )
     
-    db.session.add(reply)
+    Conversation.record_message(reply)
     db.session.commit()
     
+    notifications.publish_message(conversation, reply)
+    
     return jsonify({
         'message': 'Reply sent successfully',
         'data': reply.to_dict()
@@ -845,20 +1182,15 @@ def manage_messages(current_user):
     
     data = request.get_json()
     
-    print(f"📥 Received message data: {data}")
-    
     if not data.get('recipient_id') or not data.get('message_text'):
         return jsonify({'message': 'Recipient and message text required'}), 400
     
     # Check if recipient exists
     recipient = EmployerProfile.query.get(data['recipient_id'])
     if not recipient:
-        print(f"❌ Recipient {data['recipient_id']} not found")
         return jsonify({'message': 'Recipient not found'}), 404
     
-    print(f"✅ Creating message from student {current_user.student_profile.id} to employer {recipient.id}")
-    
-    # Create new message (no conversation_id field)
+    # record_message files it in the pair's conversation, creating that on a first message
     message = Message(
         sender_id=current_user.student_profile.id,
         recipient_id=data['recipient_id'],
@@ -866,32 +1198,91 @@ def manage_messages(current_user):
         message_text=data['message_text']
     )
     
-    db.session.add(message)
+    conversation = Conversation.record_message(message)
     db.session.commit()
     
-    print(f"✅ Message {message.id} created successfully")
+    notifications.publish_message(conversation, message)
     
     return jsonify({
         'message': 'Message sent successfully',
-        'data': message.to_dict()
+        'data': message.to_dict(),
+        'conversation_id': conversation.id
     }), 201
 
 
 @api.route('/messages/unread-count', methods=['GET'])
 @token_required
 def get_unread_count(current_user):
-    """Get count of unread messages"""
+    """Get count of unread messages, summed from the conversations' counters"""
     if current_user.user_type == 'employer':
-        count = Message.query.filter_by(
-            recipient_id=current_user.employer_profile.id,
-            is_read=False
-        ).count()
+        count = Conversation.unread_count('employer', current_user.employer_profile.id)
     else:
-        # Students don't receive messages yet (only send)
-        count = 0
+        # Employer replies the student has not read yet
+        count = Conversation.unread_count('student', current_user.student_profile.id)
     
     return jsonify({'unread_count': count}), 200
 
+
+@api.route('/stream/token', methods=['POST'])
+@token_required
+def get_stream_token(current_user):
+    """
+    A token that only opens the current user's stream, once and only for
+    notifications.TOKEN_SECONDS, for EventSource to send as ?token=
+    """
+    token = jwt.encode({
+        'user_id': current_user.id,
+        'scope': 'stream',
+        'jti': uuid.uuid4().hex,
+        'exp': datetime.utcnow() + timedelta(seconds=notifications.TOKEN_SECONDS)
+    }, SECRET_KEY, algorithm='HS256')
+    
+    return jsonify({'token': token, 'expires_in': notifications.TOKEN_SECONDS}), 200
+
+
+@api.route('/stream', methods=['GET'])
+def stream():
+    """
+    Server-Sent Events stream of new messages, unread counts and RSVP changes
+    for the current user (see notifications.py).
+    
+    EventSource cannot send an Authorization header, so browsers give a
+    short-lived, single-use stream token from POST /stream/token as ?token=
+    instead of their login token, which would end up in server and proxy
+    logs, where it could be replayed. A client
+    that reconnects sends Last-Event-ID (or ?last_event_id=) to be sent what
+    it missed.
+    """
+    # A stream holds its thread until the client goes away (see notifications.py)
+    if not request.environ.get('wsgi.multithread'):
+        return jsonify({'message': 'Live updates need a threaded or gevent worker'}), 503
+    
+    header, query_token = request.headers.get('Authorization'), request.args.get('token')
+    
+    if not header and not query_token:
+        return jsonify({'message': 'Token is missing'}), 401
+    
+    try:
+        current_user = get_token_user(header) if header else get_token_user(query_token, scope='stream')
+        
+        if not current_user:
+            return jsonify({'message': 'Invalid token'}), 401
+            
+    except Exception as e:
+        return jsonify({'message': 'Token is invalid', 'error': str(e)}), 401
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    subscription = notifications.open_stream(current_user, last_event_id)
+    
+    if subscription is None:
+        return jsonify({'message': 'Too many live connections, try again later'}), 503, {'Retry-After': '30'}
+    
+    # The database session is released when the request ends; streaming does not need it
+    return Response(subscription, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Stop nginx from buffering the stream
+    })
+
 @api.route('/events/<int:event_id>/rsvp/status', methods=['GET'])
 @token_required
 def check_rsvp_status(current_user, event_id):
@@ -949,9 +1340,20 @@ def student_profile(current_user):
         for skill in data['skills']:
             new_skill = StudentSkill(student_id=profile.id, skill_name=skill)
             db.session.add(new_skill)
+        
+        IndexGeneration.bump('skills', profile.id)
+    
+    interests_changed = 'skills' in data or 'job_preferences' in data
+    if interests_changed:
+        profile.refresh_interests()
+        IndexGeneration.bump('interests', profile.id)
     
     db.session.commit()
     
+    # Re-index only this student's skills for candidate search, and re-rank their recommendations
+    if interests_changed:
+        request_sync()
+    
     print(f"✅ Profile updated successfully")
     
     return jsonify({
@@ -962,19 +1364,22 @@ def student_profile(current_user):
 @api.route('/events/personalized', methods=['GET'])
 @token_required
 def get_personalized_events_route(current_user):
-    """Get personalized event recommendations for student"""
+    """Get personalized event recommendations for student, a page at a time"""
     if current_user.user_type != 'student':
         return jsonify({'message': 'Only students can get personalized recommendations'}), 403
     
-    from topological_sort import get_personalized_events
+    from ranking_engine import interest_engine
     
-    # Get all events
-    events = Event.query.all()
+    try:
+        limit, key = get_page_args(int, datetime, int)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     
-    # Get personalized recommendations
-    personalized = get_personalized_events(events, current_user.student_profile)
+    # Rank all events; only the page is loaded
+    page, more = interest_engine.rank(current_user.student_profile, limit, key)
     
-    return jsonify([event.to_dict() for event in personalized]), 200
+    personalized = Event.list_by_ids([event_id for (_, _, event_id), _ in page])
+    return page_response(Event.serialize_list(personalized), page[-1][0] if more else None), 200
 
 @api.route('/events/recommendations', methods=['GET'])
 @token_required
@@ -983,32 +1388,18 @@ def get_top_recommendations(current_user):
     if current_user.user_type != 'student':
         return jsonify({'message': 'Only students can get recommendations'}), 403
     
-    from topological_sort import get_personalized_events
-    
-    # Get all events
-    events = Event.query.all()
+    from recommendations import get_recommendations
     
-    # Get top 2 personalized recommendations
-    personalized = get_personalized_events(events, current_user.student_profile, limit=2)
+    # Top 2 personalized recommendations, from the student's stored ranking
+    recommended = get_recommendations(current_user.student_profile, 2)
+    personalized = Event.list_by_ids([event_id for event_id, _ in recommended])
+    explanations = dict(recommended)
     
-    # Calculate match percentage for each event
+    # The match percentage comes with each event's score explanation
     result = []
-    student_skills = set(skill.skill_name.lower() for skill in current_user.student_profile.skills)
-    student_prefs = set(pref.lower() for pref in (current_user.student_profile.job_preferences.split(',') if current_user.student_profile.job_preferences else []))
-    student_interests = student_skills | student_prefs
-    
     for event in personalized:
-        event_tags = set(tag.lower().strip() for tag in (event.tags.split(',') if event.tags else []))
-        matches = student_interests & event_tags
-        
-        # Calculate match percentage
-        if student_interests:
-            match_percentage = min(100, int((len(matches) / len(student_interests)) * 100) + 50)  # Start at 50% minimum
-        else:
-            match_percentage = 75  # Default if no preferences
-        
         event_dict = event.to_dict()
-        event_dict['match_percentage'] = match_percentage
+        event_dict['match_percentage'] = explanations[event.id]['match_percentage']
         result.append(event_dict)
     
     return jsonify(result), 200
@@ -0,0 +1,273 @@
+"""
+Search Response Cache for CareerConnect
+=======================================
+
+The search bar calls /search/autocomplete on every keystroke, so the same
+hot prefixes ("s", "so", "sof") are recomputed over and over. Serialized
+responses of the search endpoints are kept in an LRU cache, bounded both
+by entry count and by total bytes.
+
+Entries are keyed by (endpoint, normalized query, other arguments, index
+generations). The generations are the 'events', 'scores' and 'companies'
+ones this worker's in-memory indexes reflect (see index_sync), the only
+ones search responses depend on: autocomplete ranks events by RSVP count
+and /search shows it, so an RSVP moves lookups to a new key just as a
+change to an event or company does, and old entries simply age out of the
+LRU. Skills and interests leave cached responses in place.
+
+Requests are also appended to a query log, moved aside to <log>.1 once it
+grows past QUERY_LOG_MAX_BYTES. The most frequent requests are replayed to
+pre-warm the cache at boot and, on a thread of its own, at most every
+PREWARM_INTERVAL seconds after events, RSVPs or companies change.
+"""
+
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import wraps
+from urllib.parse import urlencode, parse_qsl
+
+from flask import current_app, request, make_response
+
+MAX_ENTRIES = int(os.environ.get('SEARCH_CACHE_ENTRIES', '10000'))
+MAX_BYTES = int(os.environ.get('SEARCH_CACHE_BYTES', str(32 * 1024 * 1024)))
+
+# Index generations cached responses are keyed by (see index_sync)
+CACHE_GENERATIONS = ('events', 'scores', 'companies')
+
+QUERY_LOG_FILENAME = 'search_queries.log'
+QUERY_LOG_MAX_BYTES = int(os.environ.get('SEARCH_QUERY_LOG_BYTES', str(16 * 1024 * 1024)))
+PREWARM_TOP = int(os.environ.get('SEARCH_PREWARM_TOP', '100'))
+
+# Seconds between pre-warms after index changes, so a burst of writes is pre-warmed for once
+PREWARM_INTERVAL = float(os.environ.get('SEARCH_PREWARM_INTERVAL', '5'))
+
+# Only the end of a long query log is read at boot, and distinct queries
+# counted in memory are trimmed back to the most frequent ones
+QUERY_LOG_TAIL_BYTES = 1024 * 1024
+MAX_LOGGED_QUERIES = 50000
+
+# Set in the WSGI environ of pre-warm requests so they are not logged again
+PREWARM_ENVIRON_KEY = 'careerconnect.search_prewarm'
+
+
+class ResponseCache:
+    """Thread-safe LRU of serialized response bodies, bounded by entries and bytes"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> body bytes, least recently used first
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            body = self.entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+
+            self.entries[key] = body
+            self.size += len(body)
+
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'evictions': self.evictions,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
+
+
+class QueryLog:
+    """Size-capped log of search requests, with in-memory counts for pre-warming"""
+
+    def __init__(self):
+        self.path = None
+        self.file = None
+        self.counts = Counter()  # (path, query string) -> times requested
+        self.lock = threading.Lock()
+
+    def open(self, path):
+        """Start logging to path, counting the requests already recorded at its end"""
+        with self.lock:
+            self.path = path
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+            if os.path.exists(path):
+                start = max(0, os.path.getsize(path) - QUERY_LOG_TAIL_BYTES)
+                with open(path, 'rb') as f:
+                    f.seek(start)
+                    lines = f.read().decode('utf-8', errors='ignore').splitlines()
+
+                # Reading from the middle of the file starts with a partial line
+                for line in lines[1:] if start else lines:
+                    logged_path, _, query_string = line.partition('\t')
+                    if logged_path:
+                        self.counts[(logged_path, query_string)] += 1
+
+    def record(self, path, query_string):
+        with self.lock:
+            self.counts[(path, query_string)] += 1
+            if len(self.counts) > MAX_LOGGED_QUERIES:
+                self.counts = Counter(dict(self.counts.most_common(MAX_LOGGED_QUERIES // 2)))
+
+            if self.path is None:
+                return
+            try:
+                if self.file is None:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    self.file = open(self.path, 'a', buffering=1, encoding='utf-8')
+                self.file.write(f"{path}\t{query_string}\n")
+                if self.file.tell() > QUERY_LOG_MAX_BYTES:
+                    self.rotate()
+            except OSError as e:
+                print(f"⚠️  Could not write search query log: {e}")
+                self.path = None
+
+    def rotate(self):
+        """Move the full log aside to <path>.1, replacing the previous one, and start a new one"""
+        self.file.close()
+        self.file = None
+
+        # Every worker process appends to the log: another may have rotated it already
+        try:
+            if os.path.getsize(self.path) > QUERY_LOG_MAX_BYTES:
+                os.replace(self.path, f"{self.path}.1")
+        except FileNotFoundError:
+            pass
+
+    def top(self, n):
+        """The n most frequent (path, query string) pairs"""
+        with self.lock:
+            return [request for request, _ in self.counts.most_common(n)]
+
+
+response_cache = ResponseCache()
+query_log = QueryLog()
+
+
+def get_query_log_path():
+    """Query log location: $SEARCH_QUERY_LOG or the Flask instance folder"""
+    return os.environ.get('SEARCH_QUERY_LOG') or os.path.join(current_app.instance_path, QUERY_LOG_FILENAME)
+
+
+def normalize_query(query):
+    """Lower-case with whitespace collapsed, so trivially different spellings share an entry"""
+    return ' '.join(query.lower().split())
+
+
+def get_request_query_string():
+    """The current request's arguments, sorted, with q normalized"""
+    args = []
+    for name, value in sorted(request.args.items(multi=True)):
+        args.append((name, normalize_query(value) if name == 'q' else value))
+    return urlencode(args)
+
+
+def cached_response(f):
+    """Serve a search endpoint from the response cache, filling it on a miss"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        from index_sync import applied_generations
+
+        query_string = get_request_query_string()
+        if not request.environ.get(PREWARM_ENVIRON_KEY):
+            query_log.record(request.path, query_string)
+
+        generations = tuple(applied_generations.get(name, 0) for name in CACHE_GENERATIONS) if applied_generations else None
+        key = (request.path, query_string, generations)
+
+        body = response_cache.get(key)
+        if body is not None:
+            return current_app.response_class(body, mimetype='application/json')
+
+        response = make_response(f(*args, **kwargs))
+        if response.status_code == 200:
+            response_cache.put(key, response.get_data())
+        return response
+
+    return decorated
+
+
+def prewarm(app, top=PREWARM_TOP):
+    """Compute the cache entries for the most frequent logged requests; returns how many ran"""
+    requests = query_log.top(top)
+
+    for path, query_string in requests:
+        with app.test_request_context(path, query_string=parse_qsl(query_string),
+                                      environ_overrides={PREWARM_ENVIRON_KEY: True}):
+            try:
+                app.full_dispatch_request()
+            except Exception as e:
+                print(f"⚠️  Could not pre-warm {path}?{query_string}: {e}")
+
+    return len(requests)
+
+
+prewarm_requested = threading.Event()
+prewarm_worker = None
+prewarm_lock = threading.Lock()
+
+
+def request_prewarm(app):
+    """Ask the pre-warm thread to refill the cache after an index change; returns at once"""
+    global prewarm_worker
+
+    with prewarm_lock:
+        # Threads do not survive a fork, so a forked worker process starts its own
+        if prewarm_worker is None or not prewarm_worker.is_alive():
+            prewarm_worker = threading.Thread(target=run_prewarm_worker, args=(app,), name='search-prewarm',
+                                              daemon=True)
+            prewarm_worker.start()
+
+    prewarm_requested.set()
+
+
+def run_prewarm_worker(app):
+    while True:
+        prewarm_requested.wait()
+        # Changes made meanwhile are covered by this pre-warm
+        time.sleep(PREWARM_INTERVAL)
+        prewarm_requested.clear()
+
+        try:
+            prewarm(app)
+        except Exception as e:
+            print(f"⚠️  Search cache pre-warm failed: {e}")
@@ -0,0 +1,347 @@
+"""
+Tag Bitset Index for CareerConnect
+==================================
+
+The browse and personalized feeds score every event against a student's
+skills and job preferences. Rather than re-splitting each event's tags into
+sets on every request, this index gives every event a slot and keeps, for
+each tag, a bitset (a Python int) of the slots of the events carrying it.
+
+Scoring a student is then a handful of big-int operations over all events
+at once: the student's weighted bitsets are summed into a bit-sliced
+counter (slice i holds bit i of every event's score), from which the events
+are pulled out one score level at a time (see ranked_page).
+
+Slots are laid out in (event_date, id) order when the index is built, so
+within a level the events come out of the bitset already in feed order.
+Events written later get new slots past that sorted region and are merged
+in by key; once there are too many, the index is compacted back into order.
+Slots are never reused in a live index, so a reader holding a bitset never
+sees a slot change events.
+
+A slot's bits are all set before it goes live, and are never cleared: a
+re-indexed event moves to a new slot, leaving the old one in the same
+assignment, and a removed event's slot just stops being live. So a reader
+that reads the live bitset before the others scores every event it finds as
+of one moment (see ranked_page). Slots no longer live are dropped when the
+index is compacted.
+
+Title words and employers have too many distinct values for a bitset each,
+so they keep slot arrays that are turned into bitsets on first use and
+cached until the array is replaced.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+# Unsorted slots (events written since the layout) tolerated before compacting
+COMPACT_TAIL = 1024
+
+# Cached title word / employer bitsets kept before the cache is cleared
+MAX_CACHED_BITSETS = 4096
+
+
+def iter_bits(bits, offset=0):
+    """Positions of the set bits of bits, lowest first, plus offset"""
+    while bits:
+        position = (bits & -bits).bit_length() - 1
+        yield offset + position
+        bits >>= position + 1
+        offset += position + 1
+
+
+def bitset_from_slots(slots):
+    bitset = bytearray((max(slots) >> 3) + 1)
+    for slot in slots:
+        bitset[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(bitset, 'little')
+
+
+def score_levels(slices, mask):
+    """(score, bitset) of each distinct score within mask, highest first"""
+    def split(bits, i, score):
+        if i < 0:
+            yield score, bits
+            return
+        high = bits & slices[i]
+        if high:
+            yield from split(high, i - 1, score | (1 << i))
+        low = bits & ~slices[i]
+        if low:
+            yield from split(low, i - 1, score)
+
+    if mask:
+        yield from split(mask, len(slices) - 1, 0)
+
+
+class TagIndex:
+    def __init__(self, copy_on_write=False):
+        self.copy_on_write = copy_on_write
+        self.event_ids = array('I')  # slot -> event ID
+        self.dates = []  # slot -> event_date
+        self.sorted_keys = []  # (event_date, event ID) of the slots laid out in order, ascending
+        self.slots = {}  # event ID -> slot
+        self.live = 0  # bitset of the slots holding a current event
+        self.tag_bits = {}  # lower-cased tag -> bitset of slots
+        self.title_slots = {}  # lower-cased title word -> array('I') of slots
+        self.employer_slots = {}  # employer ID -> array('I') of slots
+        self.employers = {}  # employer ID -> (lower-cased company name, lower-cased industry)
+        self.event_terms = {}  # event ID -> (tags, title words, employer ID), so an event can be removed
+        self.bits_cache = {}  # (kind, name) -> (slot array, its bitset)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['bits_cache'] = {}
+        return state
+
+    def add(self, event_id, event_date, employer_id, tags, title_words):
+        """Index (or re-index) an event; returns False if it was already indexed as is"""
+        terms = (frozenset(tags), frozenset(title_words), employer_id)
+        old_slot = self.slots.get(event_id)
+        if old_slot is not None and self.dates[old_slot] == event_date and self.event_terms[event_id] == terms:
+            return False
+
+        slot = len(self.event_ids)
+        bit = 1 << slot
+        self.event_ids.append(event_id)
+        self.dates.append(event_date)
+
+        # A private index gets its tag bitsets in seal(), rather than regrowing an int per event
+        if self.copy_on_write:
+            for tag in terms[0]:
+                self.tag_bits[tag] = self.tag_bits.get(tag, 0) | bit
+        for word in terms[1]:
+            self._add_slot(self.title_slots, word, slot)
+        self._add_slot(self.employer_slots, employer_id, slot)
+
+        self.event_terms[event_id] = terms
+        self.slots[event_id] = slot
+        # Live last: readers mask every bitset with it. A re-indexed event moves to its new
+        # slot in this one assignment, so readers never miss it, or find it twice
+        live = self.live | bit
+        self.live = live & ~(1 << old_slot) if old_slot is not None else live
+        return True
+
+    def remove(self, event_id):
+        """Drop an event from the index"""
+        slot = self.slots.pop(event_id, None)
+        if slot is None:
+            return
+
+        del self.event_terms[event_id]
+        # Its bits stay until the index is compacted, for readers holding an older live bitset
+        self.live &= ~(1 << slot)
+
+    def _add_slot(self, mapping, name, slot):
+        slots = mapping.get(name)
+        if slots is None:
+            mapping[name] = array('I', [slot])
+        elif self.copy_on_write:
+            mapping[name] = slots + array('I', [slot])
+        else:
+            slots.append(slot)
+
+    def set_employer(self, employer_id, company_name, industry):
+        """Record an employer's name and industry; returns True if a known employer's changed"""
+        text = ((company_name or '').lower(), (industry or '').lower())
+        previous = self.employers.get(employer_id)
+        # Replaced rather than modified once published, since readers iterate it
+        if self.copy_on_write:
+            self.employers = {**self.employers, employer_id: text}
+        else:
+            self.employers[employer_id] = text
+        return previous is not None and previous != text
+
+    def remove_employer(self, employer_id):
+        if employer_id in self.employers:
+            self.employers = {other: text for other, text in self.employers.items() if other != employer_id}
+
+    def needs_compaction(self):
+        """Whether too many slots are out of order, or no longer live"""
+        slots = len(self.event_ids)
+        return max(slots - len(self.sorted_keys), slots - len(self.slots)) > COMPACT_TAIL
+
+    def seal(self):
+        """
+        Mark every slot so far as laid out in (event_date, id) order and
+        make the tag bitsets. A private index must be sealed before use.
+        """
+        self.sorted_keys = list(zip(self.dates, self.event_ids))
+
+        tag_slots = defaultdict(list)
+        for event_id, slot in self.slots.items():
+            for tag in self.event_terms[event_id][0]:
+                tag_slots[tag].append(slot)
+        self.tag_bits = {tag: bitset_from_slots(slots) for tag, slots in tag_slots.items()}
+
+    def compacted(self):
+        """A copy of the index with its current events laid out in order again"""
+        index = TagIndex()
+        for _, event_id in sorted((self.dates[slot], event_id) for event_id, slot in self.slots.items()):
+            tags, title_words, employer_id = self.event_terms[event_id]
+            index.add(event_id, self.dates[self.slots[event_id]], employer_id, tags, title_words)
+        index.seal()
+        index.employers = dict(self.employers)
+        index.copy_on_write = True
+        return index
+
+    def tag_bitset(self, tag):
+        return self.tag_bits.get(tag, 0)
+
+    def title_bitset(self, word):
+        return self._slot_bitset('title', self.title_slots, word)
+
+    def employer_bitset(self, employer_id):
+        return self._slot_bitset('employer', self.employer_slots, employer_id)
+
+    def _slot_bitset(self, kind, mapping, name):
+        slots = mapping.get(name)
+        if not slots:
+            return 0
+
+        # Arrays are replaced, not modified, once published: the same array means the same bitset
+        cached = self.bits_cache.get((kind, name))
+        if cached is not None and cached[0] is slots:
+            return cached[1]
+
+        bits = bitset_from_slots(slots)
+        if len(self.bits_cache) >= MAX_CACHED_BITSETS:
+            self.bits_cache.clear()
+        self.bits_cache[(kind, name)] = (slots, bits)
+        return bits
+
+    @staticmethod
+    def score(weighted_bitsets):
+        """
+        Sum weight * bitset over (bitset, weight) pairs into bit slices:
+        slice i holds bit i of every slot's score.
+        """
+        slices = []
+        for bits, weight in weighted_bitsets:
+            position = 0
+            while weight:
+                if weight & 1:
+                    # Ripple-carry add of bits << position across all slots at once
+                    carry, i = bits, position
+                    while carry:
+                        if i >= len(slices):
+                            slices.extend([0] * (i + 1 - len(slices)))
+                        slices[i], carry = slices[i] ^ carry, slices[i] & carry
+                        i += 1
+                weight >>= 1
+                position += 1
+        return slices
+
+    def ranked_page(self, weighted_bitsets, limit, key=None, since=None, live=None):
+        """
+        One page of events ranked by score, highest first, then by
+        (event_date, id), starting after key.
+
+        weighted_bitsets are (bitset, weight) pairs giving each event's score
+        (see score); since, if given, drops events dated before it. live is
+        the index's live bitset read before weighted_bitsets were, so events
+        written meanwhile are left out rather than part-scored. Returns
+        ([(-score, event_date, event ID), ...], whether more events follow);
+        each tuple is also the key of the next page.
+        """
+        slices = self.score(weighted_bitsets)
+        sorted_keys, dates, event_ids = self.sorted_keys, self.dates, self.event_ids
+        sorted_end = len(sorted_keys)
+        sorted_mask = (1 << sorted_end) - 1
+
+        start = bisect_left(sorted_keys, (since, 0)) if since is not None else 0
+        mask = (self.live if live is None else live) >> start << start
+
+        page = []
+        for score, level in score_levels(slices, mask):
+            if key is not None and -score < key[0]:
+                continue
+            after = key[1:] if key is not None and -score == key[0] else None
+            need = limit + 1 - len(page)
+
+            # Laid-out slots come out in order: only the first `need` are looked at
+            level_start = bisect_right(sorted_keys, after) if after is not None else 0
+            candidates = []
+            for slot in iter_bits((level & sorted_mask) >> level_start, level_start):
+                candidates.append((dates[slot], event_ids[slot]))
+                if len(candidates) == need:
+                    break
+
+            for slot in iter_bits(level >> sorted_end, sorted_end):
+                candidate = (dates[slot], event_ids[slot])
+                if (since is None or candidate[0] >= since) and (after is None or candidate > after):
+                    candidates.append(candidate)
+
+            for event_date, event_id in heapq.nsmallest(need, candidates):
+                page.append((-score, event_date, event_id))
+            if len(page) > limit:
+                break
+
+        return page[:limit], len(page) > limit
+
+
+# Global index; copy-on-write since request threads read it while the index worker writes
+event_tag_index = TagIndex(copy_on_write=True)
+
+
+def get_event_terms(event):
+    """An event's lower-cased tags and title words, as the feeds match them"""
+    tags = {tag.strip().lower() for tag in event.tags.split(',')} if event.tags else set()
+    return tags, set(event.title.lower().split())
+
+
+def index_event(event):
+    """
+    Add (or re-add) a single event, compacting the index once enough events are out of order.
+
+    Returns False if the event's date, tags, title and employer are unchanged.
+    """
+    global event_tag_index
+
+    tags, title_words = get_event_terms(event)
+    changed = event_tag_index.add(event.id, event.event_date, event.employer_id, tags, title_words)
+
+    if event_tag_index.needs_compaction():
+        event_tag_index = event_tag_index.compacted()
+    return changed
+
+
+def unindex_event(event_id):
+    global event_tag_index
+
+    event_tag_index.remove(event_id)
+    if event_tag_index.needs_compaction():
+        event_tag_index = event_tag_index.compacted()
+
+
+def index_company(employer):
+    """Record an employer's name and industry; returns True if they changed"""
+    return event_tag_index.set_employer(employer.id, employer.company_name, employer.industry)
+
+
+def unindex_company(employer_id):
+    event_tag_index.remove_employer(employer_id)
+
+
+def build_tag_index():
+    """Build/rebuild the event tag index"""
+    from models import Event, EmployerProfile
+
+    global event_tag_index
+
+    index = TagIndex()
+    for event in Event.query.order_by(Event.event_date, Event.id).all():
+        tags, title_words = get_event_terms(event)
+        index.add(event.id, event.event_date, event.employer_id, tags, title_words)
+    index.seal()
+
+    for employer in EmployerProfile.query.all():
+        index.set_employer(employer.id, employer.company_name, employer.industry)
+
+    # Publish with a single reference swap, so readers never see a half-built index
+    index.copy_on_write = True
+    event_tag_index = index
+
+    print(f"✅ Tag index built ({len(index.slots)} events, {len(index.tag_bits)} tags)")
@@ -0,0 +1,81 @@
+"""
+The tests run the backend against a throwaway SQLite database, search
+snapshot and query log, set up here before anything imports the app.
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+TEST_DIR = tempfile.mkdtemp(prefix='careerconnect-tests-')
+TEST_ENV = {
+    'DATABASE_URL': 'sqlite:///' + os.path.join(TEST_DIR, 'test.db'),
+    'SEARCH_SNAPSHOT_PATH': os.path.join(TEST_DIR, 'search_index.snapshot'),
+    'SEARCH_QUERY_LOG': os.path.join(TEST_DIR, 'search_queries.log'),
+    'INDEX_SYNC_INTERVAL': '0',
+}
+os.environ.update(TEST_ENV)
+
+
+def quiet():
+    """Hide what the app and routes print"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+@pytest.fixture(scope='session', autouse=True)
+def test_dir():
+    yield TEST_DIR
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def app():
+    with quiet():
+        from app import app
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def register(client):
+    """register(user_type, **fields) signs a new user up; returns (token, user)"""
+    registered = []
+
+    def register(user_type, **fields):
+        registered.append(None)
+        email = f"{user_type}{len(registered)}-{os.urandom(4).hex()}@example.com"
+        with quiet():
+            response = client.post('/api/auth/register', json={
+                'email': email, 'password': 'password', 'user_type': user_type, **fields
+            })
+        assert response.status_code == 201, response.get_json()
+        data = response.get_json()
+        return data['token'], data['user']
+
+    return register
+
+
+def auth(token):
+    return {'Authorization': f"Bearer {token}"}
+
+
+def profile_id(app, user):
+    """The student or employer profile ID of a registered user"""
+    from models import db, User
+
+    with app.app_context():
+        account = db.session.get(User, user['id'])
+        profile = account.student_profile if account.user_type == 'student' else account.employer_profile
+        return profile.id
@@ -0,0 +1,59 @@
+"""
+A second app process for test_index_sync.py, sharing the test database.
+
+Reads one JSON query per line on stdin - {"words": ..., "text": ...,
+"tag": ...} - catches its indexes up with the database as a worker does
+(request_sync, then wait_for_sync), and answers on stdout with the event
+IDs its event trie, full-text index and tag index return for them, and
+the indexes it had to rebuild since the last query.
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# What the app prints goes to stderr, keeping stdout for answers
+answers, sys.stdout = sys.stdout, sys.stderr
+
+from app import app  # noqa: E402
+import fulltext  # noqa: E402
+import index_sync  # noqa: E402
+import query_engine  # noqa: E402
+import tag_index  # noqa: E402
+import trie  # noqa: E402
+
+rebuilt = []
+
+
+def recording(name, rebuild):
+    def rebuild_and_record():
+        rebuilt.append(name)
+        rebuild()
+    return rebuild_and_record
+
+
+index_sync.REBUILDERS = {name: recording(name, rebuild) for name, rebuild in index_sync.REBUILDERS.items()}
+
+
+def answer(query):
+    with app.app_context():
+        index_sync.request_sync()
+    index_sync.wait_for_sync()
+
+    index = tag_index.event_tag_index
+    tagged = index.tag_bitset(query['tag'].lower()) & index.live
+    result = {
+        'trie': sorted(event_id for event_id, _ in query_engine.search(trie.event_trie, query['words'])),
+        'fulltext': sorted(event_id for event_id, _ in fulltext.event_text_index.search(query['text'], k=100)),
+        'tags': sorted(index.event_ids[slot] for slot in tag_index.iter_bits(tagged)),
+        'rebuilt': list(rebuilt),
+    }
+    rebuilt.clear()
+    return result
+
+
+print(json.dumps({'ready': True}), file=answers, flush=True)
+for line in sys.stdin:
+    print(json.dumps(answer(json.loads(line))), file=answers, flush=True)
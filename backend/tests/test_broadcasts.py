@@ -0,0 +1,120 @@
+"""
+Broadcasts are sent in batches by a background worker, and a failed or
+interrupted one carries on after its last committed batch (see
+broadcasts.py). Each applicant must get the message exactly once.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import broadcasts
+import notifications
+from conftest import auth, quiet
+from models import db, Broadcast, Message
+
+APPLICANTS = 5
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(broadcasts, 'BATCH_SIZE', 2)
+
+
+@pytest.fixture
+def event_with_applicants(client, register):
+    """(employer token, event ID, student profile IDs of its applicants)"""
+    employer_token, _ = register('employer', company_name='Broadcast Co')
+    with quiet():
+        event_id = client.post('/api/events', headers=auth(employer_token), json={
+            'title': 'Broadcast Fair', 'event_date': '2035-01-01T10:00:00'
+        }).get_json()['event']['id']
+
+    for number in range(APPLICANTS):
+        student_token, _ = register('student', full_name=f"Applicant {number}")
+        with quiet():
+            assert client.post(f"/api/events/{event_id}/rsvp", headers=auth(student_token)).status_code == 201
+    return employer_token, event_id
+
+
+def start_broadcast(client, employer_token, event_id, text):
+    with quiet():
+        response = client.post(f"/api/events/{event_id}/broadcast", headers=auth(employer_token),
+                               json={'message_text': text})
+    assert response.status_code == 202, response.get_json()
+    return response.get_json()['broadcast']['id']
+
+
+def broadcast_state(app, broadcast_id, text):
+    """(status, sent, total, messages per recipient)"""
+    with app.app_context():
+        broadcast = db.session.get(Broadcast, broadcast_id)
+        recipients = [recipient for recipient, in db.session.query(Message.student_recipient_id)
+                      .filter(Message.message_text == text)]
+        return broadcast.status, broadcast.sent, broadcast.total, \
+            sorted(recipients.count(recipient) for recipient in set(recipients))
+
+
+def test_broadcast_messages_every_applicant_once(app, client, small_batches, event_with_applicants):
+    employer_token, event_id = event_with_applicants
+    broadcast_id = start_broadcast(client, employer_token, event_id, 'Doors open at 9')
+    with quiet():
+        broadcasts.wait_for_broadcasts()
+
+    assert broadcast_state(app, broadcast_id, 'Doors open at 9') == ('sent', APPLICANTS, APPLICANTS, [1] * APPLICANTS)
+
+
+def fail_after_batches(monkeypatch, batches):
+    """Make the worker fail once, after committing the given number of batches"""
+    publish = notifications.publish_broadcast
+    published = []
+
+    def publish_then_fail(broadcast, message_ids=()):
+        publish(broadcast, message_ids)
+        if message_ids:
+            published.append(message_ids)
+            if len(published) == batches:
+                raise RuntimeError('worker lost')
+
+    monkeypatch.setattr(notifications, 'publish_broadcast', publish_then_fail)
+
+
+def test_retry_carries_on_after_the_last_batch(app, client, monkeypatch, small_batches, event_with_applicants):
+    employer_token, event_id = event_with_applicants
+    fail_after_batches(monkeypatch, 2)
+    broadcast_id = start_broadcast(client, employer_token, event_id, 'Bring your CV')
+    with quiet():
+        broadcasts.wait_for_broadcasts()
+
+    status, sent, total, _ = broadcast_state(app, broadcast_id, 'Bring your CV')
+    assert (status, sent, total) == ('failed', 4, APPLICANTS)
+
+    # Only a failed broadcast can be retried, and the retry sends the rest
+    retry = f"/api/events/{event_id}/broadcast/{broadcast_id}/retry"
+    with quiet():
+        assert client.post(retry, headers=auth(employer_token)).status_code == 202
+        broadcasts.wait_for_broadcasts()
+        assert client.post(retry, headers=auth(employer_token)).status_code == 409
+
+    assert broadcast_state(app, broadcast_id, 'Bring your CV') == ('sent', APPLICANTS, APPLICANTS, [1] * APPLICANTS)
+
+
+def test_resume_takes_over_an_abandoned_broadcast(app, client, monkeypatch, small_batches, event_with_applicants):
+    employer_token, event_id = event_with_applicants
+    fail_after_batches(monkeypatch, 1)
+    broadcast_id = start_broadcast(client, employer_token, event_id, 'Parking is free')
+    with quiet():
+        broadcasts.wait_for_broadcasts()
+
+    # As a worker that died mid-send leaves it: still sending, heartbeat long gone
+    with app.app_context():
+        broadcast = db.session.get(Broadcast, broadcast_id)
+        broadcast.status = 'sending'
+        broadcast.heartbeat_at = datetime.utcnow() - timedelta(seconds=broadcasts.LEASE_SECONDS + 1)
+        db.session.commit()
+
+        with quiet():
+            assert broadcasts.resume_unsent(app) >= 1
+            broadcasts.wait_for_broadcasts()
+
+    assert broadcast_state(app, broadcast_id, 'Parking is free') == ('sent', APPLICANTS, APPLICANTS, [1] * APPLICANTS)
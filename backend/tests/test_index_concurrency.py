@@ -0,0 +1,135 @@
+"""
+Searches read the copy-on-write indexes (event trie, full-text index, tag
+index) on request threads while the index worker writes them. These tests
+hammer them from several threads at once.
+"""
+
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import fulltext
+import query_engine
+import tag_index
+import trie
+
+STABLE = 50
+READERS = 4
+SECONDS = 2.0
+
+
+def make_event(event_id, title, tags, description, day):
+    return SimpleNamespace(
+        id=event_id, title=title, tags=tags, description=description,
+        event_date=datetime(2030, 1, 1) + timedelta(days=day),
+        employer_id=1, employer=SimpleNamespace(company_name='Acme')
+    )
+
+
+def index_event(event):
+    trie.index_event(event)
+    fulltext.index_event(event)
+    tag_index.index_event(event)
+
+
+def unindex_event(event_id):
+    trie.unindex_event(event_id)
+    fulltext.unindex_event(event_id)
+    tag_index.unindex_event(event_id)
+
+
+@pytest.fixture
+def empty_indexes(monkeypatch):
+    monkeypatch.setattr(trie, 'event_trie', trie.RadixTrie(copy_on_write=True))
+    monkeypatch.setattr(trie, 'event_tokens', {})
+    monkeypatch.setattr(fulltext, 'event_text_index', fulltext.InvertedIndex(copy_on_write=True))
+    monkeypatch.setattr(tag_index, 'event_tag_index', tag_index.TagIndex(copy_on_write=True))
+    # Compact often, so readers also race the swap to a compacted index
+    monkeypatch.setattr(tag_index, 'COMPACT_TAIL', 32)
+
+    # Switch threads far more often than usual, to interleave readers and writer finely
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_readers_never_see_partial_writes(empty_indexes):
+    """
+    Stable events are re-indexed over and over (new title word, date and
+    tags, always keeping 'stable' and the 'python' tag) while other events
+    come and go. Readers must find every stable event, with its full score,
+    in every prefix, full-text and ranked query.
+    """
+    rng = random.Random(7)
+    stable_ids = set(range(1, STABLE + 1))
+    for event_id in stable_ids:
+        index_event(make_event(event_id, f"Stable fair {event_id}", 'Python', 'stable keyword', event_id))
+
+    stop = threading.Event()
+    errors = []
+    reads = []
+
+    def writer():
+        churn, next_id, version = [], 1000, 0
+        try:
+            while not stop.is_set():
+                version += 1
+                event_id = rng.choice(sorted(stable_ids))
+                tags = 'Python, Data' if version % 2 else 'Python, Cloud'
+                index_event(make_event(event_id, f"Stable fair v{version}", tags, f"stable keyword v{version}",
+                                       rng.randrange(365)))
+
+                # Replays batch their full-text writes (see index_sync.catch_up)
+                with fulltext.batch_updates():
+                    next_id += 1
+                    index_event(make_event(next_id, f"Churn meetup {next_id}", 'Java', 'other words', rng.randrange(365)))
+                    churn.append(next_id)
+                    if len(churn) > 40:
+                        unindex_event(churn.pop(rng.randrange(len(churn))))
+        except Exception as e:
+            errors.append(f"writer: {e!r}")
+            stop.set()
+
+    def reader():
+        count = 0
+        try:
+            while not stop.is_set():
+                prefix = set(trie.event_trie.starts_with('stab'))
+                assert stable_ids <= prefix, f"prefix search lost {stable_ids - prefix}"
+
+                matches = {event_id for event_id, _ in query_engine.search(trie.event_trie, 'stable fair')}
+                assert stable_ids <= matches, f"'and' search lost {stable_ids - matches}"
+
+                found = {event_id for event_id, _ in fulltext.event_text_index.search('stable keyword', k=200)}
+                assert found == stable_ids, f"full-text search lost {stable_ids - found}, found {found - stable_ids}"
+
+                index = tag_index.event_tag_index
+                live = index.live
+                page, more = index.ranked_page([(index.tag_bitset('python'), 1)], 500, live=live)
+                event_ids = [event_id for _, _, event_id in page]
+                assert not more and len(event_ids) == len(set(event_ids)), 'ranked an event twice'
+                scored = {event_id for score, _, event_id in page if score == -1}
+                assert scored == stable_ids, f"ranked_page scored {stable_ids ^ scored} wrongly"
+                assert page == sorted(page), 'ranked_page out of order'
+                count += 1
+        except Exception as e:
+            errors.append(f"reader: {e!r}")
+            stop.set()
+        reads.append(count)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(READERS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(SECONDS)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert not errors, errors
+    assert all(reads), reads
@@ -0,0 +1,87 @@
+"""
+Every worker process holds its own search indexes, kept in step through the
+database (see index_sync.py). These tests write through the app in this
+process and check that a second app process, started with sync_worker.py,
+catches up.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import index_sync
+from conftest import BACKEND_DIR, auth, quiet
+
+
+class SyncWorker:
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(BACKEND_DIR, 'tests', 'sync_worker.py')],
+            cwd=BACKEND_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True
+        )
+        assert json.loads(self.process.stdout.readline()) == {'ready': True}
+
+    def query(self, words, text, tag):
+        """What the worker's indexes return after catching up (see sync_worker.py)"""
+        self.process.stdin.write(json.dumps({'words': words, 'text': text, 'tag': tag}) + '\n')
+        self.process.stdin.flush()
+        line = self.process.stdout.readline()
+        assert line, 'sync worker exited'
+        return json.loads(line)
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait(timeout=10)
+
+
+@pytest.fixture
+def sync_worker(app):
+    worker = SyncWorker()
+    yield worker
+    worker.close()
+
+
+def test_second_worker_converges(app, client, register, sync_worker):
+    token, _ = register('employer', company_name='Dirigible Co')
+
+    def write(method, url, **kwargs):
+        with quiet():
+            response = getattr(client, method)(url, headers=auth(token), **kwargs)
+        assert response.status_code in (200, 201), response.get_json()
+        return response.get_json()
+
+    def found(words, text, tag):
+        state = sync_worker.query(words, text, tag)
+        return state['trie'], state['fulltext'], state['tags'], state['rebuilt']
+
+    # A new event, replayed from the change log
+    event_id = write('post', '/api/events', json={
+        'title': 'Zeppelin Workshop', 'description': 'Hydrogen lift', 'tags': ['Airships'],
+        'event_date': '2031-05-01T10:00:00'
+    })['event']['id']
+    assert found('zeppelin', 'hydrogen', 'Airships') == ([event_id], [event_id], [event_id], [])
+
+    # An edit moves it to its new words and tags in every index
+    write('put', f"/api/events/{event_id}", json={
+        'title': 'Blimp Workshop', 'description': 'Helium lift', 'tags': ['Balloons']
+    })
+    assert found('blimp', 'helium', 'Balloons') == ([event_id], [event_id], [event_id], [])
+    assert found('zeppelin', 'hydrogen', 'Airships') == ([], [], [], [])
+
+    # Once the log entries are pruned, the worker can only rebuild
+    second_id = write('post', '/api/events', json={
+        'title': 'Zeppelin Revival', 'description': 'Hydrogen again', 'tags': ['Airships'],
+        'event_date': '2031-06-01T10:00:00'
+    })['event']['id']
+    write('delete', f"/api/events/{event_id}")
+    with app.app_context(), quiet():
+        index_sync.prune_change_log(days=0)
+
+    trie_ids, fulltext_ids, tag_ids, rebuilt = found('zeppelin', 'hydrogen', 'Airships')
+    assert (trie_ids, fulltext_ids, tag_ids) == ([second_id], [second_id], [second_id])
+    assert 'events' in rebuilt
+    assert found('blimp', 'helium', 'Balloons') == ([], [], [], [])
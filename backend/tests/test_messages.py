@@ -0,0 +1,162 @@
+"""
+Conversations keep their latest message, message count and per-side unread
+counters in the row (see Conversation.record_message), so inboxes and
+unread badges are read without counting messages.
+"""
+
+import threading
+
+from sqlalchemy import event
+
+import notifications
+from conftest import auth, profile_id, quiet
+from models import db
+
+
+def send(client, token, employer_profile_id, text):
+    with quiet():
+        response = client.post('/api/messages', headers=auth(token), json={
+            'recipient_id': employer_profile_id, 'subject': 'Question', 'message_text': text
+        })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['conversation_id']
+
+
+def get(client, token, url):
+    with quiet():
+        response = client.get(url, headers=auth(token))
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_conversation_counters_follow_messages(app, client, register):
+    employer_token, employer = register('employer', company_name='Counter Co')
+    employer_id = profile_id(app, employer)
+    students = [register('student', full_name=f"Counter Student {number}")[0] for number in range(3)]
+
+    sent = {}
+    for number, token in enumerate(students):
+        for message in range(number + 1):
+            conversation_id = send(client, token, employer_id, f"Student {number} message {message}")
+            sent[conversation_id] = (message + 1, f"Student {number} message {message}")
+
+    assert get(client, employer_token, '/api/messages/unread-count')['unread_count'] == 6
+
+    conversations = {c['conversation_id']: c for c in get(client, employer_token, '/api/messages/conversations')}
+    assert set(conversations) == set(sent)
+    for conversation_id, (count, last_message) in sent.items():
+        conversation = conversations[conversation_id]
+        assert (conversation['message_count'], conversation['last_message'], conversation['unread_count']) == \
+               (count, last_message, count)
+
+    # The sender has nothing unread
+    student_view = get(client, students[2], '/api/messages/conversations')
+    assert [(c['message_count'], c['unread_count']) for c in student_view] == [(3, 0)]
+    assert get(client, students[2], '/api/messages/unread-count')['unread_count'] == 0
+
+
+def test_concurrent_first_messages_share_a_conversation(app, register):
+    student_token, _ = register('student', full_name='Race Student')
+    _, employer = register('employer', company_name='Race Co')
+    employer_id = profile_id(app, employer)
+
+    # Neither request inserts the conversation until both have looked for it and found none
+    both_looked = threading.Barrier(2, timeout=10)
+
+    def wait_for_both(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO conversations'):
+            both_looked.wait()
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', wait_for_both)
+
+    conversation_ids, errors = [], []
+
+    def first_message(number):
+        try:
+            conversation_ids.append(send(app.test_client(), student_token, employer_id, f"First {number}"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=first_message, args=(number,)) for number in range(2)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        event.remove(engine, 'before_cursor_execute', wait_for_both)
+
+    assert not errors, errors
+    assert not both_looked.broken
+    assert len(conversation_ids) == 2 and conversation_ids[0] == conversation_ids[1]
+
+    conversations = get(app.test_client(), student_token, '/api/messages/conversations')
+    assert len(conversations) == 1 and conversations[0]['message_count'] == 2
+
+
+def test_thread_pages_walk_back_to_the_first_message(app, client, register):
+    student_token, _ = register('student', full_name='Paging Student')
+    employer_token, employer = register('employer', company_name='Paging Co')
+    conversation_id = send(client, student_token, profile_id(app, employer), 'Message 0')
+    for number in range(1, 11):
+        with quiet():
+            response = client.post(f"/api/messages/conversation/{conversation_id}/reply",
+                                   headers=auth(employer_token if number % 2 else student_token),
+                                   json={'message_text': f"Message {number}"})
+        assert response.status_code == 201, response.get_json()
+
+    url = f"/api/messages/conversation/{conversation_id}?limit=4"
+    for follow in ('cursor', 'before'):
+        pages, argument = [], ''
+        while True:
+            with quiet():
+                response = client.get(url + argument, headers=auth(student_token))
+            assert response.status_code == 200, response.get_json()
+            page = response.get_json()
+            pages.append(page)
+
+            # Each page is oldest first
+            assert [message['id'] for message in page] == sorted(message['id'] for message in page)
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor is None:
+                break
+            argument = f"&cursor={cursor}" if follow == 'cursor' else f"&before={page[0]['id']}"
+
+        # Latest page first, back to the first message, each message once
+        assert [len(page) for page in pages] == [4, 4, 3]
+        texts = [message['message_text'] for page in reversed(pages) for message in page]
+        assert texts == [f"Message {number}" for number in range(11)], follow
+
+
+def test_reading_moves_each_sides_watermark(app, client, register):
+    student_token, _ = register('student', full_name='Watermark Student')
+    employer_token, employer = register('employer', company_name='Watermark Co')
+    conversation_id = send(client, student_token, profile_id(app, employer), 'Are you hiring?')
+    send(client, student_token, profile_id(app, employer), 'Interns too?')
+    thread = f"/api/messages/conversation/{conversation_id}"
+
+    # The employer reads, then replies
+    assert [m['is_read'] for m in get(client, employer_token, thread)] == [True, True]
+    with quiet():
+        response = client.post(f"{thread}/reply", headers=auth(employer_token), json={'message_text': 'Yes, both'})
+    assert response.status_code == 201, response.get_json()
+
+    assert get(client, employer_token, '/api/messages/unread-count')['unread_count'] == 0
+    assert get(client, student_token, '/api/messages/unread-count')['unread_count'] == 1
+
+    # Reading again past their own reply is not news to the employer's streams
+    subscription = notifications.hub.subscribe(employer['id'])
+    try:
+        get(client, employer_token, thread)
+        assert subscription.queue.empty()
+    finally:
+        subscription.close()
+
+    # The student reads the reply
+    messages = get(client, student_token, thread)
+    assert [m['message_text'] for m in messages] == ['Are you hiring?', 'Interns too?', 'Yes, both']
+    assert all(m['is_read'] for m in messages)
+    assert get(client, student_token, '/api/messages/unread-count')['unread_count'] == 0
+    assert all(m['is_read'] for m in get(client, employer_token, thread))
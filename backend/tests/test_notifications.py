@@ -0,0 +1,85 @@
+"""
+Live updates reach signed-in users over GET /api/stream, opened with a
+single-use token from POST /api/stream/token (see notifications.py).
+"""
+
+import json
+
+import notifications
+from conftest import auth, profile_id, quiet
+
+# What a threaded server puts in the environ; the stream route refuses to run without it
+THREADED = {'wsgi.multithread': True}
+
+
+def stream_token(client, token):
+    with quiet():
+        response = client.post('/api/stream/token', headers=auth(token))
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['token']
+
+
+def open_stream(client, stream_token):
+    with quiet():
+        return client.get(f"/api/stream?token={stream_token}", environ_overrides=THREADED, buffered=False)
+
+
+def parse_frame(frame):
+    """(event type, data) of one Server-Sent Events frame"""
+    fields = dict(line.split(': ', 1) for line in frame.strip().splitlines())
+    return fields['event'], json.loads(fields['data'])
+
+
+def test_stream_token_opens_one_stream(client, register):
+    token, _ = register('student', full_name='Stream Student')
+    once = stream_token(client, token)
+
+    response = open_stream(client, once)
+    try:
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        frames = (frame.decode() for frame in response.response)
+        assert next(frames).startswith('retry:')
+        assert parse_frame(next(frames)) == ('unread', {'unread_count': 0})
+    finally:
+        response.close()
+
+    # Not again, and it opens nothing else
+    assert open_stream(client, once).status_code == 401
+    with quiet():
+        assert client.get('/api/messages/unread-count', headers=auth(once)).status_code == 401
+
+    # Nor does the login token in the query string
+    assert open_stream(client, token).status_code == 401
+
+
+def test_expired_stream_token_is_refused(client, register, monkeypatch):
+    token, _ = register('student', full_name='Late Student')
+    monkeypatch.setattr(notifications, 'TOKEN_SECONDS', -1)
+
+    response = open_stream(client, stream_token(client, token))
+    assert response.status_code == 401
+    assert 'expired' in response.get_json()['error']
+
+
+def test_sent_message_reaches_the_recipients_stream(app, client, register):
+    student_token, _ = register('student', full_name='Sender Student')
+    _, employer = register('employer', company_name='Recipient Co')
+
+    subscription = notifications.hub.subscribe(employer['id'])
+    try:
+        with quiet():
+            response = client.post('/api/messages', headers=auth(student_token), json={
+                'recipient_id': profile_id(app, employer), 'subject': 'Hello', 'message_text': 'Are you hiring?'
+            })
+        assert response.status_code == 201, response.get_json()
+
+        event_type, data = parse_frame(subscription.queue.get_nowait())
+        assert event_type == 'message'
+        assert data['conversation_id'] == response.get_json()['conversation_id']
+        assert data['message']['message_text'] == 'Are you hiring?'
+
+        assert parse_frame(subscription.queue.get_nowait()) == ('unread', {'unread_count': 1})
+        assert subscription.queue.empty()
+    finally:
+        subscription.close()
@@ -0,0 +1,102 @@
+"""
+List endpoints load their rows with a fixed number of queries (eager-loaded
+employers, stored RSVP counts and conversation summaries), however many
+rows the page holds. These tests count the statements each one runs at two
+dataset sizes.
+"""
+
+import threading
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+import index_sync
+from conftest import auth, profile_id, quiet
+from models import db
+
+SMALL, LARGE = 3, 15
+
+
+@contextmanager
+def counting_queries(app):
+    """Count the SQL statements run on this thread; yields a list they are appended to"""
+    statements = []
+    thread = threading.get_ident()
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        # The index worker and broadcast threads query too
+        if threading.get_ident() == thread:
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+
+def build_dataset(app, client, register, size):
+    """
+    An employer with size events, a student who RSVP'd to them all and has
+    written to size employers, and a conversation of size messages
+    """
+    def post(url, token, **kwargs):
+        with quiet():
+            response = client.post(url, headers=auth(token), **kwargs)
+        assert response.status_code in (200, 201), response.get_json()
+        return response.get_json()
+
+    employer_token, employer = register('employer', company_name='Query Count Co')
+    student_token, _ = register('student', full_name='Query Count Student')
+
+    for number in range(size):
+        event_id = post('/api/events', employer_token, json={
+            'title': f"Count Fair {number}", 'description': 'Counting', 'tags': ['Python', 'Data'],
+            'event_date': f"2032-01-{number + 1:02d}T10:00:00"
+        })['event']['id']
+        post(f"/api/events/{event_id}/rsvp", student_token)
+
+    # size messages in one conversation with the employer, and size - 1 more conversations
+    for number in range(size):
+        conversation_id = post('/api/messages', student_token, json={
+            'recipient_id': profile_id(app, employer), 'subject': 'Hello', 'message_text': f"Message {number}"
+        })['conversation_id']
+    for number in range(size - 1):
+        _, other = register('employer', company_name=f"Other Co {number}")
+        post('/api/messages', student_token, json={
+            'recipient_id': profile_id(app, other), 'subject': 'Hello', 'message_text': 'Hi'
+        })
+
+    index_sync.wait_for_sync()
+    return {
+        'events': ('/api/events', employer_token),
+        'personalized': ('/api/events/personalized', student_token),
+        'conversations': ('/api/messages/conversations', student_token),
+        'messages': (f"/api/messages/conversation/{conversation_id}", employer_token),
+    }
+
+
+def count_requests(app, client, endpoints):
+    """{endpoint: (statements run, rows returned)}"""
+    counts = {}
+    for name, (url, token) in endpoints.items():
+        with counting_queries(app) as statements, quiet():
+            response = client.get(url, headers=auth(token))
+        assert response.status_code == 200, response.get_json()
+        counts[name] = (len(statements), len(response.get_json()))
+    return counts
+
+
+def test_list_endpoints_run_a_constant_number_of_queries(app, client, register):
+    small = count_requests(app, client, build_dataset(app, client, register, SMALL))
+    large = count_requests(app, client, build_dataset(app, client, register, LARGE))
+
+    for name in small:
+        small_queries, small_rows = small[name]
+        large_queries, large_rows = large[name]
+        assert large_rows > small_rows >= SMALL, (name, small_rows, large_rows)
+        assert small_queries == large_queries, f"{name}: {small_queries} queries for {small_rows} rows, " \
+                                               f"{large_queries} for {large_rows}"
@@ -0,0 +1,41 @@
+"""
+Search responses are cached by the index generations they depend on (see
+search_cache.py), so a write that changes what they would show must move
+them to a new key.
+"""
+
+import index_sync
+from conftest import auth, quiet
+
+
+def test_rsvp_reorders_cached_autocomplete(client, register):
+    token, _ = register('employer', company_name='Cache Check Co')
+
+    def request(method, url, token=None, **kwargs):
+        with quiet():
+            response = getattr(client, method)(url, headers=auth(token) if token else {}, **kwargs)
+        assert response.status_code in (200, 201), response.get_json()
+        return response.get_json()
+
+    event_ids = [
+        request('post', '/api/events', token, json={
+            'title': f"Zorbing {number}", 'event_date': '2034-01-01T10:00:00'
+        })['event']['id']
+        for number in range(6)
+    ]
+    index_sync.wait_for_sync()
+
+    # Ties on RSVPs go to the newest events
+    suggestions = '/api/search/autocomplete?q=zorbing'
+    assert [s['id'] for s in request('get', suggestions)] == event_ids[:-5:-1]
+    assert {e['rsvp_count'] for e in request('get', '/api/search?q=zorbing&type=events')['events']} == {0}
+
+    for event_id, students in [(event_ids[0], 2), (event_ids[1], 1)]:
+        for _ in range(students):
+            student_token, _ = register('student', full_name='Cache Check Student')
+            request('post', f"/api/events/{event_id}/rsvp", student_token)
+    index_sync.wait_for_sync()
+
+    assert [s['id'] for s in request('get', suggestions)] == [event_ids[0], event_ids[1], event_ids[5], event_ids[4]]
+    rsvp_counts = {e['id']: e['rsvp_count'] for e in request('get', '/api/search?q=zorbing&type=events')['events']}
+    assert rsvp_counts[event_ids[0]] == 2 and rsvp_counts[event_ids[1]] == 1
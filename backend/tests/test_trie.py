@@ -0,0 +1,57 @@
+"""
+The event trie is kept up to date one write at a time (see index_sync.py).
+These tests put it through the kinds of write the app makes, then compare
+it with a fresh rebuild.
+"""
+
+import heapq
+
+import index_sync
+import trie
+from conftest import auth, quiet
+
+
+def make_writes(client, register, company_name):
+    """Create, edit, RSVP to and delete events, rename their company, and wait for the sync"""
+    token, _ = register('employer', company_name=company_name)
+    student_token, _ = register('student', full_name=f"{company_name} Student")
+
+    def write(method, url, token=token, **kwargs):
+        with quiet():
+            response = getattr(client, method)(url, headers=auth(token), **kwargs)
+        assert response.status_code in (200, 201), response.get_json()
+        return response.get_json()
+
+    event_ids = [
+        write('post', '/api/events', json={'title': title, 'tags': tags, 'event_date': '2033-03-01T10:00:00'})['event']['id']
+        for title, tags in [
+            ('Python Career Fair', ['Python', 'Machine Learning']),
+            ('Data Science Mixer', ['Data Science']),
+            ('Cloud Night', []),
+        ]
+    ]
+
+    # An edit, an RSVP (re-ranks only), a company rename (re-indexes its events) and a delete
+    write('put', f"/api/events/{event_ids[0]}", json={'title': 'Python Hiring Fair', 'tags': ['Python']})
+    write('post', f"/api/events/{event_ids[1]}/rsvp", token=student_token)
+    write('put', '/api/profile/employer', json={'company_name': f"Renamed {company_name}"})
+    write('delete', f"/api/events/{event_ids[2]}")
+    index_sync.wait_for_sync()
+
+
+def test_incremental_event_trie_matches_a_rebuild(app, client, register):
+    make_writes(client, register, 'Trie Check Co')
+
+    with app.app_context():
+        assert trie.check_event_trie() == []
+
+
+def test_top_k_caches_match_ranking_the_subtree(app, client, register):
+    make_writes(client, register, 'Top Check Co')
+
+    # The per-node top-k caches agree with ranking the whole subtree
+    index = trie.event_trie
+    for prefix in ['p', 'py', 'da', 'renamed', 'top', 'cloud']:
+        expected = heapq.nlargest(trie.TOP_K, index.starts_with(prefix),
+                                  key=lambda event_id: (index.scores.get(event_id, 0), event_id))
+        assert index.top_k(prefix) == expected, prefix
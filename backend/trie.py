@@ -1,23 +1,55 @@
+import heapq
+from array import array
+from bisect import bisect_left
+
+# Number of best-scored IDs cached at every trie node for autocomplete
+TOP_K = 10
+
+# Upper bound on edits for fuzzy search; keeps the explored part of the trie small
+MAX_EDITS = 2
+
+# Leading characters a fuzzy match must get exactly right. Typos in the first
+# letter are rare, and fixing it skips all other top-level branches of the trie.
+FUZZY_EXACT_PREFIX = 1
+
+
+def allowed_edits(term, requested=1):
+    """Scale the edit budget with term length: exact below 3 chars, 1 edit below 6"""
+    if len(term) < 3:
+        return 0
+    if len(term) < 6:
+        return min(requested, 1, MAX_EDITS)
+    return max(0, min(requested, MAX_EDITS))
+
+
 class TrieNode:
     def __init__(self):
         self.children = {}
         self.is_end_of_word = False
         self.data = []  # Store event/company IDs or objects
+        self.top = []  # Best-scored IDs in this subtree, highest first
 
 
 class Trie:
-    def __init__(self):
+    def __init__(self, top_size=TOP_K):
         self.root = TrieNode()
+        self.top_size = top_size
+        self.scores = {}  # data_id -> ranking score (e.g. RSVP count)
     
-    def insert(self, word, data_id):
+    def insert(self, word, data_id, score=None):
         """Insert a word into the trie with associated data"""
+        if score is not None:
+            self.scores[data_id] = score
+        
         node = self.root
         word = word.lower()
+        self._promote(node, data_id)
         
         for char in word:
             if char not in node.children:
                 node.children[char] = TrieNode()
             node = node.children[char]
+            self._promote(node, data_id)
         
         node.is_end_of_word = True
         if data_id not in node.data:
@@ -35,6 +67,39 @@ class Trie:
         
         return node.data if node.is_end_of_word else []
     
+    def remove(self, word, data_id):
+        """Remove data associated with a word, pruning nodes left empty"""
+        node = self.root
+        word = word.lower()
+        path = []
+        
+        for char in word:
+            if char not in node.children:
+                return False
+            path.append((node, char))
+            node = node.children[char]
+        
+        if data_id not in node.data:
+            return False
+        
+        node.data.remove(data_id)
+        if not node.data:
+            node.is_end_of_word = False
+        
+        # Walk back up, dropping nodes that no longer lead to any word
+        for parent, char in reversed(path):
+            child = parent.children[char]
+            if child.is_end_of_word or child.children:
+                break
+            del parent.children[char]
+        
+        # Refresh top-k caches bottom-up; the ID may still live elsewhere in a subtree
+        for visited in [node] + [parent for parent, char in reversed(path)]:
+            if data_id in visited.top:
+                self._refresh_top(visited)
+        
+        return True
+    
     def starts_with(self, prefix):
         """Find all words/data that start with the given prefix"""
         node = self.root
@@ -48,6 +113,49 @@ class Trie:
         # Collect all data from this node and its descendants
         return self._collect_all_data(node)
     
+    def top_k(self, prefix, k=TOP_K):
+        """
+        Return up to k IDs under the given prefix, best score first.
+        
+        Served from the per-node cache, so the cost depends on the prefix
+        length rather than the size of the subtree below it.
+        """
+        node = self.root
+        prefix = prefix.lower()
+        
+        for char in prefix:
+            if char not in node.children:
+                return []
+            node = node.children[char]
+        
+        if k > self.top_size:
+            return heapq.nlargest(k, self._collect_all_data(node), key=self._rank)
+        
+        return node.top[:k]
+    
+    def _rank(self, data_id):
+        return (self.scores.get(data_id, 0), data_id)
+    
+    def _promote(self, node, data_id):
+        """Offer data_id to a node's top-k cache"""
+        top = node.top
+        if data_id in top:
+            return
+        if len(top) >= self.top_size and (not top or self._rank(data_id) <= self._rank(top[-1])):
+            return
+        
+        top.append(data_id)
+        top.sort(key=self._rank, reverse=True)
+        del top[self.top_size:]
+    
+    def _refresh_top(self, node):
+        """Recompute a node's top-k cache from its own data and its children's caches"""
+        candidates = set(node.data) if node.is_end_of_word else set()
+        for child in node.children.values():
+            candidates.update(child.top)
+        
+        node.top = heapq.nlargest(self.top_size, candidates, key=self._rank)
+    
     def _collect_all_data(self, node):
         """Helper method to collect all data from a node and its descendants"""
         results = []
@@ -59,74 +167,671 @@ class Trie:
             results.extend(self._collect_all_data(child))
         
         return list(set(results))  # Remove duplicates
+    
+    def items(self):
+        """Yield (word, data) for every word stored in the trie"""
+        stack = [(self.root, '')]
+        while stack:
+            node, word = stack.pop()
+            if node.is_end_of_word:
+                yield word, node.data
+            for char, child in node.children.items():
+                stack.append((child, word + char))
+
+
+class EditAutomaton:
+    """
+    Lazily built DFA for "within max_edits of word".
+    
+    A state is one row of the edit-distance table (capped at max_edits + 1)
+    plus the few cells an adjacent swap could still use from the row before.
+    Characters that do not occur in word all behave the same, so transitions
+    are memoised per state and per character of word; once warm, following a
+    trie edge costs a dict lookup per character instead of a table row.
+    """
+    
+    def __init__(self, word, max_edits):
+        self.word = word
+        self.cap = max_edits + 1
+        self.letters = set(word)
+        
+        self.rows = []
+        self.swaps = []  # (j, cost) pairs: reading word[j - 2] next completes a swap
+        self.distance = []  # edit distance from word to the path so far
+        self.closest = []  # best distance any continuation of the path can reach
+        self.transitions = []
+        self.ids = {}
+        
+        self.start = self._state(tuple(min(j, self.cap) for j in range(len(word) + 1)), ())
+    
+    def step(self, state, char):
+        """State reached from state by reading char"""
+        key = char if char in self.letters else None
+        following = self.transitions[state].get(key)
+        if following is None:
+            following = self._advance(state, key)
+            self.transitions[state][key] = following
+        return following
+    
+    def _state(self, row, swaps):
+        key = (row, swaps)
+        state = self.ids.get(key)
+        if state is None:
+            state = self.ids[key] = len(self.rows)
+            self.rows.append(row)
+            self.swaps.append(swaps)
+            self.distance.append(row[-1])
+            self.closest.append(min(row))
+            self.transitions.append({})
+        return state
+    
+    def _advance(self, state, char):
+        word, cap = self.word, self.cap
+        row = self.rows[state]
+        
+        new_row = [min(row[0] + 1, cap)]
+        for j in range(1, len(word) + 1):
+            new_row.append(min(row[j] + 1, new_row[j - 1] + 1, row[j - 1] + (word[j - 1] != char), cap))
+        for j, cost in self.swaps[state]:
+            if char == word[j - 2] and cost < new_row[j]:
+                new_row[j] = cost
+                # A cheaper cell can lower the ones to its right in the same row
+                for k in range(j + 1, len(word) + 1):
+                    if new_row[k - 1] + 1 >= new_row[k]:
+                        break
+                    new_row[k] = new_row[k - 1] + 1
+        
+        swaps = ()
+        if char is not None:
+            swaps = tuple(
+                (j, row[j - 2] + 1) for j in range(2, len(word) + 1)
+                if word[j - 1] == char and row[j - 2] + 1 < cap
+            )
+        
+        return self._state(tuple(new_row), swaps)
 
 
-# Global Trie instances
-event_trie = Trie()
-company_trie = Trie()
-skill_trie = Trie()
+class RadixNode:
+    """Path-compressed trie node: one node per distinct edge label, not per character"""
+    __slots__ = ('label', 'children', 'postings', 'top')
+    
+    def __init__(self, label=''):
+        self.label = label
+        self.children = None  # first char of child label -> RadixNode, created lazily
+        self.postings = None  # sorted array('I') of IDs when a word ends here
+        self.top = []  # Best-scored IDs in this subtree, highest first
+
+
+class RadixTrie(Trie):
+    """
+    Compact drop-in replacement for Trie.
+    
+    Chains of single-child nodes are collapsed into one edge label and the
+    IDs for each word are kept in a sorted array('I') instead of a list, so
+    the index costs far fewer objects per indexed word.
+    
+    A trie that is being read by other threads has copy_on_write set: writes
+    then copy the nodes on the path they change and publish the new root with
+    a single assignment, so a reader that took self.root never sees a node
+    change under it. A privately built trie skips the copies.
+    """
+    
+    copy_on_write = False
+    
+    def __init__(self, top_size=TOP_K, copy_on_write=False):
+        self.root = RadixNode()
+        self.top_size = top_size
+        self.scores = {}
+        self.copy_on_write = copy_on_write
+    
+    def insert(self, word, data_id, score=None):
+        """Insert a word into the trie with associated data"""
+        if score is not None:
+            self.scores[data_id] = score
+        
+        root = node = self._writable(self.root)
+        word = word.lower()
+        self._promote(node, data_id)
+        i = 0
+        
+        while i < len(word):
+            if node.children is None:
+                node.children = {}
+            child = node.children.get(word[i])
+            
+            if child is None:
+                child = RadixNode(word[i:])
+                node.children[word[i]] = child
+                node = child
+                self._promote(node, data_id)
+                break
+            
+            label = child.label
+            common = 0
+            while common < len(label) and i + common < len(word) and label[common] == word[i + common]:
+                common += 1
+            
+            if self.copy_on_write:
+                child = node.children[word[i]] = self._writable(child)
+            
+            if common < len(label):
+                # Split the edge: the shared part becomes a new node above child
+                middle = RadixNode(label[:common])
+                middle.top = list(child.top)
+                child.label = label[common:]
+                middle.children = {child.label[0]: child}
+                node.children[word[i]] = middle
+                child = middle
+            
+            node = child
+            self._promote(node, data_id)
+            i += common
+        
+        postings = node.postings
+        position = bisect_left(postings, data_id) if postings else 0
+        if not postings or position == len(postings) or postings[position] != data_id:
+            if postings is None or self.copy_on_write:
+                postings = array('I', postings or ())
+            postings.insert(position, data_id)
+            node.postings = postings
+        
+        self.root = root
+    
+    def search(self, word):
+        """Search for exact word match"""
+        node = self.root
+        word = word.lower()
+        i = 0
+        
+        while i < len(word):
+            child = node.children.get(word[i]) if node.children else None
+            if child is None or not word.startswith(child.label, i):
+                return []
+            node = child
+            i += len(child.label)
+        
+        return list(node.postings) if node.postings else []
+    
+    def remove(self, word, data_id):
+        """Remove data associated with a word, re-compressing the path afterwards"""
+        path = self._path(word.lower())
+        if path is None:
+            return False
+        
+        postings = path[-1].postings
+        position = bisect_left(postings, data_id) if postings else 0
+        if not postings or position == len(postings) or postings[position] != data_id:
+            return False
+        
+        path = self._copy_path(path)
+        path, node = path[:-1], path[-1]
+        
+        if self.copy_on_write:
+            postings = array('I', postings)
+        del postings[position]
+        node.postings = postings or None
+        
+        # Drop a node that no longer leads to any word, then merge any
+        # word-less node left with a single child into that child
+        if path and node.postings is None:
+            parent = path[-1]
+            if not node.children:
+                del parent.children[node.label[0]]
+                if not parent.children:
+                    parent.children = None
+                if len(path) > 1 and parent.postings is None and parent.children and len(parent.children) == 1:
+                    self._merge_with_child(parent)
+            elif len(node.children) == 1:
+                self._merge_with_child(node)
+        
+        # Refresh top-k caches bottom-up; the ID may still live elsewhere in a subtree
+        for visited in [node] + path[::-1]:
+            if data_id in visited.top:
+                self._refresh_top(visited)
+        
+        self.root = path[0] if path else node
+        return True
+    
+    def rerank(self, word):
+        """Re-sort the top-k caches on a word's path after scores changed"""
+        path = self._path(word.lower())
+        if path is None:
+            return False
+        
+        path = self._copy_path(path)
+        for node in reversed(path):
+            self._refresh_top(node)
+        
+        self.root = path[0]
+        return True
+    
+    def starts_with(self, prefix):
+        """Find all data stored under words that start with the given prefix"""
+        node = self._locate(prefix.lower())
+        if node is None:
+            return []
+        
+        postings = [n.postings for n in self._walk(node) if n.postings]
+        if len(postings) == 1:
+            return list(postings[0])
+        
+        return sorted(set().union(*postings))
+    
+    def postings(self, prefix):
+        """Sorted array('I') of the IDs under words starting with prefix, merged without sets"""
+        node = self._locate(prefix.lower())
+        if node is None:
+            return array('I')
+        
+        arrays = [n.postings for n in self._walk(node) if n.postings]
+        if len(arrays) == 1:
+            return array('I', arrays[0])
+        
+        merged = array('I')
+        for data_id in heapq.merge(*arrays):
+            if not merged or merged[-1] != data_id:
+                merged.append(data_id)
+        return merged
+    
+    def top_k(self, prefix, k=TOP_K):
+        """Return up to k IDs under the given prefix, best score first"""
+        node = self._locate(prefix.lower())
+        if node is None:
+            return []
+        
+        if k > self.top_size:
+            return heapq.nlargest(k, self.starts_with(prefix), key=self._rank)
+        
+        return node.top[:k]
+    
+    def fuzzy_search(self, word, max_edits=1, prefix=False):
+        """
+        Find data under words within max_edits edits of word.
+        
+        Insertions, deletions, substitutions and swaps of adjacent characters
+        each count as one edit. With prefix=True a word also matches when it
+        merely starts with something close to word (for search-as-you-type).
+        
+        The edit-distance table is computed one row per trie character and a
+        branch is abandoned as soon as every cell in its row exceeds the
+        budget, so only the part of the trie near word is visited.
+        
+        Returns {data_id: distance}.
+        """
+        matches = {}
+        for node, distance in self._fuzzy_nodes(word.lower(), max_edits, prefix):
+            for matched in (self._walk(node) if prefix else [node]):
+                for data_id in matched.postings or ():
+                    if distance < matches.get(data_id, max_edits + 1):
+                        matches[data_id] = distance
+        
+        return matches
+    
+    def fuzzy_top_k(self, prefix, k=TOP_K, max_edits=1):
+        """Best IDs under words starting near prefix: closest first, then by score"""
+        best = {}
+        for node, distance in self._fuzzy_nodes(prefix.lower(), max_edits, True):
+            for data_id in node.top:
+                if distance < best.get(data_id, max_edits + 1):
+                    best[data_id] = distance
+        
+        return sorted(best, key=lambda data_id: (best[data_id], -self.scores.get(data_id, 0), -data_id))[:k]
+    
+    def _fuzzy_nodes(self, word, max_edits, prefix):
+        """Yield (node, distance) for nodes whose path is within max_edits of word"""
+        automaton = EditAutomaton(word, max_edits)
+        transitions, letters = automaton.transitions, automaton.letters
+        distance, closest = automaton.distance, automaton.closest
+        exact = min(FUZZY_EXACT_PREFIX, len(word))
+        
+        root = self.root
+        budget = max_edits
+        start = automaton.start
+        if distance[start] <= max_edits and not exact and (prefix or root.postings):
+            yield root, distance[start]
+            if prefix:
+                budget = distance[start] - 1
+        
+        stack = [(root, 0, start, budget)]
+        while stack:
+            node, depth, state, limit = stack.pop()
+            if not node.children:
+                continue
+            
+            for child in node.children.values():
+                current, budget, level = state, limit, depth
+                
+                for char in child.label:
+                    if level < exact and char != word[level]:
+                        budget = -1
+                        break
+                    level += 1
+                    
+                    following = transitions[current].get(char if char in letters else None)
+                    current = following if following is not None else automaton.step(current, char)
+                    
+                    if prefix and distance[current] <= budget:
+                        # Everything below matches; keep going only if it can get closer
+                        yield child, distance[current]
+                        budget = distance[current] - 1
+                    if closest[current] > budget:
+                        budget = -1
+                        break
+                
+                if budget < 0:
+                    continue
+                if not prefix and child.postings and distance[current] <= budget:
+                    yield child, distance[current]
+                stack.append((child, level, current, budget))
+    
+    def items(self):
+        """Yield (word, data) for every word stored in the trie"""
+        stack = [(self.root, '')]
+        while stack:
+            node, word = stack.pop()
+            word += node.label
+            if node.postings:
+                yield word, list(node.postings)
+            if node.children:
+                for child in node.children.values():
+                    stack.append((child, word))
+    
+    def _locate(self, prefix):
+        """Find the node whose path covers the prefix (the prefix may end mid-edge)"""
+        node = self.root
+        i = 0
+        
+        while i < len(prefix):
+            child = node.children.get(prefix[i]) if node.children else None
+            if child is None:
+                return None
+            
+            remaining = prefix[i:]
+            if remaining.startswith(child.label):
+                i += len(child.label)
+            elif child.label.startswith(remaining):
+                return child
+            else:
+                return None
+            node = child
+        
+        return node
+    
+    def _path(self, word):
+        """Nodes from the root to the node for word, or None if word is not a path in the trie"""
+        node = self.root
+        path = [node]
+        i = 0
+        
+        while i < len(word):
+            child = node.children.get(word[i]) if node.children else None
+            if child is None or not word.startswith(child.label, i):
+                return None
+            node = child
+            path.append(node)
+            i += len(child.label)
+        
+        return path
+    
+    def _writable(self, node):
+        """The node itself, or a copy to modify when the trie is copy-on-write"""
+        if not self.copy_on_write:
+            return node
+        
+        copy = RadixNode(node.label)
+        copy.children = dict(node.children) if node.children else None
+        copy.postings = node.postings  # Replaced, never modified, while shared
+        copy.top = list(node.top)
+        return copy
+    
+    def _copy_path(self, path):
+        """Writable copies of a root-to-node path, each linked to the next"""
+        if not self.copy_on_write:
+            return path
+        
+        path = [self._writable(node) for node in path]
+        for parent, child in zip(path, path[1:]):
+            parent.children[child.label[0]] = child
+        return path
+    
+    def _walk(self, node):
+        """Yield a node and all of its descendants"""
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.children:
+                stack.extend(node.children.values())
+    
+    def _merge_with_child(self, node):
+        """Absorb a node's only child into it (the subtree and its top-k are unchanged)"""
+        (child,) = node.children.values()
+        node.label += child.label
+        node.children = child.children
+        node.postings = child.postings
+        node.top = child.top
+    
+    def _refresh_top(self, node):
+        candidates = set(node.postings) if node.postings else set()
+        if node.children:
+            for child in node.children.values():
+                candidates.update(child.top)
+        
+        node.top = heapq.nlargest(self.top_size, candidates, key=self._rank)
+
+
+# Global Trie instances. They are read by request threads while the index
+# worker updates them, so they are copy-on-write, and rebuilds fill a private
+# trie that replaces the global in a single assignment.
+event_trie = RadixTrie(copy_on_write=True)
+company_trie = RadixTrie(copy_on_write=True)
+skill_trie = RadixTrie(top_size=0, copy_on_write=True)  # Exact skill lookups only, no autocomplete cache
+
+
+def reindex(index, indexed_tokens, data_id, tokens, score=None):
+    """
+    Make data_id indexed under exactly tokens.
+    
+    New words are added before stale ones are removed, so a concurrent
+    reader never sees the ID missing from a word it keeps.
+    """
+    old_tokens = indexed_tokens.get(data_id, [])
+    rescored = data_id in indexed_tokens and score is not None and score != index.scores.get(data_id, 0)
+    
+    for token in tokens:
+        index.insert(token, data_id, score)
+    
+    words = {token.lower() for token in tokens}
+    for token in old_tokens:
+        if token.lower() not in words:
+            index.remove(token, data_id)
+    
+    # Caches that already held the ID were ranked with its old score
+    if rescored:
+        for word in words:
+            index.rerank(word)
+    
+    indexed_tokens[data_id] = tokens
+
+
+# Words each event is currently indexed under, so a write only touches those
+event_tokens = {}
+
+
+def get_event_tokens(event):
+    """
+    Words an event is indexed by: title words, tags and company name.
+    
+    Multi-word tags and company names are indexed both whole and word by word,
+    so multi-term queries can match any of their words.
+    """
+    tokens = list(event.title.split())
+    
+    phrases = [tag.strip() for tag in event.tags.split(',') if tag.strip()] if event.tags else []
+    if event.employer and event.employer.company_name:
+        phrases.append(event.employer.company_name)
+    
+    for phrase in phrases:
+        tokens.append(phrase)
+        words = phrase.split()
+        if len(words) > 1:
+            tokens.extend(words)
+    
+    return tokens
+
+
+def index_event(event, score=None):
+    """
+    Add (or re-add) a single event to the event trie.
+    
+    score ranks the event in autocomplete (its RSVP count); when omitted the
+    event keeps its current score, or 0 for a new event.
+    """
+    if score is None:
+        score = event_trie.scores.get(event.id, 0)
+    
+    reindex(event_trie, event_tokens, event.id, get_event_tokens(event), score)
+
+
+def unindex_event(event_id):
+    """Remove a single event from the event trie"""
+    for token in event_tokens.pop(event_id, []):
+        event_trie.remove(token, event_id)
+    event_trie.scores.pop(event_id, None)
+
+
+def rescore_event(event_id, score):
+    """
+    Update an event's autocomplete score (its RSVP count) without re-indexing
+    its words, after an RSVP (the 'scores' changes of index_sync)
+    """
+    tokens = event_tokens.get(event_id)
+    if tokens is None or event_trie.scores.get(event_id, 0) == score:
+        return
+    
+    event_trie.scores[event_id] = score
+    for word in {token.lower() for token in tokens}:
+        event_trie.rerank(word)
 
 
 def build_event_trie():
     """Build/rebuild the event search trie"""
     from models import Event
     
-    global event_trie
-    event_trie = Trie()
+    global event_trie, event_tokens
     
     print("🔨 Building event trie...")
     
-    events = Event.query.all()
+    events = Event.list_query().all()
     print(f"📊 Found {len(events)} events in database")
     
+    index, tokens = RadixTrie(), {}
     for event in events:
-        print(f"📝 Indexing event: {event.title}")
-        
-        # Index by title words
-        for word in event.title.split():
-            print(f"   → Indexing word: '{word}' for event ID {event.id}")
-            event_trie.insert(word, event.id)
-        
-        # Index by tags
-        if event.tags:
-            for tag in event.tags.split(','):
-                tag = tag.strip()
-                print(f"   → Indexing tag: '{tag}' for event ID {event.id}")
-                event_trie.insert(tag, event.id)
-        
-        # Index by company name
-        if event.employer:
-            print(f"   → Indexing company: '{event.employer.company_name}' for event ID {event.id}")
-            event_trie.insert(event.employer.company_name, event.id)
+        reindex(index, tokens, event.id, get_event_tokens(event), event.rsvp_count)
+    
+    # Publish with a single reference swap, so readers never see a half-built trie
+    index.copy_on_write = True
+    event_tokens, event_trie = tokens, index
     
     print("✅ Event trie built successfully!")
 
 
+def check_event_trie():
+    """
+    Compare the incrementally maintained event trie against a fresh rebuild.
+    
+    Returns a list of (word, expected_ids, actual_ids) mismatches; an empty
+    list means the live trie is consistent with the database.
+    """
+    from models import Event
+    
+    expected = RadixTrie()
+    for event in Event.query.all():
+        for token in get_event_tokens(event):
+            expected.insert(token, event.id)
+    
+    expected_words = {word: sorted(data) for word, data in expected.items()}
+    actual_words = {word: sorted(data) for word, data in event_trie.items()}
+    
+    mismatches = []
+    for word in sorted(set(expected_words) | set(actual_words)):
+        if expected_words.get(word, []) != actual_words.get(word, []):
+            mismatches.append((word, expected_words.get(word, []), actual_words.get(word, [])))
+    
+    return mismatches
+
+
+# Words each company is currently indexed under
+company_tokens = {}
+
+
+def get_company_tokens(employer):
+    """Words a company is indexed by: company name words, and its industry whole and word by word"""
+    tokens = list((employer.company_name or '').split())
+    
+    if employer.industry:
+        tokens.append(employer.industry)
+        tokens.extend(employer.industry.split())
+    
+    return tokens
+
+
+def index_company(employer):
+    """Add (or re-add) a single company to the company trie"""
+    reindex(company_trie, company_tokens, employer.id, get_company_tokens(employer))
+
+
+def unindex_company(employer_id):
+    """Remove a single company from the company trie"""
+    for token in company_tokens.pop(employer_id, []):
+        company_trie.remove(token, employer_id)
+    company_trie.scores.pop(employer_id, None)
+
+
 def build_company_trie():
     """Build/rebuild the company search trie"""
     from models import EmployerProfile
     
-    global company_trie
-    company_trie = Trie()
+    global company_trie, company_tokens
     
-    employers = EmployerProfile.query.all()
-    for employer in employers:
-        # Index by company name words
-        for word in employer.company_name.split():
-            company_trie.insert(word, employer.id)
-        
-        # Index by industry
-        if employer.industry:
-            company_trie.insert(employer.industry, employer.id)
+    index, tokens = RadixTrie(), {}
+    for employer in EmployerProfile.query.all():
+        reindex(index, tokens, employer.id, get_company_tokens(employer))
+    
+    index.copy_on_write = True
+    company_tokens, company_trie = tokens, index
+
+
+# Skills each student is indexed under, so a profile edit only touches those
+student_skills = {}
+
+
+def index_student(student_id, skill_names):
+    """Add (or re-add) a student's skills to the skill trie"""
+    skills = [name.strip() for name in skill_names if name and name.strip()]
+    reindex(skill_trie, student_skills, student_id, skills)
+
+
+def unindex_student(student_id):
+    """Remove a student from the skill trie"""
+    for skill in student_skills.pop(student_id, []):
+        skill_trie.remove(skill, student_id)
 
 
 def build_skill_trie():
     """Build/rebuild the skill search trie"""
     from models import StudentSkill
     
-    global skill_trie
-    skill_trie = Trie()
+    global skill_trie, student_skills
     
-    skills = StudentSkill.query.all()
+    index, skills_by_student = RadixTrie(top_size=0), {}
+    
+    # In student order, so every posting insert is an append
+    skills = StudentSkill.query.order_by(StudentSkill.student_id).all()
     for skill in skills:
-        skill_trie.insert(skill.skill_name, skill.student_id)
\ No newline at end of file
+        if skill.skill_name and skill.skill_name.strip():
+            index.insert(skill.skill_name.strip(), skill.student_id)
+            skills_by_student.setdefault(skill.student_id, []).append(skill.skill_name.strip())
+    
+    index.copy_on_write = True
+    student_skills, skill_trie = skills_by_student, index
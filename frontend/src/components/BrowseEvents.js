@@ -2,6 +2,8 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import './BrowseEvents.css';
 import { FaArrowLeft, FaCalendarAlt, FaMapMarkerAlt, FaBuilding, FaFilter } from 'react-icons/fa';
+import { fetchPage } from '../utils/pagination';
+import LoadMoreButton from './LoadMoreButton';
 
 const API_BASE_URL = 'http://localhost:5001/api';
 
@@ -13,6 +15,7 @@ const BrowseEvents = () => {
     const [rsvpStatus, setRsvpStatus] = useState({});
     const [filter, setFilter] = useState('all');
     const [checkingRsvp, setCheckingRsvp] = useState(false);
+    const [nextCursor, setNextCursor] = useState(null);
 
     useEffect(() => {
         fetchEvents();
@@ -22,23 +25,24 @@ const BrowseEvents = () => {
         filterEvents();
     }, [filter, events]);
 
-    const fetchEvents = async () => {
+    // The first page, or the page after cursor when the user asks for more
+    const fetchEvents = async (cursor = null) => {
     try {
         const token = localStorage.getItem('token');
         
-        const response = await fetch(`${API_BASE_URL}/events/personalized`, {
+        const response = await fetchPage(`${API_BASE_URL}/events/personalized`, cursor, {
             headers: {
                 'Authorization': `Bearer ${token}`
             }
         });
 
         if (response.ok) {
-            const data = await response.json();
+            const data = response.data;
             console.log('✅ Personalized events fetched:', data);
-            setEvents(data);
-            setFilteredEvents(data);
+            setEvents(prev => cursor ? [...prev, ...data] : data);
+            setNextCursor(response.nextCursor);
             
-            // Check RSVP status after fetching events
+            // Check RSVP status of the events just fetched
             if (data.length > 0) {
                 await checkRsvpStatus(data.map(event => event.id));
             }
@@ -86,7 +90,7 @@ const BrowseEvents = () => {
             });
             
             console.log('📊 Final RSVP Status Map:', statusMap);
-            setRsvpStatus(statusMap);
+            setRsvpStatus(prev => ({ ...prev, ...statusMap }));
         } catch (err) {
             console.error('Error checking RSVP status:', err);
         } finally {
@@ -237,6 +241,7 @@ const BrowseEvents = () => {
                         <p>No events found</p>
                     </div>
                 )}
+                {!loading && <LoadMoreButton nextCursor={nextCursor} onLoadMore={fetchEvents} />}
             </div>
         </div>
     );
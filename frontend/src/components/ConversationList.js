@@ -1,7 +1,10 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import './ConversationList.css';
 import { FaArrowLeft, FaEnvelope, FaEnvelopeOpen, FaCircle } from 'react-icons/fa';
+import { fetchPage } from '../utils/pagination';
+import { subscribe } from '../utils/stream';
+import LoadMoreButton from './LoadMoreButton';
 
 const API_BASE_URL = 'http://localhost:5001/api';
 
@@ -9,6 +12,8 @@ const ConversationList = () => {
     const navigate = useNavigate();
     const [conversations, setConversations] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const loadedMoreRef = useRef(false);  // Pages after the first have been loaded
     
     // Get user type from localStorage
     const user = JSON.parse(localStorage.getItem('user') || '{}');
@@ -18,21 +23,40 @@ const ConversationList = () => {
         fetchConversations();
     }, []);
 
-    const fetchConversations = async () => {
+    // Re-fetched when a message arrives, rather than polled
+    useEffect(() => subscribe({
+        message: () => fetchConversations(),
+        resync: () => fetchConversations()
+    }), []);
+
+    // The first page, or the page after cursor when the user asks for more. A
+    // re-fetched first page (most recent first) replaces the conversations it
+    // holds, keeping later pages already loaded and the cursor after them.
+    const fetchConversations = async (cursor = null) => {
         try {
             const token = localStorage.getItem('token');
             console.log('📥 Fetching conversations...');
             
-            const response = await fetch(`${API_BASE_URL}/messages/conversations`, {
+            const response = await fetchPage(`${API_BASE_URL}/messages/conversations`, cursor, {
                 headers: {
                     'Authorization': `Bearer ${token}`
                 }
             });
 
             if (response.ok) {
-                const data = await response.json();
+                const data = response.data;
                 console.log('✅ Conversations:', data);
-                setConversations(data);
+                if (cursor) {
+                    loadedMoreRef.current = true;
+                    setConversations(prev => [...prev, ...data]);
+                    setNextCursor(response.nextCursor);
+                } else if (loadedMoreRef.current) {
+                    const refreshed = new Set(data.map(conv => conv.conversation_id));
+                    setConversations(prev => [...data, ...prev.filter(conv => !refreshed.has(conv.conversation_id))]);
+                } else {
+                    setConversations(data);
+                    setNextCursor(response.nextCursor);
+                }
             } else {
                 console.error('❌ Failed to fetch conversations');
             }
@@ -124,6 +148,7 @@ const ConversationList = () => {
                             </div>
                         </div>
                     ))}
+                    <LoadMoreButton nextCursor={nextCursor} onLoadMore={fetchConversations} />
                 </div>
             ) : (
                 <div className="no-conversations">
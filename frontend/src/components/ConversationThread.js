@@ -2,6 +2,7 @@ import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import './ConversationThread.css';
 import { FaArrowLeft, FaPaperPlane } from 'react-icons/fa';
+import { subscribe } from '../utils/stream';
 
 const API_BASE_URL = 'http://localhost:5001/api';
 
@@ -12,7 +13,10 @@ const ConversationThread = () => {
     const [loading, setLoading] = useState(true);
     const [newMessage, setNewMessage] = useState('');
     const [sending, setSending] = useState(false);
+    const [hasEarlier, setHasEarlier] = useState(false);
+    const [loadingEarlier, setLoadingEarlier] = useState(false);
     const messagesEndRef = useRef(null);
+    const keepScrollRef = useRef(false);  // Earlier messages were added above; stay put
     
     // Get user info from localStorage
     const user = JSON.parse(localStorage.getItem('user') || '{}');
@@ -23,7 +27,23 @@ const ConversationThread = () => {
         fetchMessages();
     }, [conversationId]);
 
+    // Messages of this conversation are pushed as they are sent, by either side
+    useEffect(() => subscribe({
+        message: (data) => {
+            if (String(data.conversation_id) === conversationId) {
+                setMessages(prev =>
+                    prev.some(message => message.id === data.message.id) ? prev : [...prev, data.message]
+                );
+            }
+        },
+        resync: () => fetchMessages()
+    }), [conversationId]);
+
     useEffect(() => {
+        if (keepScrollRef.current) {
+            keepScrollRef.current = false;
+            return;
+        }
         scrollToBottom();
     }, [messages]);
 
@@ -31,19 +51,31 @@ const ConversationThread = () => {
         messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
     };
 
+    // The thread is paginated: the latest page first, then older pages before a message ID
+    const fetchPage = async (before) => {
+        const token = localStorage.getItem('token');
+        const query = before ? `?before=${before}` : '';
+
+        const response = await fetch(`${API_BASE_URL}/messages/conversation/${conversationId}${query}`, {
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+
+        if (!response.ok) {
+            return null;
+        }
+
+        setHasEarlier(response.headers.get('X-Next-Cursor') !== null);
+        return response.json();
+    };
+
     const fetchMessages = async () => {
         try {
-            const token = localStorage.getItem('token');
             console.log('📥 Fetching conversation messages...');
-            
-            const response = await fetch(`${API_BASE_URL}/messages/conversation/${conversationId}`, {
-                headers: {
-                    'Authorization': `Bearer ${token}`
-                }
-            });
+            const data = await fetchPage();
 
-            if (response.ok) {
-                const data = await response.json();
+            if (data) {
                 console.log('✅ Messages:', data);
                 setMessages(data);
             } else {
@@ -56,6 +88,24 @@ const ConversationThread = () => {
         }
     };
 
+    const fetchEarlierMessages = async () => {
+        setLoadingEarlier(true);
+        try {
+            const data = await fetchPage(messages[0].id);
+
+            if (data) {
+                keepScrollRef.current = true;
+                setMessages([...data, ...messages]);
+            } else {
+                console.error('❌ Failed to fetch earlier messages');
+            }
+        } catch (err) {
+            console.error('Error fetching earlier messages:', err);
+        } finally {
+            setLoadingEarlier(false);
+        }
+    };
+
     const handleSendMessage = async (e) => {
         e.preventDefault();
         if (!newMessage.trim()) return;
@@ -130,6 +180,12 @@ const ConversationThread = () => {
         return 'Other';
     };
 
+    // The other person's name, whichever way the first loaded message went
+    const getOtherName = (message) => {
+        const other = isMyMessage(message) ? message.recipient : message.sender;
+        return other?.name || (userType === 'student' ? 'Employer' : 'Student');
+    };
+
     return (
         <div className="conversation-thread-page">
             <div className="thread-header">
@@ -138,11 +194,7 @@ const ConversationThread = () => {
                 </button>
                 {messages.length > 0 && (
                     <div className="thread-info">
-                        <h2>
-                            {userType === 'student' 
-                                ? messages[0].recipient?.company_name || 'Employer'
-                                : messages[0].sender?.name || 'Student'}
-                        </h2>
+                        <h2>{getOtherName(messages[0])}</h2>
                         <p>{messages[0].subject}</p>
                     </div>
                 )}
@@ -157,6 +209,15 @@ const ConversationThread = () => {
                 ) : (
                     <>
                         <div className="messages-thread">
+                            {hasEarlier && (
+                                <button
+                                    className="load-earlier-button"
+                                    onClick={fetchEarlierMessages}
+                                    disabled={loadingEarlier}
+                                >
+                                    {loadingEarlier ? 'Loading...' : 'Load earlier messages'}
+                                </button>
+                            )}
                             {messages.map((message) => {
                                 const isMine = isMyMessage(message);
                                 return (
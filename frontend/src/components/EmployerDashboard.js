@@ -3,6 +3,9 @@ import { useNavigate } from 'react-router-dom';
 import './EmployerDashboard.css';
 import { FaPlus, FaUsers, FaCalendarAlt, FaSignOutAlt, FaEnvelope, FaEdit } from 'react-icons/fa';
 import { logout } from '../utils/auth';
+import { fetchPage } from '../utils/pagination';
+import { subscribe } from '../utils/stream';
+import LoadMoreButton from './LoadMoreButton';
 
 const API_BASE_URL = 'http://localhost:5001/api';
 
@@ -12,6 +15,8 @@ const EmployerDashboard = () => {
     const [postedEvents, setPostedEvents] = useState([]);
     const [loading, setLoading] = useState(true);
     const [unreadCount, setUnreadCount] = useState(0);
+    const [broadcasts, setBroadcasts] = useState({}); // Latest broadcast of each event, by event ID
+    const [nextCursor, setNextCursor] = useState(null);
 
     useEffect(() => {
         // Verify authentication
@@ -39,6 +44,15 @@ const EmployerDashboard = () => {
         fetchUnreadMessages();
     }, [navigate]);
 
+    // Unread count, RSVP counts and broadcast progress are pushed as they change
+    useEffect(() => subscribe({
+        unread: (data) => setUnreadCount(data.unread_count),
+        broadcast: (data) => setBroadcasts(prev => ({ ...prev, [data.event_id]: data })),
+        rsvp: (data) => setPostedEvents(prev =>
+            prev.map(event => event.id === data.event_id ? { ...event, rsvp_count: data.rsvp_count } : event)
+        )
+    }), []);
+
     const fetchEmployerProfile = async () => {
         try {
             const token = localStorage.getItem('token');
@@ -57,21 +71,23 @@ const EmployerDashboard = () => {
         }
     };
 
-    const fetchPostedEvents = async () => {
+    // The first page, or the page after cursor when the user asks for more
+    const fetchPostedEvents = async (cursor = null) => {
         try {
             const token = localStorage.getItem('token');
             console.log('📅 Fetching posted events...');
             
-            const response = await fetch(`${API_BASE_URL}/events`, {
+            const response = await fetchPage(`${API_BASE_URL}/events`, cursor, {
                 headers: {
                     'Authorization': `Bearer ${token}`
                 }
             });
 
             if (response.ok) {
-                const data = await response.json();
+                const data = response.data;
                 console.log('✅ Events fetched:', data);
-                setPostedEvents(data);
+                setPostedEvents(prev => cursor ? [...prev, ...data] : data);
+                setNextCursor(response.nextCursor);
             } else {
                 console.error('❌ Failed to fetch events:', response.status);
             }
@@ -116,6 +132,59 @@ const EmployerDashboard = () => {
         navigate(`/employer/events/${eventId}/applicants`);
     };
 
+    // Sent in the background; progress arrives as 'broadcast' stream events
+    const handleMessageApplicants = async (event) => {
+        const messageText = window.prompt(`Message everyone who RSVP'd to "${event.title}":`);
+        if (!messageText || !messageText.trim()) {
+            return;
+        }
+
+        try {
+            const token = localStorage.getItem('token');
+            const response = await fetch(`${API_BASE_URL}/events/${event.id}/broadcast`, {
+                method: 'POST',
+                headers: {
+                    'Authorization': `Bearer ${token}`,
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ message_text: messageText })
+            });
+
+            const data = await response.json();
+            if (response.ok) {
+                setBroadcasts(prev => ({ ...prev, [event.id]: data.broadcast }));
+            } else {
+                alert(data.message || 'Failed to message applicants');
+            }
+        } catch (err) {
+            console.error('Error messaging applicants:', err);
+            alert('Failed to message applicants');
+        }
+    };
+
+    // Carries on with the applicants a failed broadcast had not reached
+    const handleRetryBroadcast = async (broadcast) => {
+        try {
+            const token = localStorage.getItem('token');
+            const response = await fetch(`${API_BASE_URL}/events/${broadcast.event_id}/broadcast/${broadcast.id}/retry`, {
+                method: 'POST',
+                headers: {
+                    'Authorization': `Bearer ${token}`
+                }
+            });
+
+            const data = await response.json();
+            if (response.ok) {
+                setBroadcasts(prev => ({ ...prev, [broadcast.event_id]: data.broadcast }));
+            } else {
+                alert(data.message || 'Failed to retry the message');
+            }
+        } catch (err) {
+            console.error('Error retrying broadcast:', err);
+            alert('Failed to retry the message');
+        }
+    };
+
     const handlePostNewEvent = () => {
         console.log('🔘 Navigating to post new event');
         navigate('/employer/events/new');
@@ -189,8 +258,28 @@ const EmployerDashboard = () => {
                                 >
                                     View Applicants
                                 </button>
+                                <button
+                                    className="view-applicants-button"
+                                    onClick={() => handleMessageApplicants(event)}
+                                    disabled={!event.rsvp_count}
+                                >
+                                    <FaEnvelope /> Message Applicants
+                                </button>
+                                {broadcasts[event.id] && (
+                                    <span className="broadcast-progress">
+                                        {broadcasts[event.id].status === 'failed' ? (
+                                            <>
+                                                Message failed to send{' '}
+                                                <button onClick={() => handleRetryBroadcast(broadcasts[event.id])}>
+                                                    Retry
+                                                </button>
+                                            </>
+                                        ) : `Sent to ${broadcasts[event.id].sent} of ${broadcasts[event.id].total}`}
+                                    </span>
+                                )}
                             </div>
                         ))}
+                        <LoadMoreButton nextCursor={nextCursor} onLoadMore={fetchPostedEvents} />
                     </div>
                 ) : (
                     <div className="no-events">
@@ -2,6 +2,7 @@ import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import './EventSearchPage.css';
 import { FaMapMarkerAlt, FaCalendarAlt, FaBuilding } from 'react-icons/fa';
+import LoadMoreButton from './LoadMoreButton';
 
 const API_BASE_URL = 'http://localhost:5001/api';
 
@@ -12,6 +13,39 @@ const EventSearchPage = () => {
     const [loading, setLoading] = useState(false);
     const [hasSearched, setHasSearched] = useState(false);
     const [rsvpStatus, setRsvpStatus] = useState({}); // ← ADDED
+    const [searchedQuery, setSearchedQuery] = useState('');
+    const [nextCursor, setNextCursor] = useState(null);
+
+    // Results come a page at a time, most matched words first
+    const fetchResults = async (query, cursor = null) => {
+        const page = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+        const url = `${API_BASE_URL}/search?q=${encodeURIComponent(query)}&type=events${page}`;
+        console.log('📡 Search URL:', url);
+
+        const response = await fetch(url);
+
+        console.log('📥 Search response status:', response.status);
+
+        if (!response.ok) {
+            throw new Error('Search failed');
+        }
+
+        const data = await response.json();
+        setNextCursor(data.next_cursor?.events || null);
+        return data.events || [];
+    };
+
+    const handleLoadMore = async (cursor) => {
+        try {
+            const events = await fetchResults(searchedQuery, cursor);
+            setSearchResults(prev => [...prev, ...events]);
+            if (events.length > 0) {
+                checkRsvpStatus(events.map(event => event.id));
+            }
+        } catch (error) {
+            console.error('❌ Error loading more results:', error);
+        }
+    };
 
     const handleSearchSubmit = async (e) => {
         e.preventDefault();
@@ -26,30 +60,21 @@ const EventSearchPage = () => {
         setHasSearched(true);
 
         try {
-            const url = `${API_BASE_URL}/search?q=${encodeURIComponent(searchQuery)}&type=events`;
-            console.log('📡 Search URL:', url);
-            
-            const response = await fetch(url);
-
-            console.log('📥 Search response status:', response.status);
-            
-            if (!response.ok) {
-                throw new Error('Search failed');
-            }
-
-            const data = await response.json();
-            console.log('✅ Search results:', data);
-            console.log('📊 Events found:', data.events?.length || 0);
+            setSearchedQuery(searchQuery);
+            const events = await fetchResults(searchQuery);
+            console.log('✅ Search results:', events);
+            console.log('📊 Events found:', events.length);
             
-            setSearchResults(data.events || []);
+            setSearchResults(events);
             
             // ← ADDED: Check RSVP status for all events
-            if (data.events && data.events.length > 0) {
-                checkRsvpStatus(data.events.map(event => event.id));
+            if (events.length > 0) {
+                checkRsvpStatus(events.map(event => event.id));
             }
         } catch (error) {
             console.error('❌ Error searching events:', error);
             setSearchResults([]);
+            setNextCursor(null);
         } finally {
             setLoading(false);
         }
@@ -74,7 +99,7 @@ const EventSearchPage = () => {
             statusChecks.forEach(({ id, isRsvped }) => {
                 statusMap[id] = isRsvped;
             });
-            setRsvpStatus(statusMap);
+            setRsvpStatus(prev => ({ ...prev, ...statusMap }));
         } catch (err) {
             console.error('Error checking RSVP status:', err);
         }
@@ -168,7 +193,7 @@ const EventSearchPage = () => {
                     {searchResults.length > 0 ? (
                         <>
                             <h2 className="results-header">
-                                Found {searchResults.length} event{searchResults.length !== 1 ? 's' : ''}
+                                Found {searchResults.length}{nextCursor ? '+' : ''} event{searchResults.length !== 1 ? 's' : ''}
                             </h2>
                             <div className="results-list">
                                 {searchResults.map((event) => (
@@ -235,6 +260,7 @@ const EventSearchPage = () => {
                                     </div>
                                 ))}
                             </div>
+                            <LoadMoreButton nextCursor={nextCursor} onLoadMore={handleLoadMore} label="Load more results" />
                         </>
                     ) : (
                         <div className="no-results">
@@ -0,0 +1,30 @@
+import React, { useState } from 'react';
+import './LoadMoreButton.css';
+
+// Shown under a paginated list while it has a next page; onLoadMore fetches it
+const LoadMoreButton = ({ nextCursor, onLoadMore, label = 'Load more' }) => {
+    const [loading, setLoading] = useState(false);
+
+    if (!nextCursor) {
+        return null;
+    }
+
+    const handleClick = async () => {
+        setLoading(true);
+        try {
+            await onLoadMore(nextCursor);
+        } finally {
+            setLoading(false);
+        }
+    };
+
+    return (
+        <div className="load-more">
+            <button className="load-more-button" onClick={handleClick} disabled={loading}>
+                {loading ? 'Loading...' : label}
+            </button>
+        </div>
+    );
+};
+
+export default LoadMoreButton;
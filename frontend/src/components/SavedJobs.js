@@ -2,6 +2,8 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import './SavedJobs.css';
 import { FaArrowLeft, FaCalendarAlt, FaMapMarkerAlt, FaBuilding, FaTrash } from 'react-icons/fa';
+import { fetchPage } from '../utils/pagination';
+import LoadMoreButton from './LoadMoreButton';
 
 const API_BASE_URL = 'http://localhost:5001/api';
 
@@ -9,26 +11,29 @@ const SavedJobs = () => {
     const navigate = useNavigate();
     const [savedEvents, setSavedEvents] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
 
     useEffect(() => {
         fetchSavedEvents();
     }, []);
 
-    const fetchSavedEvents = async () => {
+    // The first page, or the page after cursor when the user asks for more
+    const fetchSavedEvents = async (cursor = null) => {
         try {
             const token = localStorage.getItem('token');
             console.log('📥 Fetching saved events...');
             
-            const response = await fetch(`${API_BASE_URL}/events/rsvp`, {
+            const response = await fetchPage(`${API_BASE_URL}/events/rsvp`, cursor, {
                 headers: {
                     'Authorization': `Bearer ${token}`
                 }
             });
 
             if (response.ok) {
-                const data = await response.json();
+                const data = response.data;
                 console.log('✅ Saved events:', data);
-                setSavedEvents(data);
+                setSavedEvents(prev => cursor ? [...prev, ...data] : data);
+                setNextCursor(response.nextCursor);
             } else {
                 console.error('❌ Failed to fetch saved events');
             }
@@ -136,6 +141,7 @@ const SavedJobs = () => {
                             </div>
                         </div>
                     ))}
+                    <LoadMoreButton nextCursor={nextCursor} onLoadMore={fetchSavedEvents} />
                 </div>
             ) : (
                 <div className="no-saved-events">
@@ -3,6 +3,7 @@ import { useNavigate } from 'react-router-dom';
 import './StudentDashboard.css';
 import { FaFileAlt, FaEdit, FaSearch, FaBriefcase, FaMapMarkerAlt, FaCalendarAlt, FaSignOutAlt, FaEnvelope } from 'react-icons/fa';
 import { logout } from '../utils/auth';
+import { subscribe } from '../utils/stream';
 
 const API_BASE_URL = 'http://localhost:5001/api';
 
@@ -71,6 +72,12 @@ const StudentDashboard = () => {
         fetchRecommendations();
     }, [navigate, fetchRecommendations]);
 
+    // Unread count and RSVPs (made in other tabs too) are pushed as they change
+    useEffect(() => subscribe({
+        unread: (data) => setUnreadCount(data.unread_count),
+        rsvp: (data) => setRsvpStatus(prev => ({ ...prev, [data.event_id]: data.rsvped }))
+    }), []);
+
     // ← ADD THIS FUNCTION
     const checkRsvpStatus = async (eventIds) => {
         try {
@@ -2,6 +2,8 @@ import React, { useState, useEffect, useCallback } from 'react';
 import { FaFileAlt } from 'react-icons/fa';
 import { useNavigate } from 'react-router-dom';
 import './StudentProfile.css';
+import { fetchPage } from '../utils/pagination';
+import LoadMoreButton from './LoadMoreButton';
 
 const API_BASE_URL = 'http://localhost:5001/api';
 
@@ -11,6 +13,7 @@ const StudentProfile = () => {
     const [error, setError] = useState('');
     const [profile, setProfile] = useState(null);
     const [savedEvents, setSavedEvents] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
 
     const fetchProfile = useCallback(async () => {
         try {
@@ -40,21 +43,23 @@ const StudentProfile = () => {
         }
     }, [navigate]);
 
-    const fetchSavedEvents = useCallback(async () => {
+    // The first page, or the page after cursor when the user asks for more
+    const fetchSavedEvents = useCallback(async (cursor = null) => {
         try {
             const token = localStorage.getItem('token');
             console.log('📥 Fetching saved/RSVP events...');
             
-            const response = await fetch(`${API_BASE_URL}/events/rsvp`, {
+            const response = await fetchPage(`${API_BASE_URL}/events/rsvp`, cursor, {
                 headers: {
                     'Authorization': `Bearer ${token}`
                 }
             });
 
             if (response.ok) {
-                const data = await response.json();
+                const data = response.data;
                 console.log('✅ Saved events:', data);
-                setSavedEvents(data);
+                setSavedEvents(prev => cursor ? [...prev, ...data] : data);
+                setNextCursor(response.nextCursor);
             } else {
                 console.error('❌ Failed to fetch saved events');
             }
@@ -85,8 +90,8 @@ const StudentProfile = () => {
 
             if (response.ok) {
                 console.log('✅ RSVP removed');
-                // Refresh the saved events list
-                fetchSavedEvents();
+                // Remove from the list, keeping the pages already loaded
+                setSavedEvents(prev => prev.filter(event => event.id !== eventId));
             } else {
                 alert('Failed to remove event');
             }
@@ -321,6 +326,7 @@ const StudentProfile = () => {
                             No saved events yet. Browse events and RSVP to see them here!
                         </p>
                     )}
+                    <LoadMoreButton nextCursor={nextCursor} onLoadMore={fetchSavedEvents} />
                 </div>
             </div>
         </div>
@@ -0,0 +1,20 @@
+// Lists are paginated by the API: each page is a JSON array, and the cursor
+// of the next page comes back in the X-Next-Cursor header, absent on the
+// last page. Lists show their first page and fetch the next one only when
+// asked to (see LoadMoreButton), passing back the cursor they were given.
+export const fetchPage = async (url, cursor = null, options = {}) => {
+    const separator = url.includes('?') ? '&' : '?';
+    const pageUrl = cursor ? `${url}${separator}cursor=${encodeURIComponent(cursor)}` : url;
+
+    const response = await fetch(pageUrl, options);
+    if (!response.ok) {
+        return { ok: false, status: response.status, data: [], nextCursor: null };
+    }
+
+    return {
+        ok: true,
+        status: response.status,
+        data: await response.json(),
+        nextCursor: response.headers.get('X-Next-Cursor')
+    };
+};
@@ -0,0 +1,116 @@
+const API_BASE_URL = 'http://localhost:5001/api';
+
+// Live updates pushed by the API over Server-Sent Events: 'message',
+// 'unread', 'rsvp', 'broadcast', and 'resync' when updates were missed and
+// lists should be re-fetched.
+//
+// All the components of a tab share one EventSource: it is opened by the
+// first subscriber and closed when the last one unsubscribes. EventSource
+// cannot send an Authorization header, so each time the stream is opened a
+// short-lived stream token is fetched for the query string, rather than
+// putting the login token there. A token opens one stream only, so when
+// the browser's own reconnect is turned away and the stream is closed, it
+// is reopened with a new token after a growing delay, resuming from the
+// last event seen.
+const EVENT_TYPES = ['message', 'unread', 'rsvp', 'broadcast', 'resync'];
+const MIN_RETRY_MS = 3000;
+const MAX_RETRY_MS = 30000;
+
+const subscribers = new Set();
+let source = null;
+let retryTimer = null;
+let retryMs = MIN_RETRY_MS;
+let lastEventId = null;
+
+const fetchStreamToken = async () => {
+    const token = localStorage.getItem('token');
+    if (!token) {
+        return null;
+    }
+
+    const response = await fetch(`${API_BASE_URL}/stream/token`, {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${token}` }
+    });
+    if (!response.ok) {
+        throw new Error(`Stream token request failed: ${response.status}`);
+    }
+    return (await response.json()).token;
+};
+
+const scheduleReopen = () => {
+    clearTimeout(retryTimer);
+    retryTimer = setTimeout(open, retryMs);
+    retryMs = Math.min(retryMs * 2, MAX_RETRY_MS);
+};
+
+const open = async () => {
+    let streamToken;
+    try {
+        streamToken = await fetchStreamToken();
+    } catch (err) {
+        console.error('Error opening live updates:', err);
+        scheduleReopen();
+        return;
+    }
+
+    // Signed out, or everyone unsubscribed while the token was on its way
+    if (!streamToken || !subscribers.size || source) {
+        return;
+    }
+
+    const resume = lastEventId ? `&last_event_id=${encodeURIComponent(lastEventId)}` : '';
+    source = new EventSource(`${API_BASE_URL}/stream?token=${encodeURIComponent(streamToken)}${resume}`);
+
+    EVENT_TYPES.forEach((type) => {
+        source.addEventListener(type, (event) => {
+            if (event.lastEventId) {
+                lastEventId = event.lastEventId;
+            }
+            const data = JSON.parse(event.data);
+            subscribers.forEach((handlers) => {
+                if (handlers[type]) {
+                    handlers[type](data);
+                }
+            });
+        });
+    });
+
+    source.onopen = () => {
+        retryMs = MIN_RETRY_MS;
+    };
+
+    source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) {
+            source = null;
+            scheduleReopen();
+        }
+    };
+};
+
+// Subscribers fetch what they show when they mount, so nothing is replayed to them
+const close = () => {
+    clearTimeout(retryTimer);
+    retryMs = MIN_RETRY_MS;
+    lastEventId = null;
+    if (source) {
+        source.close();
+        source = null;
+    }
+};
+
+// Calls handlers[type](data) for each event of the shared stream.
+// Returns a function that unsubscribes.
+export const subscribe = (handlers) => {
+    subscribers.add(handlers);
+    if (subscribers.size === 1) {
+        open();
+    }
+
+    return () => {
+        subscribers.delete(handlers);
+        if (!subscribers.size) {
+            close();
+        }
+    };
+};